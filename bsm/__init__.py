@@ -1,11 +1,8 @@
 import os
 import copy
 
-from bsm.const import BSM_HOME, BSM_VERSION
-
-from bsm.config import Config
-from bsm.env import Env
-from bsm.operation import Operation
+from bsm.const import BSM_HOME
+from bsm.const import bsm_version
 
 from bsm.logger import add_stream_logger
 from bsm.logger import get_logger
@@ -14,6 +11,9 @@ _logger = get_logger()
 
 class Bsm(object):
     def __init__(self, config_entry={}, initial_env=None):
+        # Import here so that "import bsm" stays cheap for the cli
+        from bsm.config import Config
+
         if initial_env is None:
             initial_env = os.environ
 
@@ -21,15 +21,24 @@ class Bsm(object):
         self.__config_entry = copy.deepcopy(self.__config_entry_input)
         self.__config = Config(self.__config_entry, initial_env)
 
+        self.__init_logger()
+
+        self.__init_env(initial_env)
+
+    def __init_logger(self):
         add_stream_logger(self.__config['output']['verbose'], self.__config['output']['quiet'])
 
+    def __init_env(self, initial_env):
+        from bsm.env import Env
+        from bsm.operation import Operation
+
         self.__env = Env(initial_env=initial_env, env_prefix=self.__config['app']['env_prefix'])
 
         self.__operation = Operation(self.__config, self.__env)
 
 
     def version(self):
-        return BSM_VERSION
+        return bsm_version()
 
     def home(self):
         return BSM_HOME
@@ -44,12 +53,24 @@ class Bsm(object):
     def __watch_config(self):
         if self.__config_entry == self.__config_entry_input:
             return
-        self.reload_config()
+        # Only the configs depending on the changed entry keys will be reloaded
+        self.__config_entry = copy.deepcopy(self.__config_entry_input)
+        self.__config.update_entry(self.__config_entry)
+        self.__init_logger()
 
 
     def reload_config(self):
         self.__config_entry = copy.deepcopy(self.__config_entry_input)
         self.__config.reset(self.__config_entry)
+        self.__init_logger()
+
+    def reset_env(self, initial_env=None):
+        '''Start over from another initial environment, while keeping the loaded configs'''
+        if initial_env is None:
+            initial_env = os.environ
+
+        self.__config.reset_env(initial_env)
+        self.__init_env(initial_env)
 
 
     @property
@@ -106,8 +127,8 @@ class Bsm(object):
         return self.__operation.execute('ls')
 
     @__auto_reload
-    def use(self):
-        self.__operation.execute('use')
+    def use(self, shell_name=None):
+        return self.__operation.execute('use', shell_name)
 
     @__auto_reload
     def ls_package(self):
@@ -138,11 +138,13 @@ def ls_pkg(ctx):
 @click.option('--no-software', is_flag=True, help='Do not install softwares, only install the release')
 @click.option('--force', '-f', is_flag=True, help='Skip checking system requirements')
 @click.option('--yes', '-y', is_flag=True, help='Install without confirmation')
+@click.option('--jobs', '-j', type=int, help='Maximum number of install steps running at the same time')
 @click.argument('version', type=str)
 @click.pass_context
-def install(ctx, software_root, release_repo, release_source, option, reinstall, update, no_software, force, yes, version):
+def install(ctx, software_root, release_repo, release_source, option, reinstall, update, no_software, force, yes, jobs, version):
     '''Install specified release version'''
     cmd = Cmd()
+    ctx.obj['config_entry']['jobs'] = jobs
     ctx.obj['config_entry']['software_root'] = software_root
     ctx.obj['config_entry']['release_repo'] = release_repo
     ctx.obj['config_entry']['release_source'] = release_source
@@ -160,10 +162,10 @@ def install(ctx, software_root, release_repo, release_source, option, reinstall,
 def use(ctx, software_root, default, option, version):
     '''Switch environment to given release version'''
     cmd = Cmd()
-    ctx.obj['software_root'] = software_root
+    ctx.obj['config_entry']['software_root'] = software_root
     ctx.obj['config_entry']['option'] = parse_lines(option)
     ctx.obj['config_entry']['scenario'] = version
-    cmd.execute('use', ctx.obj, default=default)
+    cmd.execute('use', ctx.obj, default=default, shell=ctx.obj['output']['shell'])
 
 
 @cli.command()
@@ -184,6 +186,18 @@ def pack(ctx, destination, version):
     cmd.execute(ctx.obj, destination=destination, version_name=version)
 
 
-def main(cmd_name=None, app_root=None, output_shell=None, check_cli=False):
+@cli.command()
+@click.option('--idle-timeout', type=int, default=3600, help='Exit after idle for the seconds, 0 for never')
+@click.option('--cache-ttl', type=int, default=300, help='Seconds to keep the loaded configuration')
+@click.argument('action', type=click.Choice(['start', 'stop', 'status']), default='status')
+@click.pass_context
+def daemon(ctx, idle_timeout, cache_ttl, action):
+    '''Manage the background daemon which speeds up commands'''
+    cmd = Cmd()
+    cmd.execute('daemon', ctx.obj, action, idle_timeout, cache_ttl)
+
+
+def main(cmd_name=None, app_root=None, output_shell=None, check_cli=False, args=None, bsm_pool=None):
     '''The app_root and output_shell here take precedence over cli arguments'''
-    cli(prog_name=cmd_name, obj={'config_entry': {'app_root': app_root}, 'output': {'shell': output_shell}, 'check_cli': check_cli})
+    cli(args=args, prog_name=cmd_name, obj={'config_entry': {'app_root': app_root}, 'output': {'shell': output_shell},
+        'check_cli': check_cli, 'bsm_pool': bsm_pool})
@@ -1,13 +1,13 @@
 import sys
-import traceback
 
 import click
 
 from bsm import Bsm
 from bsm.loader import load_common
-from bsm.config.release import ConfigReleaseError
 from bsm.shell import Shell
+from bsm.shell import SCRIPT_HEADER
 from bsm.cmd.output import Output
+from bsm.config.errors import ConfigReleaseError
 from bsm.util import ensure_list
 
 from bsm.logger import get_logger
@@ -19,9 +19,10 @@ class CmdError(Exception):
 
 
 class CmdResult(object):
-    def __init__(self, output='', script_types=[]):
+    def __init__(self, output='', script_types=[], source_files=[]):
         self.__output = output
         self.__script_types = ensure_list(script_types)
+        self.__source_files = ensure_list(source_files)
 
     @property
     def output(self):
@@ -31,6 +32,10 @@ class CmdResult(object):
     def script_types(self):
         return self.__script_types
 
+    @property
+    def source_files(self):
+        return self.__source_files
+
 
 def _convert_cmd_result(result):
     if isinstance(result, CmdResult):
@@ -38,7 +43,7 @@ def _convert_cmd_result(result):
     return CmdResult(result)
 
 
-def _generate_script(cmd_name, app_root, shell_name, output, env_changes, script_types):
+def _generate_script(cmd_name, app_root, shell_name, output, env_changes, script_types, source_files):
     try:
         shell = Shell(shell_name, cmd_name, app_root)
     except Exception as e:
@@ -47,6 +52,11 @@ def _generate_script(cmd_name, app_root, shell_name, output, env_changes, script
     shell.comment('Setup env and alias')
     shell.add_env(env_changes)
 
+    shell.newline()
+    shell.comment('Source script files')
+    for sf in source_files:
+        shell.source(sf)
+
     shell.newline()
     shell.comment('Add definition script')
     for st in script_types:
@@ -75,7 +85,10 @@ class Cmd(object):
             click.echo('BSM:COMMAND_LINE_INTERFACE_OK')
             return
 
-        bsm = Bsm(obj['config_entry'])
+        if obj.get('bsm_pool') is not None:
+            bsm = obj['bsm_pool'].get(obj['config_entry'])
+        else:
+            bsm = Bsm(obj['config_entry'])
 
         try:
             cmd = load_common(subcmd_name, 'bsm.cmd')(bsm, obj['output']['format'])
@@ -98,7 +111,8 @@ class Cmd(object):
 
             if obj['output']['shell']:
                 final_output = _generate_script(bsm.config('app')['cmd_name'], bsm.config('app').get('app_root', ''),
-                        obj['output']['shell'], final_output, env_changes, cmd_result.script_types)
+                        obj['output']['shell'], final_output, env_changes, cmd_result.script_types, cmd_result.source_files)
+                final_output = SCRIPT_HEADER + '\n' + final_output
         except ConfigReleaseError as e:
             _logger.error(str(e))
             _logger.critical('Can not load release version: {0}'.format(bsm.config('entry')['scenario']))
@@ -106,6 +120,7 @@ class Cmd(object):
         except Exception as e:
             _logger.critical('Fatal error ({0}): {1}'.format(type(e).__name__, e))
             if bsm.config('output')['verbose']:
+                import traceback
                 _logger.critical('\n{0}'.format(traceback.format_exc()))
             sys.exit(1)
 
@@ -0,0 +1,27 @@
+from bsm.cmd import Base
+from bsm.cmd import CmdError
+
+from bsm.daemon import start_daemon
+from bsm.daemon import stop_daemon
+from bsm.daemon import daemon_status
+from bsm.daemon import daemon_socket
+from bsm.daemon import DaemonError
+from bsm.daemon import DaemonNotRunningError
+
+class Daemon(Base):
+    def execute(self, action, idle_timeout, cache_ttl):
+        try:
+            if action == 'start':
+                start_daemon(idle_timeout, cache_ttl)
+                return 'Daemon started on "{0}"'.format(daemon_socket())
+
+            if action == 'stop':
+                result = stop_daemon()
+                return 'Daemon (pid {0}) stopped'.format(result['pid'])
+
+            result = daemon_status()
+            return 'Daemon (pid {0}) is running on "{1}"'.format(result['pid'], daemon_socket())
+        except DaemonNotRunningError:
+            return 'Daemon is not running'
+        except DaemonError as e:
+            raise CmdError(str(e))
@@ -1,6 +1,6 @@
 from bsm.cmd import Base
 
-from bsm.config.release import ConfigReleaseError
+from bsm.config.errors import ConfigReleaseError
 
 from bsm.logger import get_logger
 _logger = get_logger()
@@ -12,7 +12,7 @@ class Install(Base):
             self._bsm.install_release()
 
         if not no_software:
-            pass
+            self._bsm.install_software()
 
         return self._bsm.config('scenario')['version']
 
@@ -1,11 +1,16 @@
 from bsm.cmd import Base
+from bsm.cmd import CmdResult
 
 from bsm.logger import get_logger
 _logger = get_logger()
 
 class Use(Base):
-    def execute(self, default=False):
-        return self._bsm.use()
+    def execute(self, default=False, shell=None):
+        # The activation script from install-release is sourced if up to date
+        script_file = self._bsm.use(shell)
+        if script_file:
+            return CmdResult(source_files=script_file)
+        return ''
 
 
         obj = BsmUse(config_user, config_version, config_release)
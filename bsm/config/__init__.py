@@ -1,3 +1,4 @@
+import os
 import collections
 import copy
 
@@ -12,36 +13,97 @@ class ConfigNoDirectModError(Exception):
 
 
 from bsm.config.common import Common as ConfigCommon
-from bsm.config.app import App as ConfigApp
-from bsm.config.env import Env as ConfigEnv
-from bsm.config.scenario import Scenario as ConfigScenario
-from bsm.config.release_path import ReleasePath as ConfigReleasePath
-from bsm.config.release import Release as ConfigRelease
-from bsm.config.category import Category as ConfigCategory
-from bsm.config.package_install import PackageInstall as ConfigPackageInstall
-from bsm.config.packages import Packages as ConfigPackages
-
-from bsm.handler import Handler
-from bsm.handler import HandlerNotFoundError
+
+from bsm.loader import load_common
 
 from bsm.logger import get_logger
 _logger = get_logger()
 
 
+# Config modules are only imported when the config is really loaded
+def _config_class(config_type):
+    return load_common(config_type, 'bsm.config')
+
+
+# These configs are expensive to load and will be saved in the config cache.
+# The attribute config is loaded on each host, since it depends on the host (os, arch...)
+_CACHED_CONFIG = ('release', 'category', 'package_install')
+
+# Configs used to locate and validate the config cache
+_CACHE_DEPENDENCY = ('user', 'app', 'scenario', 'release_path', 'attribute')
+
+
+def _env_snapshot(initial_env, env_prefix):
+    '''Only the variables with the prefix are read by the configs'''
+    if initial_env is None:
+        initial_env = os.environ
+    prefix = env_prefix + '_'
+    return dict((k, v) for k, v in initial_env.items() if k.startswith(prefix))
+
+
+class _Entry(ConfigCommon):
+    '''Entry config which reports the keys read by the other configs'''
+    def __init__(self, on_read):
+        self.__on_read = on_read
+        super(_Entry, self).__init__()
+
+    def __getitem__(self, key):
+        self.__on_read(key)
+        return super(_Entry, self).__getitem__(key)
+
+    def __iter__(self):
+        # Iterating means depending on all the keys
+        self.__on_read(None)
+        return super(_Entry, self).__iter__()
+
+
 class Config(collections.MutableMapping):
     def __init__(self, config_entry={}, initial_env=None):
         self.__initial_env = initial_env
+        self.__env_snapshot = None
         self.reset(config_entry)
 
     def reset(self, config_entry=None):
         if config_entry is None and 'entry' in self:
             config_entry = self['entry']
         self.__config = {}
-        self.__config['entry'] = ConfigCommon()
+        self.__cache = None
+        self.__env_snapshot = None
+
+        # Which configs are loaded with the config (or entry key) read
+        self.__dependents = {}
+        self.__loading = []
+
+        self.__config['entry'] = _Entry(self.__read_entry)
         for k, v in config_entry.items():
             if v is not None:
                 self['entry'][k] = v
 
+    def update_entry(self, config_entry):
+        '''Update the entry and only drop the configs depending on the changed keys'''
+        entry = self.__config['entry'].data
+        new_entry = dict((k, v) for k, v in config_entry.items() if v is not None)
+
+        changed = [k for k in set(entry) | set(new_entry) if k not in entry or k not in new_entry or entry[k] != new_entry[k]]
+        if not changed:
+            return
+
+        entry.clear()
+        entry.update(copy.deepcopy(new_entry))
+
+        self.__invalidate([('entry', k) for k in changed] + [('entry', None)])
+
+    def reset_env(self, initial_env=None):
+        '''Drop the env config and all the configs loaded from it, if the environment is changed'''
+        self.__initial_env = initial_env
+        if self.__env_snapshot is not None and \
+                self.__env_snapshot == _env_snapshot(initial_env, self['app']['env_prefix']):
+            return
+
+        self.__env_snapshot = None
+        self.__config.pop('env', None)
+        self.__invalidate(['env'])
+
 
     # This method implements the lazy load of configs
     # Configs are only loaded when accessed
@@ -49,12 +111,31 @@ class Config(collections.MutableMapping):
         def method_not_found():
             raise ConfigNotValidError('No such config: {0}'.format(key))
 
+        if self.__loading and key != 'entry':
+            self.__add_dependent(key, self.__loading[-1])
+
         if key not in self.__config:
-            load_method = getattr(self, '_Config__load_' + key, method_not_found)
-            load_method()
+            self.__loading.append(key)
+            try:
+                self.__load(key, method_not_found)
+            finally:
+                self.__loading.pop()
 
         return self.__config[key]
 
+    def __load(self, key, method_not_found):
+        if key in _CACHED_CONFIG:
+            for dep in _CACHE_DEPENDENCY:
+                self.__add_dependent(dep, key)
+            if self.__load_from_cache(key):
+                return
+
+        load_method = getattr(self, '_Config__load_' + key, method_not_found)
+        load_method()
+
+        if key in _CACHED_CONFIG:
+            self.__save_to_cache(key)
+
     def __setitem__(self, key, value):
         raise ConfigNoDirectModError('Can not modify config value directly')
         self.__config[key] = value
@@ -69,8 +150,63 @@ class Config(collections.MutableMapping):
         return len(self.__config)
 
 
+    def __add_dependent(self, key, dependent):
+        self.__dependents.setdefault(key, set()).add(dependent)
+
+    def __read_entry(self, entry_key):
+        if self.__loading:
+            self.__add_dependent(('entry', entry_key), self.__loading[-1])
+
+    def __invalidate(self, keys):
+        stale = set()
+        todo = list(keys)
+        while todo:
+            for dependent in self.__dependents.pop(todo.pop(), ()):
+                if dependent not in stale:
+                    stale.add(dependent)
+                    todo.append(dependent)
+
+        for k in stale:
+            self.__config.pop(k, None)
+        if stale.intersection(_CACHE_DEPENDENCY):
+            self.__cache = None
+
+        _logger.debug('Configs invalidated: {0}'.format(sorted(stale)))
+
+
+    def __config_cache(self):
+        if self.__cache is None:
+            self.__cache = False
+
+            enabled = self['user'].get('config_cache', self['app'].get('config_cache', True))
+            if enabled and self['scenario'].get('version') and 'status_dir' in self['release_path']:
+                from bsm.config.cache import ConfigCache
+                from bsm.config.cache import config_input_files
+                self.__cache = ConfigCache(self['release_path']['status_dir'], self['scenario'], self['attribute'],
+                        config_input_files(self))
+
+        return self.__cache
+
+    def __load_from_cache(self, key):
+        cache = self.__config_cache()
+        if not cache or cache.get(key) is None:
+            return False
+        self.__config[key] = cache.get(key)
+        return True
+
+    def __save_to_cache(self, key):
+        cache = self.__config_cache()
+        if not cache:
+            return
+        cache.put(key, self.__config[key])
+
+        # Write the cache file only once after the outermost cached config is loaded
+        if not any(k in _CACHED_CONFIG for k in self.__loading[:-1]):
+            cache.save()
+
+
     def __load_app(self):
-        self.__config['app'] = ConfigApp()
+        self.__config['app'] = _config_class('app')()
         self['app'].load(self['entry'].get('app_root', ''))
 
     def __load_example(self):
@@ -83,8 +219,9 @@ class Config(collections.MutableMapping):
             self['example']['content'] = ''
 
     def __load_env(self):
-        self.__config['env'] = ConfigEnv()
+        self.__config['env'] = _config_class('env')()
         self['env'].load(self.__initial_env, self['app']['env_prefix'])
+        self.__env_snapshot = _env_snapshot(self.__initial_env, self['app']['env_prefix'])
 
     def __load_user(self):
         self.__config['user'] = ConfigCommon()
@@ -119,11 +256,11 @@ class Config(collections.MutableMapping):
         self['info'].load_from_file(expand_path(self['app']['config_info_file']))
 
     def __load_scenario(self):
-        self.__config['scenario'] = ConfigScenario()
+        self.__config['scenario'] = _config_class('scenario')()
         self['scenario'].load(self['entry'], self['app'], self['env'], self['user'])
 
     def __load_release_path(self):
-        self.__config['release_path'] = ConfigReleasePath()
+        self.__config['release_path'] = _config_class('release_path')()
         self['release_path'].load(self['scenario'], self['app']['release_work_dir'])
 
     def __load_release_status(self):
@@ -131,6 +268,9 @@ class Config(collections.MutableMapping):
         self['release_status'].load_from_file(self['release_path']['status_file'])
 
     def __load_attribute(self):
+        from bsm.handler import Handler
+        from bsm.handler import HandlerNotFoundError
+
         self.__config['attribute'] = ConfigCommon()
         if 'handler_python_dir' not in self['release_path']:
             return
@@ -142,6 +282,9 @@ class Config(collections.MutableMapping):
 
     # Release defined options, for display purpose only
     def __load_option_list(self):
+        from bsm.handler import Handler
+        from bsm.handler import HandlerNotFoundError
+
         self.__config['option_list'] = ConfigCommon()
         if 'handler_python_dir' not in self['release_path']:
             return
@@ -152,19 +295,19 @@ class Config(collections.MutableMapping):
             _logger.debug('Handler for option not found')
 
     def __load_release(self):
-        self.__config['release'] = ConfigRelease()
+        self.__config['release'] = _config_class('release')()
         self['release'].load(self['app'], self['scenario'], self['release_path'], self['attribute'])
 
     def __load_category(self):
-        self.__config['category'] = ConfigCategory()
+        self.__config['category'] = _config_class('category')()
         self['category'].load(self['app'], self['scenario'], self['release'])
 
     def __load_package_install(self):
-        self.__config['package_install'] = ConfigPackageInstall()
+        self.__config['package_install'] = _config_class('package_install')()
         self['package_install'].load(self['app'], self['scenario'], self['release_path'], self['attribute'], self['release'], self['category'])
 
     def __load_packages(self):
-        self.__config['packages'] = ConfigPackages()
+        self.__config['packages'] = _config_class('packages')()
         self['packages'].load(self['app'], self['env'], self['release'], self['category'])
 
 
@@ -1,6 +1,6 @@
 import os
 
-from bsm import BSM_HOME
+from bsm.const import BSM_HOME
 from bsm.config.common import Common
 from bsm.util import expand_path
 
@@ -39,6 +39,7 @@ class App(Common):
         self.setdefault('category_work_dir', '.bsm')
         self.setdefault('package_config_name', '.'+app_id+'.yml')
         self.setdefault('env', {})
+        self.setdefault('config_load_workers', 8)
 
         self.setdefault('release_repo', 'https://github.com/bsmsoft/bsmdemo')
         self.setdefault('software_root', '~/bsmdemo')
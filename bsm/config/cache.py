@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import hashlib
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from bsm.const import BSM_HOME
+from bsm.const import bsm_version
+
+from bsm.util import expand_path
+from bsm.util import safe_mkdir
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+_CACHE_DIR_NAME = 'config_cache'
+
+_CONFIG_EXTENSIONS = ('.yml', '.yaml')
+_HANDLER_EXTENSIONS = ('.py',)
+
+
+def _walk_files(directory, extensions):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for f in sorted(files):
+            if os.path.splitext(f)[1] in extensions:
+                yield os.path.join(root, f)
+
+def config_input_files(config):
+    '''All the files which could affect the loaded release configs'''
+    config_user_file = config['entry'].get('config_user_file', config['app']['config_user_file'])
+    yield expand_path(config_user_file)
+
+    if 'app_root' in config['app']:
+        yield os.path.join(config['app']['app_root'], 'main.yml')
+        yield os.path.join(config['app']['app_root'], 'extra.yml')
+
+    for f in _walk_files(config['release_path']['config_dir'], _CONFIG_EXTENSIONS):
+        yield f
+
+    for f in _walk_files(config['release_path']['handler_python_dir'], _HANDLER_EXTENSIONS):
+        yield f
+
+    for f in _walk_files(os.path.join(BSM_HOME, 'handler'), _HANDLER_EXTENSIONS):
+        yield f
+
+
+def _fingerprint(files):
+    result = []
+    for f in files:
+        try:
+            st = os.stat(f)
+            result.append((f, st.st_mtime, st.st_size))
+        except OSError:
+            result.append((f, None, None))
+    return result
+
+def _manifest(files):
+    return {
+        'bsm_version': bsm_version(),
+        'python_version': list(sys.version_info[:2]),
+        'files': _fingerprint(files),
+    }
+
+
+class ConfigCache(object):
+    '''Cache of loaded configs for one scenario
+
+    The cache is only valid when the bsm version and all the input files
+    are exactly the same as when it was saved. Hosts with different
+    attributes use different cache files.
+    '''
+    def __init__(self, status_dir, config_scenario, config_attribute, input_files):
+        # Options are included in the scenario config
+        key_content = json.dumps([config_scenario.data, config_attribute.data, list(sys.version_info[:2])],
+                sort_keys=True, default=str)
+        key = hashlib.sha1(key_content.encode('utf-8')).hexdigest()
+        self.__cache_file = os.path.join(status_dir, _CACHE_DIR_NAME, key + '.pickle')
+
+        self.__manifest = _manifest(input_files)
+        self.__nodes = self.__load()
+        self.__changed = False
+
+    def __load(self):
+        try:
+            with open(self.__cache_file, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            _logger.debug('Config cache not loaded from "{0}": {1}'.format(self.__cache_file, e))
+            return {}
+
+        if not isinstance(cache, dict) or cache.get('manifest') != self.__manifest:
+            _logger.debug('Config cache is out of date: {0}'.format(self.__cache_file))
+            return {}
+
+        _logger.debug('Config cache loaded from: {0}'.format(self.__cache_file))
+        return cache.get('nodes', {})
+
+    def save(self):
+        '''Write all the nodes put since last save'''
+        if not self.__changed:
+            return
+        self.__changed = False
+
+        cache = {'manifest': self.__manifest, 'nodes': self.__nodes}
+        temp_file = '{0}.{1}.tmp'.format(self.__cache_file, os.getpid())
+        try:
+            safe_mkdir(os.path.dirname(self.__cache_file))
+            with open(temp_file, 'wb') as f:
+                pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_file, self.__cache_file)
+        except Exception as e:
+            # The release directory may be read only
+            _logger.debug('Config cache not saved to "{0}": {1}'.format(self.__cache_file, e))
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def get(self, config_type):
+        return self.__nodes.get(config_type)
+
+    def put(self, config_type, node):
+        self.__nodes[config_type] = node
+        self.__changed = True
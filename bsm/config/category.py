@@ -15,6 +15,7 @@ class Category(Common):
         self[ctg]['auto_env'] = ctg_cfg.get('auto_env', False)
         self[ctg]['version_dir'] = ctg_cfg.get('version_dir', False)
         self[ctg]['share_env'] = ctg_cfg.get('share_env', False)
+        self[ctg]['resources'] = ctg_cfg.get('resources', {})
 
         if 'root' not in ctg_cfg:
             self[ctg]['install'] = False
@@ -0,0 +1,2 @@
+class ConfigReleaseError(Exception):
+    pass
@@ -1,8 +1,9 @@
 import os
-import sys
 import copy
 
 from bsm.config.common import Common
+from bsm.config.view import MappingView
+from bsm.config.view import materialize
 
 from bsm.handler import Handler
 from bsm.handler import HandlerNotFoundError
@@ -14,6 +15,9 @@ from bsm.logger import get_logger
 _logger = get_logger()
 
 
+class ConfigPackageInstallError(Exception):
+    pass
+
 class ConfigPackageInstallStepError(Exception):
     pass
 
@@ -49,7 +53,7 @@ class PackageInstall(Common):
         if len(all_steps) == 0:
             _logger.warn('No install steps specified')
 
-        sys.path.insert(0, config_release_path['handler_python_dir'])
+        packages = []
 
         config_release_package = config_release.get('package', {})
         for identifier, pkg_cfg in config_release_package.items():
@@ -111,49 +115,114 @@ class PackageInstall(Common):
                 final_config['config_origin'] = copy.deepcopy(pkg_cfg)
                 final_config['config_origin']['version'] = ver
 
-                final_config['config'] = self.__transform_package(category_name, pkg_name, subdir, ver, pkg_cfg,
-                        config_app, config_scenario, config_release_path, config_attribute, config_release, config_category)
-                final_config['config']['name'] = pkg_name
-                final_config['config']['category'] = category_name
-                final_config['config']['subdir'] = subdir
-                if 'version' not in final_config['config']:
-                    final_config['config']['version'] = ver
-
-                final_config['common_path'] = self.__common_path(config_category, final_config['config'])
-                self.__expand_package_path(final_config['common_path']['main_dir'], final_config['config'])
-                self.__expand_env(final_config['config'])
+                packages.append({'category': category_name, 'name': pkg_name, 'subdir': subdir, 'version': ver,
+                    'config_package': pkg_cfg, 'final_config': final_config})
+
+        config_shared = {
+            'config_app': config_app,
+            'config_scenario': config_scenario,
+            'config_release_path': config_release_path,
+            'config_attribute': config_attribute,
+            'config_release': config_release,
+            'config_category': config_category,
+        }
+
+        # The same views are passed to the handler for all the packages
+        shared_param = self.__shared_param(config_shared)
+
+        with Handler(config_release_path['handler_python_dir']) as h:
+            transformed = self.__transform_packages(h, packages, shared_param)
+            if transformed is None:
+                transformed = []
+                for pkg in packages:
+                    transformed.append(self.__transform_package(h, pkg, shared_param))
+                    self.__renew_shared_param(shared_param, config_shared)
+
+        for pkg, pkg_config in zip(packages, transformed):
+            final_config = pkg['final_config']
+
+            final_config['config'] = pkg_config
+            final_config['config']['name'] = pkg['name']
+            final_config['config']['category'] = pkg['category']
+            final_config['config']['subdir'] = pkg['subdir']
+            if 'version' not in final_config['config']:
+                final_config['config']['version'] = pkg['version']
+
+            final_config['common_path'] = self.__common_path(config_category, final_config['config'])
+            self.__expand_package_path(final_config['common_path']['main_dir'], final_config['config'])
+            self.__expand_env(final_config['config'])
+
+            final_config['step'] = self.__install_step(all_steps, final_config['config'])
+
+    def __shared_param(self, config_shared):
+        # Copy-on-write views avoid deep copying all the configs for every package.
+        # The shared data is never changed by the handler.
+        param = {}
+        param['operation'] = 'install'
+        for k, v in config_shared.items():
+            param[k] = MappingView(v.data)
+        return param
+
+    def __renew_shared_param(self, shared_param, config_shared):
+        # Changes made by the handler must not be seen by the next package
+        for k, v in config_shared.items():
+            if shared_param[k].mutated:
+                shared_param[k] = MappingView(v.data)
+
+    def __transform_packages(self, h, packages, shared_param):
+        '''Transform all the packages in one call if "transform_packages" is provided
+
+        The handler receives the list of packages and must return a list
+        of the transformed package configs in the same order.
+        Return None if the handler is not available.
+        '''
+        param = dict(shared_param)
+        param['packages'] = []
+        for pkg in packages:
+            param['packages'].append({
+                'name': pkg['name'],
+                'category': pkg['category'],
+                'subdir': pkg['subdir'],
+                'version': pkg['version'],
+                'config_package': MappingView(pkg['config_package']),
+            })
 
-                final_config['step'] = self.__install_step(all_steps, final_config['config'])
+        try:
+            result = h.run('transform_packages', param)
+        except HandlerNotFoundError as e:
+            _logger.debug('Batch transformer for packages not found: {0}'.format(e))
+            return None
 
-        sys.path.remove(config_release_path['handler_python_dir'])
+        if not isinstance(result, list) or len(result) != len(packages):
+            raise ConfigPackageInstallError('Handler "transform_packages" must return a list of {0} package configs'.format(len(packages)))
 
-    def __transform_package(self, category, name, subdir, version, pkg_cfg,
-            config_app, config_scenario, config_release_path, config_attribute, config_release, config_category):
-        param = {}
-        param['operation'] = 'install'
+        transformed = []
+        for pkg, pkg_config in zip(packages, result):
+            if isinstance(pkg_config, dict):
+                # Views from param are converted to plain data here
+                transformed.append(materialize(pkg_config))
+            else:
+                transformed.append(copy.deepcopy(pkg['config_package']))
+        return transformed
 
-        param['name'] = name
-        param['category'] = category
-        param['subdir'] = subdir
-        param['version'] = version
+    def __transform_package(self, h, pkg, shared_param):
+        param = dict(shared_param)
 
-        param['config_package'] = copy.deepcopy(pkg_cfg)
-        param['config_app'] = config_app.data_copy
-        param['config_scenario'] = config_scenario.data_copy
-        param['config_release_path'] = config_release_path.data_copy
-        param['config_attribute'] = config_attribute.data_copy
-        param['config_release'] = config_release.data_copy
-        param['config_category'] = config_category.data_copy
+        param['name'] = pkg['name']
+        param['category'] = pkg['category']
+        param['subdir'] = pkg['subdir']
+        param['version'] = pkg['version']
+        param['config_package'] = MappingView(pkg['config_package'])
 
         try:
-            with Handler() as h:
-                result = h.run('transform_package', param)
-                if isinstance(result, dict):
-                    return result
+            result = h.run('transform_package', param)
+            if isinstance(result, dict):
+                # Views from param are converted to plain data here
+                return materialize(result)
         except HandlerNotFoundError as e:
             _logger.debug('Transformer for package not found: {0}'.format(e))
 
-        return copy.deepcopy(pkg_cfg)
+        return copy.deepcopy(pkg['config_package'])
 
     def __common_path(self, config_category, pkg_cfg):
         result = {}
@@ -1,12 +1,33 @@
 import os
+import copy
+import json
+import hashlib
+import tempfile
+import threading
 
-from packaging.specifiers import SpecifierSet
-from packaging.specifiers import InvalidSpecifier
+try:
+    from os import scandir as _scandir
+except ImportError:
+    _scandir = None
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 from bsm.config.common import Common
+from bsm.config.errors import ConfigReleaseError
+from bsm.config.view import MappingView
+from bsm.config.view import materialize
 
 from bsm.handler import Handler
 from bsm.handler import HandlerNotFoundError
+from bsm.handler import resolve_handler
 
 from bsm.util.config import load_config
 from bsm.util.config import ConfigError
@@ -14,37 +35,248 @@ from bsm.util.config import ConfigError
 from bsm.logger import get_logger
 _logger = get_logger()
 
-from bsm import BSM_VERSION
+from bsm.const import bsm_version
 
 _AVAILABLE_RELEASE_CONFIG = ('version', 'setting')
 
+_PACKAGE_CONFIG_EXTENSIONS = ('.yml', '.yaml')
+
+_MANIFEST_FORMAT = 3
+
 
-class ConfigReleaseError(Exception):
-    pass
+def _list_dir(directory):
+    '''Return sorted (name, full_path, is_file, is_dir) of the directory
 
+    scandir gets the file types without extra stat calls on most file systems
+    '''
+    result = []
+    if _scandir is None:
+        for r in os.listdir(directory):
+            full_path = os.path.join(directory, r)
+            result.append((r, full_path, os.path.isfile(full_path), os.path.isdir(full_path)))
+    else:
+        for entry in _scandir(directory):
+            result.append((entry.name, entry.path, entry.is_file(), entry.is_dir()))
+    result.sort()
+    return result
 
 def _walk_rel_dir(directory, rel_dir=''):
     if not os.path.isdir(directory):
-        raise StopIteration
-    res = os.listdir(directory)
-    for r in res:
-        full_path = os.path.join(directory, r)
-        if os.path.isfile(full_path):
+        return
+    for r, full_path, is_file, is_dir in _list_dir(directory):
+        if is_file:
             yield (full_path, rel_dir, r)
             continue
-        if os.path.isdir(full_path):
+        if is_dir:
             new_rel_dir = os.path.join(rel_dir, r)
             for next_full_path, next_rel_dir, next_f in _walk_rel_dir(full_path, new_rel_dir):
                 yield (next_full_path, next_rel_dir, next_f)
 
 
+def _load_worker(task_queue, result):
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        index, full_path = task
+        try:
+            result[index] = (True, load_config(full_path))
+        except Exception as e:
+            result[index] = (False, e)
+
+def _load_configs(files, workers):
+    '''Load config files concurrently and return the results in the same order
+
+    The latency of opening files on network file systems could be hidden
+    by loading them in multiple threads
+    '''
+    workers = min(workers, len(files))
+    if workers <= 1:
+        return [load_config(f) for f in files]
+
+    task_queue = Queue()
+    for index, full_path in enumerate(files):
+        task_queue.put((index, full_path))
+    for _ in range(workers):
+        task_queue.put(None)
+
+    result = [None] * len(files)
+    threads = [threading.Thread(target=_load_worker, args=(task_queue, result)) for _ in range(workers)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+
+    configs = []
+    for success, value in result:
+        if not success:
+            raise value
+        configs.append(value)
+    return configs
+
+
+class PackageConfig(Mapping):
+    '''Package configs of the release which are only loaded when accessed
+
+    The package names come from the directory listing. Each config file is
+    parsed the first time it is accessed. Iterating over items or values
+    loads all the remaining configs concurrently.
+    '''
+    def __init__(self, package_files, workers):
+        self.__names = [name for name, _ in package_files]
+        self.__files = dict(package_files)
+        self.__workers = workers
+        self.__configs = {}
+
+    def __getitem__(self, name):
+        if name not in self.__configs:
+            self.__configs[name] = load_config(self.__files[name])
+        return self.__configs[name]
+
+    def __iter__(self):
+        return iter(self.__names)
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __contains__(self, name):
+        return name in self.__files
+
+    def __repr__(self):
+        return repr(copy.deepcopy(self))
+
+    def __deepcopy__(self, memo):
+        self.load_all()
+        return dict((name, copy.deepcopy(self.__configs[name], memo)) for name in self.__names)
+
+    def load_all(self):
+        names = [name for name in self.__names if name not in self.__configs]
+        configs = _load_configs([self.__files[name] for name in names], self.__workers)
+        for name, config in zip(names, configs):
+            self.__configs[name] = config
+
+    def items(self):
+        self.load_all()
+        return super(PackageConfig, self).items()
+
+    def values(self):
+        self.load_all()
+        return super(PackageConfig, self).values()
+
+
+def _load_release_files(config_dir, workers):
+    result = {}
+
+    for k in _AVAILABLE_RELEASE_CONFIG:
+        config_file = os.path.join(config_dir, k+'.yml')
+        try:
+            result[k] = load_config(config_file)
+        except ConfigError as e:
+            _logger.warn('Fail to load config file "{0}": {1}'.format(config_file, e))
+
+    package_files = []
+    for full_path, rel_dir, f in _walk_rel_dir(os.path.join(config_dir, 'package')):
+        pkg_name, ext = os.path.splitext(f)
+        if ext not in _PACKAGE_CONFIG_EXTENSIONS:
+            continue
+        package_files.append((os.path.join(rel_dir, pkg_name), full_path))
+
+    result['package'] = PackageConfig(package_files, workers)
+
+    return result
+
+
+def _stat_entry(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return [path, None, None, None]
+    return [path, st.st_ino, st.st_mtime, st.st_size]
+
+def _manifest_stamp(config_dir):
+    '''Stamp of the release config written by install-release
+
+    The whole release directory is created again by install-release, so
+    only the config directory and the version file are checked, instead
+    of every package config. Run install-release again after editing
+    the release config in place.
+    '''
+    return [_stat_entry(config_dir), _stat_entry(os.path.join(config_dir, 'version.yml'))]
+
+def write_release_manifest(config_release_path, workers):
+    '''Consolidate all the release config files into one manifest file
+
+    The first line is the header with the content hash, the rest is the
+    release config in json
+    '''
+    config_dir = config_release_path['config_dir']
+    manifest_file = config_release_path['manifest_file']
+
+    # Taken before loading, so changes made while loading are not missed
+    stamp = _manifest_stamp(config_dir)
+
+    # Load all the package configs
+    data = copy.deepcopy(_load_release_files(config_dir, workers))
+    content = json.dumps(data, sort_keys=True)
+    if json.loads(content) != data:
+        # yaml could contain types which json can not keep, like date
+        _logger.debug('Release config could not be kept in json, manifest not written')
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        return
+
+    content = content.encode('utf-8')
+    header = {
+        'format': _MANIFEST_FORMAT,
+        'hash': hashlib.sha1(content).hexdigest(),
+        'stamp': stamp,
+    }
+
+    # Unique temporary file, so concurrent install-release will not write to the same one
+    fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(manifest_file), prefix=os.path.basename(manifest_file)+'.')
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8'))
+            f.write(b'\n')
+            f.write(content)
+        os.rename(temp_file, manifest_file)
+    except:
+        os.remove(temp_file)
+        raise
+    _logger.debug('Release manifest written: {0}'.format(manifest_file))
+
+def _load_release_manifest(manifest_file, config_dir):
+    '''Return the release config from manifest, or None if not consistent'''
+    try:
+        with open(manifest_file, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            content = f.read()
+    except (IOError, OSError, ValueError) as e:
+        _logger.debug('Release manifest not loaded: {0}'.format(e))
+        return None
+
+    if header.get('format') != _MANIFEST_FORMAT:
+        _logger.debug('Release manifest format not supported: {0}'.format(manifest_file))
+        return None
+    if header.get('stamp') != _manifest_stamp(config_dir):
+        _logger.debug('Release config changed since manifest written: {0}'.format(manifest_file))
+        return None
+    if header.get('hash') != hashlib.sha1(content).hexdigest():
+        _logger.warn('Release manifest is corrupted: {0}'.format(manifest_file))
+        return None
+
+    return json.loads(content.decode('utf-8'))
+
+
 class Release(Common):
     def load(self, config_app, config_scenario, config_release_path, config_attribute):
         if not ('version' in config_scenario and config_scenario['version']):
             _logger.debug('"version" not specified in config release')
             return
 
-        self.__load_config(config_scenario, config_release_path)
+        self.__load_config(config_app, config_scenario, config_release_path)
 
         self.__transform(config_app, config_scenario, config_release_path, config_attribute)
 
@@ -52,41 +284,43 @@ class Release(Common):
 
         self.__check_version_consistency(config_scenario)
 
-    def __load_config(self, config_scenario, config_release_path):
+    def __load_config(self, config_app, config_scenario, config_release_path):
         config_dir = os.path.join(config_release_path['config_dir'])
         if not os.path.isdir(config_dir):
             raise ConfigReleaseError('Release version "{0}" not found'.format(config_scenario['version']))
 
-        for k in _AVAILABLE_RELEASE_CONFIG:
-            config_file = os.path.join(config_dir, k+'.yml')
-            try:
-                self[k] = load_config(config_file)
-            except ConfigError as e:
-                _logger.warn('Fail to load config file "{0}": {1}'.format(config_file, e))
-
-        package_dir = os.path.join(config_dir, 'package')
-        self.__load_package_config(package_dir)
+        data = _load_release_manifest(config_release_path['manifest_file'], config_dir)
+        if data is not None:
+            _logger.debug('Release config loaded from manifest: {0}'.format(config_release_path['manifest_file']))
+            self.update(data)
+            return
 
-    def __load_package_config(self, package_dir):
-        self['package'] = {}
-        for full_path, rel_dir, f in _walk_rel_dir(package_dir):
-            if not f.endswith('.yml') and not f.endswith('.yaml'):
-                continue
-            pkg_name = os.path.splitext(f)[0]
-            self['package'][os.path.join(rel_dir, pkg_name)] = load_config(full_path)
+        self.update(_load_release_files(config_dir, config_app['config_load_workers']))
 
     def __transform(self, config_app, config_scenario, config_release_path, config_attribute):
+        # Keep the package configs lazy when there is no transformer
+        with Handler(config_release_path['handler_python_dir']):
+            if not resolve_handler('transform_release'):
+                _logger.debug('Transformer for release not found')
+                return
+
+        # The handler could read any package config, and the result is
+        # copied, so load them all concurrently instead of one by one
+        if isinstance(self.get('package'), PackageConfig):
+            self['package'].load_all()
+
         param = {}
-        param['config_app'] = config_app.data_copy
-        param['config_scenario'] = config_scenario.data_copy
-        param['config_release_path'] = config_release_path.data_copy
-        param['config_release'] = self.data_copy
-        param['config_attribute'] = config_attribute.data_copy
+        param['config_app'] = MappingView(config_app.data)
+        param['config_scenario'] = MappingView(config_scenario.data)
+        param['config_release_path'] = MappingView(config_release_path.data)
+        param['config_release'] = MappingView(self.data)
+        param['config_attribute'] = MappingView(config_attribute.data)
 
         try:
             with Handler(config_release_path['handler_python_dir']) as h:
                 result = h.run('transform_release', param)
                 if isinstance(result, dict):
+                    result = materialize(result)
                     self.clear()
                     self.update(result)
         except HandlerNotFoundError as e:
@@ -101,13 +335,16 @@ class Release(Common):
         if not version_require:
             return
 
+        from packaging.specifiers import SpecifierSet
+        from packaging.specifiers import InvalidSpecifier
+
         try:
             spec = SpecifierSet(version_require, prereleases=True)
         except InvalidSpecifier as e:
             raise ConfigReleaseError('Require statement not correct: {0}'.format(e))
 
-        if BSM_VERSION not in spec:
-            raise ConfigReleaseError('BSM version "{0}" does not follow: {1}'.format(BSM_VERSION, version_require))
+        if bsm_version() not in spec:
+            raise ConfigReleaseError('BSM version "{0}" does not follow: {1}'.format(bsm_version(), version_require))
 
     def __check_version_consistency(self, config_scenario):
         version = config_scenario.get('version')
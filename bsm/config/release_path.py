@@ -15,6 +15,7 @@ class ReleasePath(Common):
             return
 
         self['release_dir'] = os.path.join(config_scenario['software_root'], release_work_dir)
+        self['history_dir'] = os.path.join(self['release_dir'], 'history')
 
         if not ('version' in config_scenario and config_scenario['version']):
             _logger.debug('"version" not specified in config release_path')
@@ -23,6 +24,7 @@ class ReleasePath(Common):
         self['main_dir'] = os.path.join(self['release_dir'], config_scenario['version'])
         self['content_dir'] = os.path.join(self['main_dir'], 'content')
         self['config_dir'] = os.path.join(self['content_dir'], 'config')
+        self['manifest_file'] = os.path.join(self['main_dir'], 'release.manifest')
         self['handler_dir'] = os.path.join(self['content_dir'], 'handler')
         self['handler_python_dir'] = os.path.join(self['main_dir'], 'handler')
         self['handler_module_dir'] = os.path.join(self['main_dir'], 'handler', HANDLER_MODULE_NAME)
@@ -15,13 +15,17 @@ def _filter_scenario_config(config, items, veto=False):
     '''
     scenario_config = {}
 
-    for k, v in config.items():
+    # Only read the keys needed, so that the dependency on entry is precise
+    if veto:
+        keys = [k for k in config if k not in items]
+    else:
+        keys = [k for k in items if k in config]
+
+    for k in keys:
+        v = config[k]
         if v is None:
             continue
-
-        # This is equivalent to xor operation
-        if (k in items) != veto:
-            scenario_config[k] = v
+        scenario_config[k] = v
 
     return scenario_config
 
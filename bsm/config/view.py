@@ -0,0 +1,294 @@
+import copy
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+def _view(value):
+    if isinstance(value, Mapping):
+        return MappingView(value)
+    if isinstance(value, list):
+        return SequenceView(value)
+    return value
+
+# Value of the keys not yet read from a mapping which is not a dict
+_PENDING = object()
+
+def _deepcopy(value, memo):
+    # Read only mappings are also copied as dict
+    if isinstance(value, Mapping) and not isinstance(value, dict):
+        value = MappingView(value)
+    return copy.deepcopy(value, memo)
+
+def materialize(value):
+    '''Convert views to plain dict and list, deep copied'''
+    return copy.deepcopy(value)
+
+
+class MappingView(dict):
+    '''Copy-on-write view of a config dict
+
+    The view is a dict with a shallow copy of its own level, so it could
+    be compared, dumped or serialized as the plain dict. The nested dict
+    and list are shared, and are only wrapped into views when accessed,
+    so writing deep inside never changes the shared data, and only
+    copies the accessed levels.
+
+    Read only mappings like the lazy loaded package config are also
+    wrapped, and their values are only read when accessed.
+    '''
+    def __init__(self, data):
+        if isinstance(data, dict):
+            dict.__init__(self, data)
+            self.__source = None
+        else:
+            dict.__init__(self, ((k, _PENDING) for k in data))
+            self.__source = data
+        # Keys with values still shared with the original data
+        self.__shared = set(dict.keys(self))
+        self.__mutated = False
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key in self.__shared:
+            self.__shared.discard(key)
+            if value is _PENDING:
+                value = self.__source[key]
+            view = _view(value)
+            dict.__setitem__(self, key, view)
+            return view
+        return value
+
+    def __read_source(self):
+        # Read all the values left in the source, which is needed before
+        # the values are accessed directly as a dict
+        if self.__source is None:
+            return
+        if hasattr(self.__source, 'load_all'):
+            self.__source.load_all()
+        for k in self.__shared:
+            if dict.__getitem__(self, k) is _PENDING:
+                dict.__setitem__(self, k, self.__source[k])
+        self.__source = None
+
+    def __setitem__(self, key, value):
+        self.__shared.discard(key)
+        self.__mutated = True
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.__shared.discard(key)
+        self.__mutated = True
+        dict.__delitem__(self, key)
+
+    # Iterate in python, so dict(view) and update(view) get the values
+    # with __getitem__ instead of the shared ones
+    def __iter__(self):
+        return iter(dict.keys(self))
+
+    def values(self):
+        self.__read_source()
+        return [self[k] for k in self]
+
+    def items(self):
+        self.__read_source()
+        return [(k, self[k]) for k in self]
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        if key not in self:
+            return dict.pop(self, key, *args)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        if not self:
+            raise KeyError('popitem(): dictionary is empty')
+        key = next(iter(self))
+        return key, self.pop(key)
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def clear(self):
+        self.__shared.clear()
+        self.__mutated = True
+        dict.clear(self)
+
+    def __eq__(self, other):
+        self.__read_source()
+        if isinstance(other, MappingView):
+            other.__read_source()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self.__read_source()
+        return dict.__repr__(self)
+
+    def __or__(self, other):
+        result = dict(self)
+        result.update(other)
+        return result
+
+    def __ror__(self, other):
+        result = dict(other)
+        result.update(self)
+        return result
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def copy(self):
+        return materialize(self)
+
+    def __deepcopy__(self, memo):
+        self.__read_source()
+        return dict((k, _deepcopy(v, memo)) for k, v in dict.items(self))
+
+    def __reduce_ex__(self, protocol):
+        return (dict, (materialize(self),))
+
+    @property
+    def mutated(self):
+        if self.__mutated:
+            return True
+        return any(v.mutated for v in dict.values(self) if isinstance(v, (MappingView, SequenceView)))
+
+
+class SequenceView(list):
+    '''Copy-on-write view of a config list
+
+    Same as MappingView, the elements are wrapped when accessed.
+    '''
+    def __init__(self, data):
+        list.__init__(self, data)
+        # Indexes of elements already wrapped or written
+        self.__private = set()
+        self.__mutated = False
+
+    def __own(self):
+        # The indexes may change from now on, so wrap all the elements
+        for i in range(len(self)):
+            self[i]
+        self.__mutated = True
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        value = list.__getitem__(self, index)
+        if index not in self.__private:
+            self.__private.add(index)
+            view = _view(value)
+            if view is not value:
+                list.__setitem__(self, index, view)
+            return view
+        return value
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.__own()
+            list.__setitem__(self, index, value)
+            self.__private = set(range(len(self)))
+            return
+        if index < 0:
+            index += len(self)
+        list.__setitem__(self, index, value)
+        self.__private.add(index)
+        self.__mutated = True
+
+    def __delitem__(self, index):
+        self.__own()
+        list.__delitem__(self, index)
+        self.__private = set(range(len(self)))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self[i]
+
+    def insert(self, index, value):
+        self.__own()
+        list.insert(self, index, value)
+        self.__private = set(range(len(self)))
+
+    def append(self, value):
+        list.append(self, value)
+        self.__private.add(len(self)-1)
+        self.__mutated = True
+
+    def extend(self, values):
+        for v in values:
+            self.append(v)
+
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def reverse(self):
+        self.__own()
+        list.reverse(self)
+
+    def sort(self, *args, **kwargs):
+        self.__own()
+        list.sort(self, *args, **kwargs)
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def __imul__(self, n):
+        self.__own()
+        list.__imul__(self, n)
+        self.__private = set(range(len(self)))
+        return self
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __mul__(self, n):
+        return list(self) * n
+
+    __rmul__ = __mul__
+
+    def __deepcopy__(self, memo):
+        return [_deepcopy(v, memo) for v in list.__iter__(self)]
+
+    def __reduce_ex__(self, protocol):
+        return (list, (materialize(self),))
+
+    @property
+    def mutated(self):
+        if self.__mutated:
+            return True
+        return any(v.mutated for v in list.__iter__(self) if isinstance(v, (MappingView, SequenceView)))
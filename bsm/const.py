@@ -2,12 +2,22 @@ import os
 
 BSM_HOME = os.path.dirname(os.path.realpath(__file__))
 
-with open(os.path.join(BSM_HOME, 'VERSION'), 'r') as version_file:
-    BSM_VERSION = version_file.read().strip()
-
-with open(os.path.join(BSM_HOME, 'BSMCLI_CMD')) as bsmcli_cmd_file:
-    BSMCLI_CMD = bsmcli_cmd_file.read().strip()
-
 
 # This name is very long in order to avoid conflicts with other modules
 HANDLER_MODULE_NAME = '_bsm_handler_run_avoid_conflict'
+
+
+# Files are only read when the values are really needed
+_file_content = {}
+
+def _read_home_file(name):
+    if name not in _file_content:
+        with open(os.path.join(BSM_HOME, name)) as f:
+            _file_content[name] = f.read().strip()
+    return _file_content[name]
+
+def bsm_version():
+    return _read_home_file('VERSION')
+
+def bsmcli_cmd():
+    return _read_home_file('BSMCLI_CMD')
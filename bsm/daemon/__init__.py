@@ -0,0 +1,325 @@
+import os
+import sys
+import time
+import json
+import errno
+import socket
+import tempfile
+
+from bsm import Bsm
+
+from bsm.util import safe_mkdir
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+DAEMON_CLIENT = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'client.py')
+
+_SOCKET_NAME = 'daemon.sock'
+_LOG_NAME = 'daemon.log'
+
+_RECV_SIZE = 65536
+
+# The server running in the current process, if any.
+# Requests from inside the daemon must not go through the socket again.
+_current_server = None
+
+
+class DaemonError(Exception):
+    pass
+
+class DaemonNotRunningError(DaemonError):
+    pass
+
+
+def daemon_dir():
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'bsm')
+    return os.path.join(tempfile.gettempdir(), 'bsm-{0}'.format(os.getuid()))
+
+def daemon_socket():
+    return os.path.join(daemon_dir(), _SOCKET_NAME)
+
+def daemon_log():
+    return os.path.join(daemon_dir(), _LOG_NAME)
+
+
+def _recv_all(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(_RECV_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+def request(message, socket_path=None):
+    if socket_path is None:
+        socket_path = daemon_socket()
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except socket.error as e:
+        conn.close()
+        raise DaemonNotRunningError('Can not connect to daemon "{0}": {1}'.format(socket_path, e))
+
+    try:
+        conn.sendall(json.dumps(message).encode('utf-8'))
+        conn.shutdown(socket.SHUT_WR)
+        return json.loads(_recv_all(conn).decode('utf-8'))
+    finally:
+        conn.close()
+
+
+class BsmPool(object):
+    '''Keep warm Bsm instances keyed by app_root and scenario'''
+    def __init__(self, ttl=300):
+        self.__ttl = ttl
+        self.__pool = {}
+
+    def get(self, config_entry, initial_env=None):
+        key = (config_entry.get('app_root'), config_entry.get('scenario'))
+        now = time.time()
+
+        if key in self.__pool and now - self.__pool[key][1] < self.__ttl:
+            bsm = self.__pool[key][0]
+            # The config will be reloaded automatically if the entry is changed
+            bsm.entry.clear()
+            bsm.entry.update(config_entry)
+            bsm.reset_env(initial_env)
+            _logger.debug('Reuse bsm instance for {0}'.format(key))
+            return bsm
+
+        bsm = Bsm(config_entry, initial_env)
+        self.__pool[key] = (bsm, now)
+        return bsm
+
+    def clear(self):
+        self.__pool = {}
+
+
+class _Redirect(object):
+    '''Redirect stdout and stderr on file descriptor level
+
+    This will also catch the output of subprocesses and the logger
+    '''
+    def __enter__(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.__saved = {}
+        self.__files = {}
+        for fd in (1, 2):
+            self.__saved[fd] = os.dup(fd)
+            self.__files[fd] = tempfile.TemporaryFile()
+            os.dup2(self.__files[fd].fileno(), fd)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.output = {}
+        for fd in (1, 2):
+            os.dup2(self.__saved[fd], fd)
+            os.close(self.__saved[fd])
+            self.__files[fd].seek(0)
+            self.output[fd] = self.__files[fd].read().decode('utf-8', 'replace')
+            self.__files[fd].close()
+
+
+class _Environ(object):
+    '''Switch os.environ, cwd and sys.argv to the ones from client'''
+    def __init__(self, env, cwd, argv):
+        self.__env = env
+        self.__cwd = cwd
+        self.__argv = argv
+
+    def __enter__(self):
+        self.__saved_env = os.environ.copy()
+        self.__saved_cwd = os.getcwd()
+        self.__saved_argv = sys.argv
+
+        os.environ.clear()
+        os.environ.update(self.__env)
+        os.chdir(self.__cwd)
+        sys.argv = self.__argv
+        return self
+
+    def __exit__(self, type, value, traceback):
+        os.environ.clear()
+        os.environ.update(self.__saved_env)
+        os.chdir(self.__saved_cwd)
+        sys.argv = self.__saved_argv
+
+
+def _exit_code(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write('{0}\n'.format(code))
+    return 1
+
+
+class Server(object):
+    '''Serve cli requests one by one with warm Bsm instances
+
+    Requests are not run in parallel threads, because each one switches
+    os.environ, the cwd, sys.argv and the stdout/stderr fds, which are
+    shared by the whole process.
+    '''
+    def __init__(self, socket_path=None, idle_timeout=3600, cache_ttl=300):
+        if socket_path is None:
+            socket_path = daemon_socket()
+        self.__socket_path = socket_path
+        self.__idle_timeout = idle_timeout
+        self.__pool = BsmPool(cache_ttl)
+        self.__running = False
+
+    def __bind(self):
+        socket_dir = os.path.dirname(self.__socket_path)
+        safe_mkdir(socket_dir)
+        os.chmod(socket_dir, 0o700)
+
+        if os.path.exists(self.__socket_path):
+            try:
+                request({'command': 'ping'}, self.__socket_path)
+            except DaemonNotRunningError:
+                os.remove(self.__socket_path)
+            else:
+                raise DaemonError('Daemon is already running on "{0}"'.format(self.__socket_path))
+
+        self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__sock.bind(self.__socket_path)
+        self.__sock.listen(16)
+        if self.__idle_timeout:
+            self.__sock.settimeout(self.__idle_timeout)
+
+    def __run_cli(self, message):
+        from bsm.cli import main
+
+        argv = [message['cmd_name']] + message['args']
+        with _Environ(message['env'], message['cwd'], argv):
+            with _Redirect() as redirect:
+                try:
+                    main(cmd_name=message['cmd_name'], app_root=message.get('app_root'),
+                            output_shell=message.get('output_shell'), check_cli=message.get('check_cli', False),
+                            args=message['args'], bsm_pool=self.__pool)
+                    exit_code = 0
+                except SystemExit as e:
+                    exit_code = _exit_code(e.code)
+                except Exception as e:
+                    sys.stderr.write('BSM daemon error ({0}): {1}\n'.format(type(e).__name__, e))
+                    exit_code = 1
+
+        return {'exit': exit_code, 'stdout': redirect.output[1], 'stderr': redirect.output[2]}
+
+    def __handle(self, message):
+        command = message.get('command')
+        if command == 'cli':
+            return self.__run_cli(message)
+        if command == 'ping':
+            return self.status()
+        if command == 'stop':
+            return self.stop()
+        return {'error': 'Unknown command: {0}'.format(command)}
+
+    def status(self):
+        return {'pid': os.getpid()}
+
+    def stop(self):
+        self.__running = False
+        return {'pid': os.getpid()}
+
+    def serve_forever(self):
+        global _current_server
+
+        self.__bind()
+        self.__running = True
+        _current_server = self
+
+        try:
+            while self.__running:
+                try:
+                    conn, _ = self.__sock.accept()
+                except socket.timeout:
+                    _logger.info('Daemon idle for {0} seconds, exit'.format(self.__idle_timeout))
+                    break
+                except socket.error as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    raise
+
+                try:
+                    conn.settimeout(None)
+                    message = json.loads(_recv_all(conn).decode('utf-8'))
+                    response = self.__handle(message)
+                    conn.sendall(json.dumps(response).encode('utf-8'))
+                except Exception as e:
+                    _logger.error('Daemon request error ({0}): {1}'.format(type(e).__name__, e))
+                finally:
+                    conn.close()
+        finally:
+            _current_server = None
+            self.__sock.close()
+            if os.path.exists(self.__socket_path):
+                os.remove(self.__socket_path)
+
+
+def _detach(log_file):
+    pid = os.fork()
+    if pid > 0:
+        os.waitpid(pid, 0)
+        return False
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    os.chdir('/')
+    os.umask(0o077)
+
+    null_fd = os.open(os.devnull, os.O_RDWR)
+    log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    os.dup2(null_fd, 0)
+    os.dup2(log_fd, 1)
+    os.dup2(log_fd, 2)
+    os.close(null_fd)
+    os.close(log_fd)
+    return True
+
+def start_daemon(idle_timeout=3600, cache_ttl=300):
+    '''Start the daemon in background, return False in the original process'''
+    socket_path = daemon_socket()
+    safe_mkdir(os.path.dirname(socket_path))
+
+    if _current_server is not None:
+        raise DaemonError('Daemon is already running in this process')
+
+    try:
+        request({'command': 'ping'}, socket_path)
+    except DaemonNotRunningError:
+        pass
+    else:
+        raise DaemonError('Daemon is already running on "{0}"'.format(socket_path))
+
+    if not _detach(daemon_log()):
+        return False
+
+    try:
+        Server(socket_path, idle_timeout, cache_ttl).serve_forever()
+    except Exception as e:
+        _logger.critical('Daemon exit with error ({0}): {1}'.format(type(e).__name__, e))
+    finally:
+        os._exit(0)
+
+def stop_daemon():
+    if _current_server is not None:
+        return _current_server.stop()
+    return request({'command': 'stop'})
+
+def daemon_status():
+    if _current_server is not None:
+        return _current_server.status()
+    return request({'command': 'ping'})
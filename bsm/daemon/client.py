@@ -0,0 +1,110 @@
+'''Tiny client for the bsm daemon
+
+This file is executed directly by path and must only import from the
+standard library, so that it starts much faster than the full bsm cli.
+When the daemon is not available, it falls back to run the cli in process.
+
+Commands which may ask for confirmation or run for a long time are also
+run in process. The daemon serves requests one by one without a
+terminal, so they could neither read the answer nor let other commands
+run meanwhile.
+
+Usage: python client.py SOCKET CMD_NAME APP_ROOT OUTPUT_SHELL CHECK_CLI [ARGS...]
+'''
+
+import os
+import sys
+import json
+import socket
+
+_RECV_SIZE = 65536
+
+_IN_PROCESS_COMMANDS = ('install', 'pkg-install', 'pack', 'upgrade')
+
+# Global options of bsm.cli which take a value, bsm.cli could not be
+# imported here for the startup time
+_OPTIONS_WITH_VALUE = ('--app-root', '--shell', '--config-user', '--output-format')
+
+
+def _subcommand(args):
+    '''Name of the subcommand in the cli arguments, None if not found'''
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+        elif arg in _OPTIONS_WITH_VALUE:
+            skip_value = True
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
+def _fallback(cmd_name, app_root, output_shell, check_cli, args):
+    python_exe = sys.executable or 'python'
+    main_cmd = 'from bsm.cli import main;main(cmd_name={0!r},app_root={1!r},output_shell={2!r},check_cli={3!r})'.format(
+            cmd_name, app_root, output_shell, check_cli)
+    os.execv(python_exe, [python_exe, '-c', main_cmd] + args)
+
+
+def _request(socket_path, message):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+        conn.sendall(json.dumps(message).encode('utf-8'))
+        conn.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = conn.recv(_RECV_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        conn.close()
+
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+def _write(stream, content):
+    if not content:
+        return
+    if sys.version_info[0] < 3:
+        content = content.encode('utf-8')
+    stream.write(content)
+    stream.flush()
+
+
+def main():
+    socket_path, cmd_name, app_root, output_shell, check_cli = sys.argv[1:6]
+    check_cli = check_cli == 'True'
+    args = sys.argv[6:]
+
+    if _subcommand(args) in _IN_PROCESS_COMMANDS:
+        _fallback(cmd_name, app_root, output_shell, check_cli, args)
+
+    message = {
+        'command': 'cli',
+        'cmd_name': cmd_name,
+        'app_root': app_root,
+        'output_shell': output_shell,
+        'check_cli': check_cli,
+        'args': args,
+        'env': dict(os.environ),
+        'cwd': os.getcwd(),
+    }
+
+    try:
+        response = _request(socket_path, message)
+    except (socket.error, ValueError):
+        _fallback(cmd_name, app_root, output_shell, check_cli, args)
+
+    if 'exit' not in response:
+        _fallback(cmd_name, app_root, output_shell, check_cli, args)
+
+    _write(sys.stdout, response.get('stdout'))
+    _write(sys.stderr, response.get('stderr'))
+    sys.exit(response['exit'])
+
+
+if __name__ == '__main__':
+    main()
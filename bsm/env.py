@@ -2,7 +2,9 @@ import os
 import sys
 import json
 
-from bsm.const import BSMCLI_CMD
+from bsm.const import bsmcli_cmd
+
+from bsm.util import ensure_list
 
 
 def _parse_path(path_str):
@@ -12,7 +14,7 @@ def _emit_path(path_list):
     return os.pathsep.join(path_list)
 
 def _parse_info(info_str):
-    return json.loads(info)
+    return json.loads(info_str)
 
 def _emit_info(info):
     return json.dumps(info, separators=(',',':'))
@@ -46,15 +48,15 @@ class Env(object):
 
     def __init_bsmcli_bin(self):
         if not sys.executable:
-            self.__bsmcli_bin = BSMCLI_CMD
+            self.__bsmcli_bin = bsmcli_cmd()
             return
 
         python_bin_dir = os.path.dirname(sys.executable)
-        self.__bsmcli_bin = os.path.join(python_bin_dir, BSMCLI_CMD)
+        self.__bsmcli_bin = os.path.join(python_bin_dir, bsmcli_cmd())
 
     def __merge_path(self, env_name, path_list, append=False):
         original_path_list = []
-        if env_name in self.__env:
+        if self.__env.get(env_name):
             original_path_list = _parse_path(self.__env[env_name])
 
         if append:
@@ -70,7 +72,7 @@ class Env(object):
 
         original_path_list = _parse_path(self.__env[env_name])
 
-        final_path_list = [x for x in original_path_list if x not in [path_list]]
+        final_path_list = [x for x in original_path_list if x not in path_list]
 
         if not final_path_list:
             del self.__env[env_name]
@@ -156,10 +158,51 @@ class Env(object):
             self.__unload_env(app_info.get('env', {}))
             del self.__env[self.__env_name['app_info']]
 
+    def load_release(self, software_root, release_version, config_env={}):
+        self.__env[self.__env_name['software_root']] = software_root
+        self.__env[self.__env_name['release_version']] = release_version
+
+        release_info = {}
+        release_info['env'] = self.__load_env(config_env)
+        self.__env[self.__env_name['release_info']] = _emit_info(release_info)
+
+    def load_package(self, package, config_env):
+        packages_info = {}
+        if self.__env_name['packages_info'] in self.__env:
+            packages_info = _parse_info(self.__env[self.__env_name['packages_info']])
+
+        packages_info[package] = {'env': self.__load_env(config_env)}
+        self.__env[self.__env_name['packages_info']] = _emit_info(packages_info)
+
+    def unload_release(self):
+        '''Unload the packages and the release loaded before, even by other bsm processes'''
+        if self.__env_name['packages_info'] in self.__env:
+            packages_info = _parse_info(self.__env[self.__env_name['packages_info']])
+            for package_info in packages_info.values():
+                self.__unload_env(package_info.get('env', {}))
+            del self.__env[self.__env_name['packages_info']]
+
+        if self.__env_name['release_info'] in self.__env:
+            release_info = _parse_info(self.__env[self.__env_name['release_info']])
+            self.__unload_env(release_info.get('env', {}))
+            del self.__env[self.__env_name['release_info']]
+
+        for name in ('software_root', 'release_version'):
+            if self.__env_name[name] in self.__env:
+                del self.__env[self.__env_name[name]]
+
     def env_final(self):
         return self.__env.copy()
 
     def apply_changes(self):
+        '''Changes since the last call, which should be applied to the shell'''
+        changes = {}
+        changes['set_env'] = dict((k, v) for k, v in self.__env.items() if self.__old_env.get(k) != v)
+        changes['unset_env'] = sorted(k for k in self.__old_env if k not in self.__env)
+        changes['alias'] = self.__alias
+        changes['unalias'] = self.__unalias
+
         self.__old_env = self.__env.copy()
         self.__alias = {}
-        return {'set_env': {}, 'unset_env': [], 'alias': {}, 'unalias': []}
+        self.__unalias = []
+        return changes
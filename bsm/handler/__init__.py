@@ -1,7 +1,11 @@
+import os
 import sys
 
 from bsm.const import HANDLER_MODULE_NAME
 
+from bsm.loader import load_func
+from bsm.loader import LoadError
+
 from bsm.logger import get_logger
 _logger = get_logger()
 
@@ -13,32 +17,139 @@ class HandlerNotAvailableError(Exception):
     pass
 
 
-class Handler(object):
-    def __init__(self, extra_python_path=None):
-        self.__extra_python_path = extra_python_path
-        if extra_python_path is not None:
-            sys.path.insert(0, extra_python_path)
+_HANDLER_MODULE_LIST = (HANDLER_MODULE_NAME, 'bsm.handler')
 
-        self.__module_list = [HANDLER_MODULE_NAME, 'bsm.handler']
 
-    def __enter__(self):
+class _HandlerFinder(object):
+    '''Import hook which only finds the release handler module
+
+    The handler directory does not need to be in sys.path, so other
+    imports will not look into it.
+    '''
+    def __init__(self):
+        self.handler_dir = None
+
+    # Python 3.4+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname != HANDLER_MODULE_NAME or self.handler_dir is None:
+            return None
+        from importlib.machinery import PathFinder
+        return PathFinder.find_spec(fullname, [self.handler_dir])
+
+    # Python 2
+    def find_module(self, fullname, path=None):
+        if fullname != HANDLER_MODULE_NAME or self.handler_dir is None:
+            return None
+        import imp
+        try:
+            self.__found = imp.find_module(fullname, [self.handler_dir])
+        except ImportError:
+            return None
         return self
 
-    def __exit__(self, type, value, traceback):
-        if not self.__extra_python_path:
-            return
-        _logger.debug('Clear python path: {0}'.format(self.__extra_python_path))
-        sys.path.remove(self.__extra_python_path)
-        self.__extra_python_path = None
+    def load_module(self, fullname):
+        import imp
+        if fullname in sys.modules:
+            return sys.modules[fullname]
+        f, pathname, description = self.__found
+        try:
+            return imp.load_module(fullname, f, pathname, description)
+        finally:
+            if f:
+                f.close()
 
-    def run(self, handler_name, *args, **kwargs):
-        for m in self.__module_list:
+_finder = _HandlerFinder()
+
+# Resolved handler functions: handler_name -> list of run functions
+_resolved = {}
+# Stat of the release handler module directory when the handlers are resolved
+_resolved_stamp = None
+
+
+def _handler_stamp():
+    if _finder.handler_dir is None:
+        return None
+    try:
+        st = os.stat(os.path.join(_finder.handler_dir, HANDLER_MODULE_NAME))
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime)
+
+
+def reset_handler():
+    '''Unload the release handler module and forget the resolved handlers
+
+    The handlers will be found again from the handler directory
+    '''
+    global _resolved_stamp
+
+    for m in list(sys.modules):
+        if m == HANDLER_MODULE_NAME or m.startswith(HANDLER_MODULE_NAME+'.'):
+            del sys.modules[m]
+    _resolved.clear()
+    _resolved_stamp = _handler_stamp()
+
+    try:
+        # Directory listings are cached by the import system
+        from importlib import invalidate_caches
+        invalidate_caches()
+    except ImportError:
+        pass
+
+
+def register_handler_dir(handler_dir):
+    '''Set the directory where the release handler module is found
+
+    Changing the directory will unload the previous release handler module
+    '''
+    if handler_dir is not None:
+        handler_dir = os.path.abspath(handler_dir)
+    if handler_dir == _finder.handler_dir:
+        return
+
+    if _finder not in sys.meta_path:
+        sys.meta_path.insert(0, _finder)
+
+    _finder.handler_dir = handler_dir
+    reset_handler()
+    _logger.debug('Handler directory registered: {0}'.format(handler_dir))
+
+
+def registered_handler_dir():
+    return _finder.handler_dir
+
+
+def resolve_handler(handler_name):
+    # The handler module directory is created again by install-release
+    if _handler_stamp() != _resolved_stamp:
+        _logger.debug('Handler directory changed: {0}'.format(_finder.handler_dir))
+        reset_handler()
+
+    if handler_name not in _resolved:
+        funcs = []
+        for m in _HANDLER_MODULE_LIST:
             try:
-                f = load_func(m+'.'+handler_name, 'run')
-            except Exception as e:
+                funcs.append((m, load_func(m+'.'+handler_name, 'run')))
+            except LoadError as e:
                 _logger.debug('Not able to load handler {0} / {1}'.format(m, handler_name))
-                continue
+        # Also cache the empty list, so not found handlers are not searched again
+        _resolved[handler_name] = funcs
+    return _resolved[handler_name]
 
+
+class Handler(object):
+    def __init__(self, handler_python_dir=None):
+        if handler_python_dir is not None:
+            register_handler_dir(handler_python_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+    def run(self, handler_name, *args, **kwargs):
+        for m, f in resolve_handler(handler_name):
             try:
                 result = f(*args, **kwargs)
                 _logger.debug('Run handler {0} / {1}'.format(m, handler_name))
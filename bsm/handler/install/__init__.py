@@ -1,15 +1,72 @@
+from bsm.const import HANDLER_MODULE_NAME
+
+from bsm.loader import load_func
 from bsm.loader import load_relative
 from bsm.loader import LoadError
 
 from bsm.handler import HandlerNotAvailableError
+from bsm.handler import registered_handler_dir
 
-def run(action, param):
-    try:
-        run_func = load_relative('install.'+action, 'run')
-    except LoadError as e:
-        raise HandlerNotAvailableError
+from bsm.handler.install import command
+from bsm.handler.install import empty
+from bsm.handler.install import env_package
+from bsm.handler.install import save_release_status
+
+
+# Install handlers shipped with bsm
+_DISPATCH = {
+    'command': command.run,
+    'empty': empty.run,
+    'env_package': env_package.run,
+    'save_release_status': save_release_status.run,
+}
+
+BUILTIN_HANDLERS = tuple(_DISPATCH)
+
+# Install handlers provided by the release: (handler_dir, action) -> run function
+_release_dispatch = {}
+
+
+def register(action, run_func):
+    '''Register an install handler which is not in the bsm.handler.install package'''
+    _DISPATCH[action] = run_func
+
+
+def _release_handler(action):
+    key = (registered_handler_dir(), action)
+    if key not in _release_dispatch:
+        run_func = None
+        if key[0] is not None:
+            try:
+                run_func = load_func('{0}.install.{1}'.format(HANDLER_MODULE_NAME, action), 'run')
+            except LoadError:
+                pass
+        _release_dispatch[key] = run_func
+    return _release_dispatch[key]
+
+def find(action):
+    '''Find the run function of the install handler, None if not found'''
+    # Handlers from the release take precedence
+    run_func = _release_handler(action)
+
+    if run_func is None:
+        run_func = _DISPATCH.get(action)
+
+    if run_func is None:
+        try:
+            run_func = load_relative('install.'+action, 'run', __name__)
+        except LoadError as e:
+            return None
+        _DISPATCH[action] = run_func
 
     if not callable(run_func):
+        return None
+
+    return run_func
+
+def run(action, param):
+    run_func = find(action)
+    if run_func is None:
         raise HandlerNotAvailableError
 
     return run_func(param)
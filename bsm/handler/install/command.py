@@ -1,6 +1,7 @@
 from bsm.util import call_and_log
 
-def run(param):
+def command_param(param):
+    '''Return the command list, working directory and environment'''
     package_dir = param['pkg_info']['dir']['package']
     cwd = param['action_param'].get('cwd', package_dir)
 
@@ -13,11 +14,16 @@ def run(param):
     for k, v in param['action_param'].get('env', {}).items():
         env_cmd[k] = v.format(**param['pkg_dir_list'])
 
+    return cmd, cwd, env_cmd
+
+def run(param):
+    cmd, cwd, env = command_param(param)
+
     ret = 0
     with open(param['log_file'], 'w') as f:
         for c in cmd:
-            ret = call_and_log(c, log=f, cwd=package_dir, env=env)
+            ret = call_and_log(c, log=f, cwd=cwd, env=env)
             if ret != 0:
-                return {'success': False, 'message': 'Command "{0}" failed with exit code: {0}'.format(c, ret)}
+                return {'success': False, 'message': 'Command "{0}" failed with exit code: {1}'.format(c, ret)}
 
     return {'success': ret==0, 'message': 'Command exit code: {0}'.format(ret)}
@@ -1,5 +1,4 @@
 import sys
-import inspect
 
 from bsm.util import snake_to_camel
 
@@ -55,7 +54,7 @@ def load_class(module_name, class_name):
     except AttributeError as e:
         raise ClassNotFoundError('Class "{0}" not found in module "{1}": {2}'.format(class_name, module_name, e))
 
-    if not inspect.isclass(c):
+    if not isinstance(c, type):
         raise NotAClassError('"{0}" in module "{1}" is not a class'.format(class_name, module_name))
 
     return c
@@ -72,11 +71,19 @@ def load_common(name, module_prefix):
 
     return c
 
-def load_relative(module_name, attr_name):
-    caller = inspect.stack()[1]
-    caller_module = inspect.getmodule(caller[0])
-    caller_module_name = caller_module.__name__
-    parent_module_seq = caller_module_name.split('.')[:-1]
+def load_relative(module_name, attr_name, caller_name=None):
+    '''Load attribute from the module relative to the caller module
+
+    caller_name is the __name__ of the caller module. If it is not given,
+    the caller is found from the stack, which is much slower.
+    '''
+    if caller_name is None:
+        import inspect
+        caller = inspect.stack()[1]
+        caller_module = inspect.getmodule(caller[0])
+        caller_name = caller_module.__name__
+
+    parent_module_seq = caller_name.split('.')[:-1]
     full_module_name = '.'.join(parent_module_seq + [module_name])
 
     m = load_module(full_module_name)
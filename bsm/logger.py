@@ -41,10 +41,18 @@ _FORMATTER = JsubFormatter('[%(asctime)s][%(name)s|%(levelname)-4.4s] %(message)
 
 _FORMATTER_SIMPLE = logging.Formatter('[%(levelname)s] %(message)s')
 
+_stream_handler = None
+
 
 def add_stream_logger(verbose=False, quiet=False):
+    global _stream_handler
+
     logger = logging.getLogger(_MAIN_LOGGER_NAME)
 
+    # Only keep one stream handler in case this is called more than once in a process
+    if _stream_handler is not None:
+        logger.removeHandler(_stream_handler)
+
     if verbose:
         logger.setLevel(logging.DEBUG)
     elif quiet:
@@ -59,6 +67,7 @@ def add_stream_logger(verbose=False, quiet=False):
         ch.setFormatter(_FORMATTER_SIMPLE)
 
     logger.addHandler(ch)
+    _stream_handler = ch
 
 def get_logger():
     return logging.getLogger(_MAIN_LOGGER_NAME)
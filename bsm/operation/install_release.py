@@ -7,6 +7,14 @@ from bsm.util import safe_rmdir
 
 from bsm.operation import Base
 from bsm.operation.util import list_versions
+from bsm.operation.util.activation import write_activation_scripts
+
+from bsm.config.release import write_release_manifest
+
+from bsm.handler import reset_handler
+
+from bsm.logger import get_logger
+_logger = get_logger()
 
 
 class ReleaseVersionNotExistError(Exception):
@@ -43,9 +51,12 @@ class InstallRelease(Base):
 
         self.__install_definition()
         self.__install_handler()
+        self.__write_manifest()
 
         self._config.reset()
 
+        self.__write_activation()
+
         return self._config['scenario']['version']
 
     def __install_definition(self):
@@ -67,3 +78,20 @@ class InstallRelease(Base):
         handler_module_dir = conf['handler_module_dir']
 
         safe_cpdir(handler_dir, handler_module_dir)
+
+        # Handlers already loaded from the previous release are not valid any more
+        reset_handler()
+
+    def __write_manifest(self):
+        try:
+            write_release_manifest(self._config['release_path'], self._config['app']['config_load_workers'])
+        except Exception as e:
+            # Release config will be loaded from the original files
+            _logger.warn('Can not write release manifest: {0}'.format(e))
+
+    def __write_activation(self):
+        try:
+            write_activation_scripts(self._config)
+        except Exception as e:
+            # "bsm use" will load the release without the scripts
+            _logger.warn('Can not write activation scripts: {0}'.format(e))
@@ -1,19 +1,30 @@
-import sys
-
 from bsm.paradag import Dag
 from bsm.paradag import dag_run
-from bsm.paradag.sequential_processor import SequentialProcessor
+from bsm.paradag import CriticalPathSelector
+from bsm.paradag import ResourceSelector
+from bsm.paradag.compact_dag import CompactDag
 from bsm.paradag.multi_thread_processor import MultiThreadProcessor
-
-from bsm.operation.install.selector import Selector as InstallSelector
-from bsm.operation.install.executor import Executor as InstallExecutor
-from bsm.operation.install.step import Step
-
-from bsm.config.config_release import ConfigRelease
-
-from bsm.package_manager import PackageManager
-
-from bsm.util import ensure_list
+from bsm.paradag.multi_process_processor import MultiProcessProcessor
+
+from bsm.handler import register_handler_dir
+from bsm.handler.install import BUILTIN_HANDLERS
+
+from bsm.operation.util.install.selector import Selector as InstallSelector
+from bsm.operation.util.install.executor import Executor as InstallExecutor
+from bsm.operation.util.install.executor import execute_step
+from bsm.operation.util.install.history import StepHistory
+from bsm.operation.util.install.history import static_step_cost
+from bsm.operation.util.install.resource import host_capacity
+from bsm.operation.util.install.resource import step_resource
+from bsm.operation.util.install.admission import AdmissionControl
+from bsm.operation.util.install.admission import AdmissionSelector
+from bsm.operation.util.install.package_manager import PackageManager
+from bsm.operation.util.install.step import Step
+
+from bsm.util.jobserver import Jobserver
+from bsm.util.host import cpu_count
+from bsm.util.slot import SlotBroker
+from bsm.util.slot import SlotNotAvailableError
 
 from bsm.operation import Base
 
@@ -21,114 +32,49 @@ from bsm.logger import get_logger
 _logger = get_logger()
 
 
-class Install(Base):
-    def execute(self):
-        self.__build_dag()
-
-        sys.path.insert(0, self._config['release_path']['handler_python_dir'])
-        self.__dag_run()
-        sys.path.remove(self._config['release_path']['handler_python_dir'])
-
-    def __build_dag(self):
-        self.__dag = Dag()
-
-        all_steps = []
-
-        for category in self._config['package_install']:
-            for subdir in self._config['package_install'][category]:
-                for package in self._config['package_install'][category][subdir]:
-                    if self._config['category'][category]['version_dir']:
-                        for version in self._config['package_install'][category][subdir][package]:
-                            all_steps += 
-
-        # For a single package
-        for pkg, pkg_steps in self.__step_info.package_steps_all().items():
-            previous_vertex = None
-
-            for step in pkg_steps:
-                vertex_pkg = (pkg, step['action'], step['sub_action'])
-                self.__dag.add_vertex(vertex_pkg)
-                if previous_vertex is not None:
-                    _logger.debug('DAG add edge: {0} -> {1}'.format(previous_vertex, vertex_pkg))
-                    self.__dag.add_edge(previous_vertex, vertex_pkg)
-                previous_vertex = vertex_pkg
-
-        # For the package dependencies
-        for pkg, pkg_steps in self.__step_info.package_steps_all().items():
-            start_step = self.__step_info.find_atomic_start(pkg)
-            _logger.debug('start_step: {0} {1}'.format(pkg, start_step))
-            if not start_step:
-                continue
-            start_vertex = (pkg, start_step['action'], start_step['sub_action'])
+# CompactDag is used from this number of install steps
+_COMPACT_DAG_THRESHOLD = 20000
 
-            pkg_deps = ensure_list(self.__pkg_mgr.package_info(pkg).get('config', {}).get('dep', []))
-            for pkg_dep in pkg_deps:
-                if pkg_dep not in self.__step_info.package_steps_all():
-                    continue
-                end_step = self.__step_info.find_atomic_end(pkg_dep)
-                _logger.debug('end_step: {0} {1}'.format(pkg_dep, end_step))
-                if not end_step:
-                    continue
-                end_vertex = (pkg_dep, end_step['action'], end_step['sub_action'])
 
-                _logger.debug('DAG add edge: {0} -> {1}'.format(end_vertex, start_vertex))
-                self.__dag.add_edge(end_vertex, start_vertex)
+def _run_in_thread(vertex, param):
+    # Builtin handlers mostly wait for external commands
+    return param['action_name'] in BUILTIN_HANDLERS
 
-    def __dag_run(self):
-        selector = InstallSelector(self.__config_user, self.__config_version, self.__config_release)
-        processor = MultiThreadProcessor()
-#        processor = SequentialProcessor()
-        executor = InstallExecutor(self.__config_user, self.__config_version, self.__config_release, self.__step_info)
-
-        dag_run(self.__dag, selector=selector, processor=processor, executor=executor)
-
-class InstallOld(object):
-    def __init__(self, config_user, config_version, config_release):
-        self.__config_user = config_user
-        self.__config_version = config_version
-        self.__config_release = config_release
-
-        self.__pkg_mgr = PackageManager(self.__config_version, self.__config_release)
-
-    def check(self):
-        check = Check(self.__config_release, 'install')
-        missing_pkg, pkg_install_name = check.check()
-        return missing_pkg, check.install_cmd, pkg_install_name
-
-    def package_list(self):
-        pkg_list = []
-        for pkg, pkg_info in self.__pkg_mgr.package_all().items():
-            if not pkg_info.get('config_category', {}).get('install'):
-                continue
 
-            pkg_version = pkg_info['config'].get('version', 'unknown')
-            pkg_list.append((pkg, pkg_version, pkg_info['dir']['root']))
-        return pkg_list
+class InstallSoftware(Base):
+    def execute(self):
+        if 'version' not in self._config['scenario']:
+            _logger.warn('No release specified, nothing to install')
+            return
 
-    def install_packages(self):
-        self.__step_info = Step(self.__config_version, self.__config_release)
+        self.__pkg_mgr = PackageManager(self._config)
+        self.__step_info = Step(self._config['release'], self.__pkg_mgr)
 
         self.__build_dag()
 
-        sys.path.insert(0, self.__config_version.handler_dir)
+        # Handlers of the release are found by the import hook, not in sys.path
+        register_handler_dir(self._config['release_path']['handler_python_dir'])
         self.__dag_run()
-        sys.path.remove(self.__config_version.handler_dir)
-
-    def __find_dest_action(self, pkg, steps, dest_start, dest_end):
-        start_found = False
-        for step in steps:
-            if not start_found and step == atomic_start:
-                start_found = True
-            if start_found and (pkg, step) in self.__dag.vertice():
-                return step
-            if step == dest_end:
-                break
-        return ''
+
+    def __new_dag(self):
+        # "compact_dag" could be true, false, or the number of steps from which it is used
+        compact_dag = self._config['user'].get('compact_dag', _COMPACT_DAG_THRESHOLD)
+        if compact_dag is True or compact_dag is False:
+            use_compact = compact_dag
+        else:
+            step_number = sum(len(steps) for steps in self.__step_info.package_steps_all().values())
+            use_compact = step_number >= compact_dag
+
+        if use_compact:
+            _logger.debug('Use compact DAG for the install steps')
+            return CompactDag()
+        return Dag()
 
     def __build_dag(self):
-        self.__dag = Dag()
+        self.__dag = self.__new_dag()
 
-        all_steps = self.__step_info.package_steps_all()
+        # All the edges are added at once, with only one cycle check
+        edges = []
 
         # For a single package
         for pkg, pkg_steps in self.__step_info.package_steps_all().items():
@@ -139,7 +85,7 @@ class InstallOld(object):
                 self.__dag.add_vertex(vertex_pkg)
                 if previous_vertex is not None:
                     _logger.debug('DAG add edge: {0} -> {1}'.format(previous_vertex, vertex_pkg))
-                    self.__dag.add_edge(previous_vertex, vertex_pkg)
+                    edges.append((previous_vertex, vertex_pkg))
                 previous_vertex = vertex_pkg
 
         # For the package dependencies
@@ -150,10 +96,7 @@ class InstallOld(object):
                 continue
             start_vertex = (pkg, start_step['action'], start_step['sub_action'])
 
-            pkg_deps = ensure_list(self.__pkg_mgr.package_info(pkg).get('config', {}).get('dep', []))
-            for pkg_dep in pkg_deps:
-                if pkg_dep not in self.__step_info.package_steps_all():
-                    continue
+            for pkg_dep in self.__pkg_mgr.package_deps(pkg):
                 end_step = self.__step_info.find_atomic_end(pkg_dep)
                 _logger.debug('end_step: {0} {1}'.format(pkg_dep, end_step))
                 if not end_step:
@@ -161,12 +104,130 @@ class InstallOld(object):
                 end_vertex = (pkg_dep, end_step['action'], end_step['sub_action'])
 
                 _logger.debug('DAG add edge: {0} -> {1}'.format(end_vertex, start_vertex))
-                self.__dag.add_edge(end_vertex, start_vertex)
+                edges.append((end_vertex, start_vertex))
+
+        self.__dag.add_edges(edges)
+        if isinstance(self.__dag, CompactDag):
+            # Check the cycles now, as Dag does
+            self.__dag.freeze()
+
+    def __jobs(self):
+        # "bsm install -j N" takes precedence over "jobs" in user config
+        jobs = self._config['entry'].get('jobs')
+        if jobs is None:
+            jobs = self._config['user'].get('jobs')
+        if jobs is None:
+            jobs = cpu_count()
+        return jobs
+
+    def __slot_broker(self):
+        # Slots shared with the other bsm processes on this host, only when configured
+        host_slots = self._config['user'].get('host_slots', False)
+        if not host_slots:
+            return None
+        if host_slots is True:
+            host_slots = cpu_count()
+
+        try:
+            slot_broker = SlotBroker(host_slots, group=self._config['user'].get('host_slots_group'))
+        except SlotNotAvailableError as e:
+            _logger.warn('Host slots not used: {0}'.format(e))
+            return None
+        _logger.debug('Use {0} host slots in "{1}"'.format(slot_broker.slots, slot_broker.directory))
+        return slot_broker
+
+    def __admission(self):
+        # "install_admission: true" for the default thresholds, or a dict to change them
+        config_admission = self._config['user'].get('install_admission')
+        if not config_admission:
+            return None
+        if not isinstance(config_admission, dict):
+            config_admission = {}
+
+        threshold = dict((k, v) for k, v in config_admission.items() if k not in ('interval', 'max_hold'))
+        kwargs = dict((k, v) for k, v in config_admission.items() if k in ('interval', 'max_hold'))
+        return AdmissionControl(threshold, **kwargs)
+
+    def __processor(self, timeout=None):
+        processor_type = self._config['user'].get('install_processor')
+        slot_broker = self.__slot_broker()
+
+        if processor_type == 'asyncio':
+            # Only available for python 3.5+
+            from bsm.paradag.asyncio_processor import AsyncioProcessor
+            return AsyncioProcessor(timeout=timeout, slot_broker=slot_broker)
+
+        if processor_type != 'process':
+            return MultiThreadProcessor(timeout=timeout, max_workers=self.__jobs(), slot_broker=slot_broker)
+
+        # Python handlers from the release are run in worker processes to avoid the GIL
+        handler_python_dir = self._config['release_path']['handler_python_dir']
+        return MultiProcessProcessor(max_workers=self.__jobs(), execute_func=execute_step,
+                initializer=register_handler_dir, initargs=(handler_python_dir,), in_thread=_run_in_thread,
+                timeout=timeout, slot_broker=slot_broker)
+
+    def __step_cost(self, history):
+        def cost(vertex):
+            pkg, action, sub_action = vertex
+            version = self.__pkg_mgr.package_info(pkg).get('config', {}).get('version')
+            duration = history.duration(pkg, version, action, sub_action)
+            if duration is None:
+                action_name = self.__step_info.package_step(pkg, action, sub_action).get('handler')
+                duration = static_step_cost(action, action_name)
+            return duration
+        return cost
+
+    def __step_resource(self, capacity):
+        resources = {}
+        def resource(vertex):
+            if vertex not in resources:
+                pkg, action, sub_action = vertex
+                resources[vertex] = step_resource(self.__pkg_mgr.package_info(pkg), action, capacity)
+            return resources[vertex]
+        return resource
 
     def __dag_run(self):
-        selector = InstallSelector(self.__config_user, self.__config_version, self.__config_release)
-        processor = MultiThreadProcessor()
-#        processor = SequentialProcessor()
-        executor = InstallExecutor(self.__config_user, self.__config_version, self.__config_release, self.__step_info)
-
-        dag_run(self.__dag, selector=selector, processor=processor, executor=executor)
+        # Long chains of steps are started first, with durations recorded on this host
+        history = StepHistory(self._config['release_path']['history_dir'])
+        critical_path_selector = CriticalPathSelector(self.__dag, cost=self.__step_cost(history), limit=self.__jobs())
+
+        selector = InstallSelector(self._config, default_selector=critical_path_selector)
+
+        # Steps are only started while their cpu and mem reservations fit in this host
+        capacity = host_capacity()
+        _logger.debug('Host capacity for install: {0}'.format(capacity))
+        resource = self.__step_resource(capacity)
+        selector = ResourceSelector(selector, resource, capacity)
+
+        # Hold back new steps while the host is under pressure.
+        # The processor wakes up regularly to check whether the pressure drops.
+        admission = self.__admission()
+        processor_timeout = None
+        if admission is not None:
+            selector = AdmissionSelector(selector, admission)
+            processor_timeout = admission.interval
+
+        # All the make processes share the same job slots
+        jobserver = None
+        if self._config['user'].get('make_jobserver', True):
+            jobserver = Jobserver(self.__jobs())
+
+        processor = self.__processor(processor_timeout)
+        if self._config['user'].get('install_processor') == 'asyncio':
+            from bsm.operation.util.install.async_executor import AsyncExecutor
+            executor_class = AsyncExecutor
+        else:
+            executor_class = InstallExecutor
+        executor = executor_class(self._config, self._env, self.__step_info, self.__pkg_mgr,
+                history=history, step_resource=resource, jobserver=jobserver)
+
+        try:
+            dag_run(self.__dag, selector=selector, processor=processor, executor=executor)
+        finally:
+            history.save()
+            if jobserver is not None:
+                jobserver.close()
+            if isinstance(processor, (MultiThreadProcessor, MultiProcessProcessor)):
+                processor.shutdown()
+            elif hasattr(processor, 'close'):
+                processor.close()
@@ -1,75 +1,38 @@
-import os
-
-from bsm.paradag import Dag
-from bsm.paradag import dag_run
-
-from bsm.package_manager import PackageManager
-
-from bsm.check import Check
-
-from bsm.env import Env
-from bsm.util import ensure_list
+from bsm.operation import Base
+from bsm.operation.util.release_env import release_env
+from bsm.operation.util.release_env import load_release_env
+from bsm.operation.util.activation import activation_file
+from bsm.operation.util.activation import input_files
+from bsm.operation.util.activation import is_fresh
 
 from bsm.logger import get_logger
 _logger = get_logger()
 
-class Use(object):
-    def __init__(self, config_user, config_version, config_release):
-        self.__config_user = config_user
-        self.__config_version = config_version
-        self.__config_release = config_release
-
-        self.__pkg_mgr = PackageManager(config_version, config_release)
-
-        self.__build_dag()
-
-    def __build_dag(self):
-        self.__dag = Dag()
-
-        for pkg, pkg_info in self.__pkg_mgr.package_all().items():
-            if not pkg_info.get('config_category', {}).get('auto_env'):
-                continue
-            self.__dag.add_vertex(pkg)
-
-        for pkg, pkg_info in self.__pkg_mgr.package_all().items():
-            if not pkg_info.get('config_category', {}).get('auto_env'):
-                continue
-
-            pkgs_dep = ensure_list(pkg_info.get('config', {}).get('dep', []))
-            for pkg_dep in pkgs_dep:
-                if not self.__pkg_mgr.package_info(pkg_dep).get('config_category', {}).get('auto_env'):
-                    continue
-                self.__dag.add_edge(pkg_dep, pkg)
-
-    def check(self):
-        check = Check(self.__config_release, 'runtime')
-        missing_pkg, pkg_install_name = check.check()
-        return missing_pkg, check.install_cmd, pkg_install_name
-
-    def run(self):
-        sorted_pkgs = dag_run(self.__dag)
-
-        software_root = self.__config_version.config['software_root']
-        release_version = self.__config_version.config['version']
 
-        env = Env()
-        env.clean()
-        env.set_release(software_root, release_version)
+class Use(Base):
+    def execute(self, shell_name=None):
+        '''Load the env of the release
 
-        global_env = self.__config_release.get('setting', {}).get('global_env', {})
-        new_global_env = {}
-        for k, v in global_env.items():
-            new_global_env[k] = v.format(**self.__config_version.config)
-        env.set_global(new_global_env)
+        Return the activation script of the shell to be sourced if it is
+        up to date, and the release is not loaded here.
+        '''
+        self._env.unload_release()
 
-        path_def = self.__config_release.get('setting', {}).get('path_def', {})
-        for pkg in sorted_pkgs:
-            pkg_info = self.__pkg_mgr.package_info(pkg)
-            env.set_package(path_def, pkg_info)
+        config_scenario = self._config['scenario']
+        if not config_scenario.get('version'):
+            _logger.warn('No release specified, nothing to use')
+            return ''
 
-        env_change = env.env_change()
+        _logger.info('From software root: {0}'.format(config_scenario['software_root']))
+        _logger.info('Using version: {0}'.format(config_scenario['version']))
 
-        _logger.info('From software root: {0}'.format(software_root))
-        _logger.info('Using version: {0}'.format(release_version))
+        if shell_name and 'status_dir' in self._config['release_path']:
+            script_file = activation_file(self._config, shell_name)
+            if is_fresh(script_file, input_files(self._config)):
+                _logger.debug('Use activation script: {0}'.format(script_file))
+                return script_file
+            _logger.debug('Activation script is not up to date: {0}'.format(script_file))
 
-        return env_change
+        config_release_env, packages_env = release_env(self._config)
+        load_release_env(self._env, config_scenario, config_release_env, packages_env)
+        return ''
@@ -0,0 +1,151 @@
+''' Activation scripts of the release which could be sourced directly
+
+The scripts are written by install-release, one for each shell and each
+set of options, so "bsm use" only needs to source them, and login shells
+or batch jobs could activate the release without running python.
+
+The paths are added to the current value of the path variables. The
+release loaded before is not unloaded by the script, "bsm use" does it
+before sourcing.
+'''
+
+import os
+import json
+import hashlib
+import tempfile
+
+from bsm.env import Env
+from bsm.shell import Shell
+
+from bsm.util import safe_mkdir
+from bsm.util import ensure_list
+from bsm.util import expand_path
+
+from bsm.operation.util.release_env import release_env
+from bsm.operation.util.release_env import load_release_env
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+ACTIVATION_SHELLS = ('sh', 'csh')
+
+_ACTIVATION_DIR_NAME = 'activation'
+_CONFIG_EXTENSIONS = ('.yml', '.yaml')
+
+# Placeholder for the value of the variables before the script is sourced
+_ORIGINAL_VALUE = '__BSM_ORIGINAL_VALUE__'
+
+
+def _scenario_key(config_scenario):
+    # Only the items which could change the env of the release
+    key = {
+        'software_root': config_scenario.get('software_root'),
+        'version': config_scenario.get('version'),
+        'option': config_scenario.get('option', {}),
+    }
+    content = json.dumps(key, sort_keys=True)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def activation_file(config, shell_name):
+    return os.path.join(config['release_path']['status_dir'], _ACTIVATION_DIR_NAME,
+            '{0}.{1}'.format(_scenario_key(config['scenario']), shell_name))
+
+
+def _config_files(directory):
+    for root, dirs, files in os.walk(directory):
+        for f in files:
+            if os.path.splitext(f)[1] in _CONFIG_EXTENSIONS:
+                yield os.path.join(root, f)
+
+def input_files(config):
+    '''All the yaml files which could affect the activation script'''
+    config_user_file = config['entry'].get('config_user_file', config['app']['config_user_file'])
+    yield expand_path(config_user_file)
+
+    if 'app_root' in config['app']:
+        yield os.path.join(config['app']['app_root'], 'main.yml')
+        yield os.path.join(config['app']['app_root'], 'extra.yml')
+
+    for f in _config_files(config['release_path']['config_dir']):
+        yield f
+
+def is_fresh(script_file, inputs):
+    '''The script is fresh only when it is newer than every existing input file'''
+    try:
+        script_mtime = os.stat(script_file).st_mtime
+    except OSError:
+        return False
+
+    for f in inputs:
+        try:
+            if os.stat(f).st_mtime >= script_mtime:
+                return False
+        except OSError:
+            continue
+
+    return True
+
+
+def _env_names(config_env_list, env_prefix):
+    names = set()
+    for config_env in config_env_list:
+        for k in ('set_env', 'prepend_path', 'append_path'):
+            names.update(config_env.get(k, {}))
+        names.update(ensure_list(config_env.get('unset_env', [])))
+    # The variables of bsm itself are always set
+    return [n for n in names if not n.startswith(env_prefix+'_')]
+
+def _activation_changes(config):
+    '''Env changes of the release, relative to the original values
+
+    The variables start with the placeholder, so the paths added before
+    and after the original value could be found.
+    '''
+    env_prefix = config['app']['env_prefix']
+    config_release_env, packages_env = release_env(config)
+
+    names = _env_names([config_release_env] + [e for _, e in packages_env], env_prefix)
+    env = Env(initial_env=dict((n, _ORIGINAL_VALUE) for n in names), env_prefix=env_prefix)
+    load_release_env(env, config['scenario'], config_release_env, packages_env)
+    env_changes = env.apply_changes()
+
+    merge_path = {}
+    for k, v in list(env_changes['set_env'].items()):
+        path_list = v.split(os.pathsep)
+        if _ORIGINAL_VALUE in path_list:
+            index = path_list.index(_ORIGINAL_VALUE)
+            merge_path[k] = (path_list[:index], path_list[index+1:])
+            del env_changes['set_env'][k]
+
+    return env_changes, merge_path
+
+def _write_file(filename, content):
+    # Never seen half written
+    safe_mkdir(os.path.dirname(filename))
+    fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(filename), prefix=os.path.basename(filename)+'.')
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.rename(temp_file, filename)
+    except:
+        os.remove(temp_file)
+        raise
+
+def write_activation_scripts(config):
+    env_changes, merge_path = _activation_changes(config)
+
+    cmd_name = config['app']['cmd_name']
+    app_root = config['app'].get('app_root', '')
+
+    for shell_name in ACTIVATION_SHELLS:
+        shell = Shell(shell_name, cmd_name, app_root)
+        shell.comment('Activation script of release version: {0}'.format(config['scenario']['version']))
+        shell.add_env(env_changes)
+        for k in sorted(merge_path):
+            shell.merge_path(k, *merge_path[k])
+
+        script_file = activation_file(config, shell_name)
+        _write_file(script_file, shell.script)
+        _logger.debug('Activation script written: {0}'.format(script_file))
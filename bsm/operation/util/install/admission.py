@@ -0,0 +1,129 @@
+import time
+
+from bsm.util.host import cpu_count
+from bsm.util.host import meminfo
+from bsm.util.host import loadavg
+from bsm.util.host import pressure
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+# Upper limits, except mem_available which is the lower limit in percent.
+# The pressures are the "some avg10" of PSI in percent.
+_DEFAULT_THRESHOLD = {
+    'load_per_cpu': 1.5,
+    'mem_available': 5,
+    'cpu_pressure': 60,
+    'memory_pressure': 20,
+    'io_pressure': 40,
+}
+
+# Seconds between two checks while holding back
+_DEFAULT_INTERVAL = 5
+
+# Start one step anyway after holding back this long with nothing running
+_DEFAULT_MAX_HOLD = 600
+
+
+def _host_metrics(cpu):
+    metrics = {}
+
+    load = loadavg()
+    if load is not None:
+        metrics['load_per_cpu'] = load[0] / cpu
+
+    info = meminfo()
+    if info.get('MemTotal') and 'MemAvailable' in info:
+        metrics['mem_available'] = 100.0 * info['MemAvailable'] / info['MemTotal']
+
+    for resource in ('cpu', 'memory', 'io'):
+        psi = pressure(resource)
+        if psi and 'avg10' in psi.get('some', {}):
+            metrics[resource+'_pressure'] = psi['some']['avg10']
+
+    return metrics
+
+
+class AdmissionControl(object):
+    '''Check whether the host is too busy to start more install steps
+
+    The metrics missing on the host (e.g. PSI on old kernels) are not
+    checked. A threshold of None disables that check.
+    '''
+    def __init__(self, threshold=None, interval=_DEFAULT_INTERVAL, max_hold=_DEFAULT_MAX_HOLD):
+        self.__threshold = _DEFAULT_THRESHOLD.copy()
+        self.__threshold.update(threshold or {})
+        self.__interval = interval
+        self.__max_hold = max_hold
+        self.__cpu = cpu_count()
+
+        self.__hold_start = None
+
+    @property
+    def interval(self):
+        return self.__interval
+
+    @property
+    def max_hold(self):
+        return self.__max_hold
+
+    def __exceeded(self, metrics):
+        exceeded = []
+        for name, value in sorted(metrics.items()):
+            limit = self.__threshold.get(name)
+            if limit is None:
+                continue
+            if name == 'mem_available':
+                if value < limit:
+                    exceeded.append('{0} {1:.1f} < {2}'.format(name, value, limit))
+            elif value > limit:
+                exceeded.append('{0} {1:.2f} > {2}'.format(name, value, limit))
+        return exceeded
+
+    def admit(self):
+        '''Sample the host, False if new steps should be held back'''
+        metrics = _host_metrics(self.__cpu)
+        exceeded = self.__exceeded(metrics)
+        _logger.debug('Host pressure: {0}'.format(', '.join('{0}={1:.2f}'.format(k, v) for k, v in sorted(metrics.items()))))
+
+        if exceeded:
+            if self.__hold_start is None:
+                self.__hold_start = time.time()
+                _logger.info('Host is busy, hold back new install steps: {0}'.format(', '.join(exceeded)))
+            return False
+
+        if self.__hold_start is not None:
+            _logger.info('Host pressure dropped, resume install steps after {0:.0f}s'.format(time.time()-self.__hold_start))
+            self.__hold_start = None
+        return True
+
+    def held(self):
+        '''Seconds since holding back, 0 if not holding'''
+        if self.__hold_start is None:
+            return 0
+        return time.time() - self.__hold_start
+
+
+class AdmissionSelector(object):
+    '''Select nothing while the host is busy
+
+    When nothing is running, it waits here until the pressure drops, or
+    starts one vertex after max_hold seconds, so the install always goes on.
+    The processor should have a timeout about the check interval, so the
+    selector is called again even if the running steps take long.
+    '''
+    def __init__(self, selector, admission):
+        self.__selector = selector
+        self.__admission = admission
+
+    def select(self, running, idle):
+        while not self.__admission.admit():
+            if running:
+                return []
+            if self.__admission.held() >= self.__admission.max_hold:
+                _logger.warn('Host is still busy after {0:.0f}s, start one install step anyway'.format(self.__admission.held()))
+                return self.__selector.select(running, idle)[:1]
+            time.sleep(self.__admission.interval)
+
+        return self.__selector.select(running, idle)
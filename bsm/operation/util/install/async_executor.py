@@ -0,0 +1,97 @@
+''' Install executor for AsyncioProcessor, python 3.5+ only
+'''
+
+import asyncio
+import datetime
+import inspect
+
+from bsm.util import safe_mkdir
+from bsm.util import log_command_start
+from bsm.util.jobserver import jobserver_fds
+
+from bsm.handler import resolve_handler
+from bsm.handler.install import find as find_install_handler
+from bsm.handler.install import run as install_run
+from bsm.handler.install import command
+
+from bsm.operation.util.install.executor import Executor
+from bsm.operation.util.install.executor import execute_step
+from bsm.operation.util.install.executor import step_result
+from bsm.operation.util.install.executor import step_error
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+async def call_and_log_async(cmd, log, cwd=None, env=None):
+    '''Same as bsm.util.call_and_log, output goes to the log file directly'''
+    log_command_start(cmd, log, cwd, env)
+
+    try:
+        p = await asyncio.create_subprocess_exec(*cmd,
+                stdout=log, stderr=asyncio.subprocess.STDOUT, stdin=asyncio.subprocess.DEVNULL,
+                cwd=cwd, env=env, pass_fds=jobserver_fds(env))
+        ret = await p.wait()
+    except OSError as e:
+        log.write('OSError: {0}\n'.format(e))
+        log.write('Command not found: {0}\n'.format(cmd[0]))
+        ret = 127
+
+    log.flush()
+
+    return ret
+
+async def _run_command(param):
+    cmd, cwd, env = command.command_param(param)
+
+    ret = 0
+    with open(param['log_file'], 'w') as f:
+        for c in cmd:
+            ret = await call_and_log_async(c, log=f, cwd=cwd, env=env)
+            if ret != 0:
+                return {'success': False, 'message': 'Command "{0}" failed with exit code: {1}'.format(c, ret)}
+
+    return {'success': ret==0, 'message': 'Command exit code: {0}'.format(ret)}
+
+
+def _async_handler(action_name):
+    # The release may replace the whole install handler
+    install_funcs = resolve_handler('install')
+    if not install_funcs or install_funcs[0][1] is not install_run:
+        return None
+
+    run_func = find_install_handler(action_name)
+    if run_func is command.run or inspect.iscoroutinefunction(run_func):
+        return run_func
+    return None
+
+async def execute_step_async(param):
+    run_func = _async_handler(param['action_name'])
+
+    # Other handlers could not be run asynchronously
+    if run_func is None:
+        return await asyncio.get_event_loop().run_in_executor(None, execute_step, param)
+
+    start = datetime.datetime.utcnow()
+
+    safe_mkdir(param['pkg_info']['dir']['log'])
+
+    try:
+        if run_func is command.run:
+            result_action = await _run_command(param)
+        else:
+            result_action = await run_func(param)
+    except Exception as e:
+        step_error(param, e)
+        raise
+
+    return step_result(param, start, result_action)
+
+
+class AsyncExecutor(Executor):
+    '''Run command steps and "async def run(param)" handlers in the event loop
+
+    All the other handlers are run in threads.
+    '''
+    async def execute_async(self, param):
+        return await execute_step_async(param)
@@ -3,11 +3,10 @@ import copy
 import datetime
 import traceback
 
-from bsm.env import Env
-from bsm.package_manager import PackageManager
-
-from bsm.loader import run_handler
+from bsm.handler import Handler
+from bsm.operation.util.install.resource import STEP_JOBS_ENV
 from bsm.util import safe_mkdir
+from bsm.util import ensure_list
 
 from bsm.logger import get_logger
 _logger = get_logger()
@@ -17,18 +16,85 @@ class InstallExecutorError(Exception):
     pass
 
 
+def step_full_name(param):
+    if param['sub_action'] == 0:
+        return '{0} - {1}'.format(param['package'], param['action'])
+    return '{0} - {1} - {2}'.format(param['package'], param['action'], param['sub_action'])
+
+def step_result(param, start, result_action):
+    action_full_name = step_full_name(param)
+
+    result = {}
+
+    result['start'] = start
+
+    result['success'] = False
+    if isinstance(result_action, bool) and result_action:
+        result['success'] = True
+    if isinstance(result_action, dict) and 'success' in result_action and result_action['success']:
+        result['success'] = True
+
+    if not result['success']:
+        if isinstance(result_action, dict) and 'message' in result_action:
+            _logger.error('"{0}" execution error: {1}'.format(action_full_name, result_action['message']))
+        _logger.critical('"{0}" execution error. Find log in "{1}"'.format(action_full_name, param['log_file']))
+        raise InstallExecutorError('"{0}" execution error'.format(action_full_name))
+
+    result['action'] = result_action
+    result['end'] = datetime.datetime.utcnow()
+
+    return result
+
+def step_error(param, e):
+    _logger.critical('"{0}" install handler error: {1}'.format(step_full_name(param), e))
+    if param['verbose']:
+        _logger.critical('\n{0}'.format(traceback.format_exc()))
+
+
+# Do NOT access or modify any variables outside this function (global and member variables)
+# It could be run in another process
+def execute_step(param):
+    start = datetime.datetime.utcnow()
+
+    safe_mkdir(param['pkg_info']['dir']['log'])
+
+    try:
+        with Handler() as h:
+            result_action = h.run('install', param['action_name'], param)
+    except Exception as e:
+        step_error(param, e)
+        raise
+
+    return step_result(param, start, result_action)
+
+
+def _load_package_env(env, pkg_config):
+    '''Set the env of the installed package, for the steps of the packages after it'''
+    config_env = pkg_config.get('env', {})
+
+    for k, v in config_env.get('set_env', {}).items():
+        env[k] = v
+
+    for k, v in config_env.get('prepend_path', {}).items():
+        env[k] = os.pathsep.join(ensure_list(v) + ([env[k]] if env.get(k) else []))
+
+    for k, v in config_env.get('append_path', {}).items():
+        env[k] = os.pathsep.join(([env[k]] if env.get(k) else []) + ensure_list(v))
+
+
 class Executor(object):
-    def __init__(self, config_user, config_version, config_release, step_info):
-        self.__config_user = config_user
-        self.__config_version = config_version
-        self.__config_release = config_release
+    def __init__(self, config, env, step_info, pkg_mgr, history=None, step_resource=None, jobserver=None):
+        self.__config_user = config['user'].data_copy
+        self.__verbose = config['output']['verbose']
+        self.__def_dir = config['release_path']['content_dir']
         self.__step_info = step_info
+        self.__pkg_mgr = pkg_mgr
+        self.__history = history
+        self.__step_resource = step_resource
+        self.__jobserver = jobserver
 
-        # Create independent env for installation
-        self.__env = Env()
-        self.__env.clean()
-
-        self.__pkg_mgr = PackageManager(config_version, config_release)
+        # Independent env for installation, changed only by the installed packages
+        self.__env = env.env_final()
 
     def param(self, vertex):
         pkg, action, sub_action = vertex
@@ -40,60 +106,28 @@ class Executor(object):
         par['sub_action'] = sub_action
 
         step = self.__step_info.package_step(pkg, action, sub_action)
-        par['action_name'] = step.get('action')
-        par['action_param'] = step.get('param')
-
-        par['log_file'] = os.path.join(self.__pkg_mgr.package_info(pkg)['dir']['log'], '{0}_{1}_{2}.log'.format(pkg, action, sub_action))
-        par['env'] = copy.deepcopy(self.__env.env_final())
+        par['action_name'] = step.get('handler')
+        par['action_param'] = step.get('param') or {}
+
+        pkg_info = self.__pkg_mgr.package_info(pkg)
+        par['log_file'] = os.path.join(pkg_info['dir']['log'], '{0}_{1}_{2}.log'.format(pkg_info['name'], action, sub_action))
+        par['env'] = self.__env.copy()
+        if self.__step_resource is not None:
+            # Processors reserved for this step, e.g. for "make -j"
+            par['env'][STEP_JOBS_ENV] = str(self.__step_resource(vertex)['cpu'])
+        if self.__jobserver is not None:
+            par['env'] = self.__jobserver.env(par['env'])
 
         par['config_user'] = copy.deepcopy(self.__config_user)
-        par['def_dir'] = self.__config_version.def_dir
-        par['pkg_info'] = copy.deepcopy(self.__pkg_mgr.package_info(pkg))
+        par['verbose'] = self.__verbose
+        par['def_dir'] = self.__def_dir
+        par['pkg_info'] = copy.deepcopy(pkg_info)
         par['pkg_dir_list'] = copy.deepcopy(self.__pkg_mgr.package_dir_list())
 
         return par
 
-    # Do NOT access or modify any variables outside this function (global and member variables)
     def execute(self, param):
-        pkg = param['package']
-        action = param['action']
-        sub_action = param['sub_action']
-
-        if sub_action == 0:
-            action_full_name = '{0} - {1}'.format(pkg, action)
-        else:
-            action_full_name = '{0} - {1} - {2}'.format(pkg, action, sub_action)
-
-        result = {}
-
-        result['start'] = datetime.datetime.utcnow()
-
-        safe_mkdir(param['pkg_info']['dir']['log'])
-
-        try:
-            result_action = run_handler('', 'install', param['action_name'], param)
-        except Exception as e:
-            _logger.critical('"{0}" install handler error: {1}'.format(action_full_name, e))
-            if param['config_user']['verbose']:
-                _logger.critical('\n{0}'.format(traceback.format_exc()))
-            raise
-
-        result['success'] = False
-        if isinstance(result_action, bool) and result_action:
-            result['success'] = True
-        if isinstance(result_action, dict) and 'success' in result_action and result_action['success']:
-            result['success'] = True
-
-        if not result['success']:
-            if isinstance(result_action, dict) and 'message' in result_action:
-                _logger.error('"{0}" execution error: {1}'.format(action_full_name, result_action['message']))
-            _logger.critical('"{0}" execution error. Find log in "{1}"'.format(action_full_name, param['log_file']))
-            raise InstallExecutorError('"{0}" execution error'.format(action_full_name))
-
-        result['action'] = result_action
-        result['end'] = datetime.datetime.utcnow()
-
-        return result
+        return execute_step(param)
 
     def report_start(self, vertice):
         pass
@@ -103,15 +137,16 @@ class Executor(object):
             pkg, action, sub_action = vertex
 
             if isinstance(result['action'], dict) and 'env_package' in result['action'] and result['action']['env_package']:
-                path_def = self.__config_release.config['setting'].get('path_def', {})
-                pkg_info = self.__pkg_mgr.package_info(pkg)
-                self.__env.set_package(path_def, pkg_info)
+                _load_package_env(self.__env, self.__pkg_mgr.package_info(pkg)['config'])
 
             if isinstance(result['action'], dict) and 'save_release_status' in result['action'] and result['action']['save_release_status']:
                 self.__pkg_mgr.save_release_status(pkg, result['end'])
 
             if result['success']:
                 _logger.info(' > {0} {1} {2} finished'.format(pkg, action, sub_action))
+                if self.__history is not None:
+                    version = self.__pkg_mgr.package_info(pkg).get('config', {}).get('version')
+                    self.__history.record(pkg, version, action, sub_action, (result['end']-result['start']).total_seconds())
                 if self.__step_info.is_last_sub_action(pkg, action, sub_action):
                     self.__pkg_mgr.save_action_status(pkg, action, result['start'], result['end'])
 
@@ -128,6 +163,9 @@ class Executor(object):
             running_vertice.append(action_full_name.format(*v))
         _logger.info('Running: ' + ', '.join(running_vertice))
 
+    def report_pool(self, stats):
+        _logger.debug('Install workers: {busy}/{max_workers} busy, {queue_depth} queued, utilization {utilization:.0%}'.format(**stats))
+
     def deliver(self, vertex, result):
         pass
 
@@ -0,0 +1,90 @@
+import os
+import socket
+
+from bsm.util import safe_mkdir
+from bsm.util.config import load_config
+from bsm.util.config import dump_config
+from bsm.util.config import ConfigError
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+# Weight of the latest duration in the recorded value
+_HISTORY_WEIGHT = 0.5
+
+# Estimated seconds of the steps without history
+_STATIC_STEP_COST = {
+    'download': 30,
+    'extract': 10,
+    'pre_check': 1,
+    'configure': 30,
+    'pre_compile': 10,
+    'compile': 300,
+    'build': 300,
+    'post_compile': 10,
+    'install': 30,
+    'clean': 5,
+}
+_STATIC_HANDLER_COST = {
+    'empty': 0,
+    'env_package': 0,
+    'save_release_status': 0,
+}
+_STATIC_DEFAULT_COST = 10
+
+
+def static_step_cost(action, action_name=None):
+    '''Estimated seconds of a step from the names of the step and handler'''
+    if action_name in _STATIC_HANDLER_COST:
+        return _STATIC_HANDLER_COST[action_name]
+    return _STATIC_STEP_COST.get(action, _STATIC_DEFAULT_COST)
+
+
+class StepHistory(object):
+    '''Durations of the install steps on this host
+
+    The durations are kept by package, version, action and sub action in
+    "<history_dir>/<host>.yml", since different hosts could be quite
+    different in speed.
+    '''
+    def __init__(self, history_dir, host=None):
+        if host is None:
+            host = socket.gethostname()
+        self.__history_file = os.path.join(history_dir, host+'.yml')
+        self.__changed = False
+
+        self.__history = {}
+        if os.path.isfile(self.__history_file):
+            try:
+                self.__history = load_config(self.__history_file)
+            except ConfigError as e:
+                _logger.warn('Could not load install history "{0}": {1}'.format(self.__history_file, e))
+            if not isinstance(self.__history, dict):
+                self.__history = {}
+
+    def duration(self, package, version, action, sub_action=0):
+        '''Recorded seconds of the step, None if never recorded'''
+        try:
+            return self.__history[package][str(version)][action][sub_action]
+        except (KeyError, TypeError):
+            return None
+
+    def record(self, package, version, action, sub_action, seconds):
+        previous = self.duration(package, version, action, sub_action)
+        if previous is not None:
+            seconds = _HISTORY_WEIGHT*seconds + (1-_HISTORY_WEIGHT)*previous
+
+        action_history = self.__history.setdefault(package, {}).setdefault(str(version), {}).setdefault(action, {})
+        action_history[sub_action] = round(seconds, 3)
+        self.__changed = True
+
+    def save(self):
+        if not self.__changed:
+            return
+        try:
+            safe_mkdir(os.path.dirname(self.__history_file))
+            dump_config(self.__history, self.__history_file)
+            self.__changed = False
+        except (ConfigError, OSError) as e:
+            _logger.warn('Could not save install history "{0}": {1}'.format(self.__history_file, e))
@@ -0,0 +1,157 @@
+import os
+import copy
+
+from bsm.util import safe_mkdir
+from bsm.util import ensure_list
+from bsm.util.config import load_config
+from bsm.util.config import dump_config
+from bsm.util.config import ConfigError
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+class PackageNotFoundError(Exception):
+    pass
+
+
+def _load_status(status_file):
+    if not os.path.isfile(status_file):
+        return {}
+    try:
+        status = load_config(status_file)
+    except ConfigError as e:
+        _logger.warn('Could not load status "{0}": {1}'.format(status_file, e))
+        return {}
+    if not isinstance(status, dict):
+        return {}
+    return status
+
+
+class PackageManager(object):
+    '''Packages to install, from the package_install config
+
+    Each package is identified by "category/subdir/name", with the
+    version appended for categories with version_dir.
+    '''
+    def __init__(self, config):
+        self.__release_version = config['scenario'].get('version')
+        self.__path_usage = config['release'].get('setting', {}).get('path_usage', {}).get('install', {})
+
+        self.__load_packages(config['package_install'], config['category'])
+        self.__load_package_dir_list()
+
+    def __load_packages(self, config_package_install, config_category):
+        self.__pkgs = {}
+        self.__pkg_names = {}
+
+        for category, ctg_install in config_package_install.items():
+            version_dir = config_category[category]['version_dir']
+            for subdir, subdir_install in ctg_install.items():
+                for name, pkg_install in subdir_install.items():
+                    identifier = os.path.join(category, subdir, name)
+                    if version_dir:
+                        versions = [(os.path.join(identifier, v), v_install) for v, v_install in pkg_install.items()]
+                    else:
+                        versions = [(identifier, pkg_install)]
+
+                    for pkg, final_config in versions:
+                        self.__pkgs[pkg] = self.__package_info(final_config, config_category[category])
+                        self.__pkg_names.setdefault(name, []).append(pkg)
+
+    def __package_info(self, final_config, ctg_cfg):
+        pkg_config = copy.deepcopy(final_config['config'])
+        common_path = final_config['common_path']
+
+        pkg_info = {}
+        pkg_info['name'] = pkg_config['name']
+        pkg_info['category'] = pkg_config['category']
+        pkg_info['subdir'] = pkg_config['subdir']
+        pkg_info['version'] = pkg_config['version']
+        pkg_info['config'] = pkg_config
+        pkg_info['config_category'] = copy.deepcopy(ctg_cfg)
+        pkg_info['step'] = copy.deepcopy(final_config['step'])
+
+        pkg_info['dir'] = {}
+        pkg_info['dir']['root'] = common_path['main_dir']
+        # Default working directory of the commands
+        pkg_info['dir']['package'] = common_path['main_dir']
+        pkg_info['dir']['work'] = common_path['work_dir']
+        pkg_info['dir']['config'] = common_path['config_dir']
+        pkg_info['dir']['temp'] = common_path['temp_dir']
+        pkg_info['dir']['status'] = common_path['status_dir']
+        pkg_info['dir']['log'] = common_path['log_dir']
+
+        return pkg_info
+
+    def __load_package_dir_list(self):
+        self.__pkg_dir_list = {}
+        for pkg, pkg_info in self.__pkgs.items():
+            if not pkg_info['config_category'].get('auto_env'):
+                continue
+
+            for k, v in pkg_info['config'].get('path', {}).items():
+                if k not in self.__path_usage:
+                    continue
+                path_key = self.__path_usage[k].format(package=pkg_info['name'])
+                self.__pkg_dir_list[path_key] = v
+
+
+    def __install_status_file(self, pkg):
+        return os.path.join(self.__pkgs[pkg]['dir']['status'], 'install.yml')
+
+    def __release_status_file(self, pkg):
+        return os.path.join(self.__pkgs[pkg]['dir']['status'], 'release.yml')
+
+    def __check_package(self, pkg):
+        if pkg not in self.__pkgs:
+            raise PackageNotFoundError('Package {0} not found'.format(pkg))
+
+    def is_finished(self, pkg, action):
+        self.__check_package(pkg)
+        install_status = _load_status(self.__install_status_file(pkg))
+        return bool(install_status.get('steps', {}).get(action, {}).get('finished'))
+
+    def save_action_status(self, pkg, action, start, end):
+        self.__check_package(pkg)
+
+        install_status = _load_status(self.__install_status_file(pkg))
+        action_status = install_status.setdefault('steps', {}).setdefault(action, {})
+        action_status['finished'] = True
+        action_status['start'] = start
+        action_status['end'] = end
+
+        safe_mkdir(self.__pkgs[pkg]['dir']['status'])
+        dump_config(install_status, self.__install_status_file(pkg))
+
+    def save_release_status(self, pkg, end_time):
+        self.__check_package(pkg)
+
+        release_status = _load_status(self.__release_status_file(pkg))
+        release_status.setdefault('version', [])
+        if self.__release_version and self.__release_version not in release_status['version']:
+            release_status['version'].append(self.__release_version)
+        release_status['end'] = end_time
+
+        safe_mkdir(self.__pkgs[pkg]['dir']['status'])
+        dump_config(release_status, self.__release_status_file(pkg))
+
+
+    def package_all(self):
+        return self.__pkgs
+
+    def package_info(self, pkg):
+        return self.__pkgs.get(pkg, {})
+
+    def package_dir_list(self):
+        return self.__pkg_dir_list
+
+    def package_deps(self, pkg):
+        '''Packages required by "dep", by identifier or by name'''
+        deps = []
+        for dep in ensure_list(self.package_info(pkg).get('config', {}).get('dep', [])):
+            if dep in self.__pkgs:
+                deps.append(dep)
+            else:
+                deps += self.__pkg_names.get(dep, [])
+        return [d for d in deps if d != pkg]
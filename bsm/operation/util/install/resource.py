@@ -0,0 +1,75 @@
+import re
+
+from bsm.util import is_str
+from bsm.util.host import cpu_count
+from bsm.util.host import memory_total
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+# Number of processors allocated to the running step
+STEP_JOBS_ENV = 'BSM_STEP_JOBS'
+
+_DEFAULT_RESOURCE = {'cpu': 1, 'mem': 0}
+
+_MEMORY_UNIT = {'': 1, 'K': 1.0/1024, 'M': 1, 'G': 1024, 'T': 1024*1024}
+
+
+class InstallResourceError(Exception):
+    pass
+
+
+def parse_memory(mem):
+    '''Memory in MiB, from numbers (MiB) or strings like "512M" and "4G"'''
+    if not is_str(mem):
+        return float(mem)
+
+    m = re.match(r'^\s*([0-9.]+)\s*([KMGT]?)i?B?\s*$', mem, re.IGNORECASE)
+    if not m:
+        raise InstallResourceError('Invalid memory size: {0}'.format(mem))
+    return float(m.group(1)) * _MEMORY_UNIT[m.group(2).upper()]
+
+
+def host_capacity():
+    '''Resources available for the install steps on this host'''
+    capacity = {'cpu': cpu_count()}
+    mem = memory_total()
+    if mem is not None:
+        capacity['mem'] = mem
+    return capacity
+
+
+def _resource_config(config, action):
+    '''"resources" could be {cpu, mem} for all steps, or by step name with "default"'''
+    if not isinstance(config, dict):
+        return {}
+    if action in config and isinstance(config[action], dict):
+        return config[action]
+    if 'default' in config and isinstance(config['default'], dict):
+        return config['default']
+    if 'cpu' in config or 'mem' in config:
+        return config
+    return {}
+
+def step_resource(pkg_info, action, capacity=None):
+    '''Resources reserved by the step of the package
+
+    The package config takes precedence over the category config.
+    Reservations larger than the capacity are limited to the capacity,
+    or the step would never be started.
+    '''
+    resource = _DEFAULT_RESOURCE.copy()
+    for config in (pkg_info.get('config_category', {}).get('resources'), pkg_info.get('config', {}).get('resources')):
+        resource.update(_resource_config(config, action))
+
+    resource['cpu'] = max(int(resource['cpu']), 1)
+    resource['mem'] = parse_memory(resource['mem'])
+
+    if capacity:
+        for k in resource:
+            if k in capacity and resource[k] > capacity[k]:
+                _logger.debug('Resource {0} of {1} {2} limited to {3}'.format(k, pkg_info.get('name'), action, capacity[k]))
+                resource[k] = capacity[k]
+
+    return resource
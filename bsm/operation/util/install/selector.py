@@ -1,26 +1,47 @@
-from bsm.loader import run_handler
-from bsm.loader import LoadError
+from bsm.handler import Handler
+from bsm.handler import HandlerNotFoundError
+from bsm.handler import resolve_handler
+
+from bsm.config.view import MappingView
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
 
 class Selector(object):
-    def __init__(self, config_user, config_version, config_release):
-        self.__config_user = config_user
-        self.__config_version = config_version
-        self.__config_release = config_release
+    '''Select with the "selector" handler of the release
+
+    If the release does not provide one, default_selector is used, or
+    one vertex is randomly selected.
+    '''
+    def __init__(self, config, default_selector=None):
+        self.__config = config
+        self.__default_selector = default_selector
+
+    def __default_select(self, running, idle):
+        if self.__default_selector is not None:
+            return self.__default_selector.select(running, idle)
+        _logger.debug('Will randomly select one')
+        return [next(iter(idle))]
 
     def select(self, running, idle):
+        # The selector is called for every scheduling round
+        if not resolve_handler('selector'):
+            return self.__default_select(running, idle)
+
         param = {}
-        param['config_user'] = self.__config_user
-        param['config_version'] = self.__config_version.config
-        param['config_release'] = self.__config_release.config
+        param['config_user'] = MappingView(self.__config['user'].data)
+        param['config_scenario'] = MappingView(self.__config['scenario'].data)
+        param['config_release'] = MappingView(self.__config['release'].data)
         param['running'] = running
         param['idle'] = idle
 
         try:
-            return run_handler('selector', param)
-        except LoadError as e:
+            with Handler() as h:
+                return h.run('selector', param)
+        except HandlerNotFoundError as e:
             _logger.debug('Selector load failed: {0}'.format(e))
-            _logger.debug('Will randomly select one')
-            return [next(iter(idle))]
+            return self.__default_select(running, idle)
         except Exception as e:
             _logger.error('Selector run error: {0}'.format(e))
             raise
@@ -1,6 +1,3 @@
-from bsm.package_manager import PackageManager
-
-from bsm.util import is_str
 from bsm.util import ensure_list
 
 from bsm.logger import get_logger
@@ -11,27 +8,15 @@ class InstallStepError(Exception):
     pass
 
 
-def _step_param(config_action):
-    if not config_action:
-        return None, None
-
-    if is_str(config_action):
-        return config_action, None
-
-    if isinstance(config_action, dict):
-        if len(config_action) > 1:
-            _logger.warn('More than one actions found in the install action dictionary. Will only randomly choose one!')
-            _logger.debug('config_action: {0}'.format(config_action))
-        handler = next(iter(config_action))
-        return handler, config_action[handler]
-
-    return None, None
-
-
 class Step(object):
-    def __init__(self, config_version, config_release):
-        self.__config_version = config_version
+    '''Install steps of the packages, with the finished actions skipped
+
+    The steps come from package_install, where the steps without handler
+    are only placeholders and are not run.
+    '''
+    def __init__(self, config_release, pkg_mgr):
         self.__config_release = config_release
+        self.__pkg_mgr = pkg_mgr
 
         self.__load_setting()
         self.__load_steps()
@@ -39,13 +24,17 @@ class Step(object):
     def __load_setting(self):
         setting_install = self.__config_release.get('setting', {}).get('install', {})
         self.__all_steps = setting_install.get('steps', [])
-        self.__atomic_start = setting_install.get('atomic_start')
-        self.__atomic_end = setting_install.get('atomic_end')
         self.__no_skip = ensure_list(setting_install.get('no_skip', []))
 
         if len(self.__all_steps) != len(set(self.__all_steps)):
             raise InstallStepError('Duplicated steps found: {0}'.format(self.__all_steps))
 
+        # The dependencies must finish all the steps by default
+        self.__atomic_start = setting_install.get('atomic_start', self.__all_steps[0] if self.__all_steps else None)
+        self.__atomic_end = setting_install.get('atomic_end', self.__all_steps[-1] if self.__all_steps else None)
+        if not self.__all_steps:
+            return
+
         if self.__atomic_start not in self.__all_steps or self.__atomic_end not in self.__all_steps:
             raise InstallStepError('Can not find atomic start/end: {0}/{1}'.format(self.__atomic_start, self.__atomic_end))
 
@@ -55,29 +44,21 @@ class Step(object):
     def __load_steps(self):
         self.__steps = {}
 
-        pkg_mgr = PackageManager(self.__config_version, self.__config_release)
-
-        for pkg, pkg_info in pkg_mgr.package_all().items():
-            if not pkg_info.get('config_category', {}).get('install'):
-                continue
-
+        for pkg, pkg_info in self.__pkg_mgr.package_all().items():
             self.__steps[pkg] = []
 
-            for action in self.__all_steps:
-                if not pkg_info.get('config', {}).get('install', {}).get(action):
+            finished = {}
+            for step in pkg_info['step']:
+                if not step['handler']:
                     continue
 
-                if action not in self.__no_skip and pkg_mgr.is_finished(pkg, action):
+                action = step['action']
+                if action not in finished:
+                    finished[action] = action not in self.__no_skip and self.__pkg_mgr.is_finished(pkg, action)
+                if finished[action]:
                     continue
 
-                config_action = ensure_list(pkg_info['config']['install'][action])
-
-                sub_index = 0
-                for cfg_action in config_action:
-                    handler, param = _step_param(cfg_action)
-                    if handler:
-                        self.__steps[pkg].append({'action': action, 'sub_action': sub_index, 'handler': handler, 'param': param})
-                    sub_index += 1
+                self.__steps[pkg].append(step)
 
     def package_steps_all(self):
         return self.__steps
@@ -104,14 +85,14 @@ class Step(object):
 
     def __find_dest_action(self, all_steps, step_list, dest_start, dest_end):
         start_found = False
-        for step in all_steps:
-            if not start_found and step == dest_start:
+        for action in all_steps:
+            if not start_found and action == dest_start:
                 start_found = True
             if start_found:
-                step = self.__search_step(step, step_list)
+                step = self.__search_step(action, step_list)
                 if step:
                     return step
-            if step == dest_end:
+            if action == dest_end:
                 break
         return None
 
@@ -123,4 +104,4 @@ class Step(object):
     def find_atomic_end(self, pkg):
         if pkg not in self.__steps:
             return None
-        return self.__find_dest_action(reversed(self.__all_steps), reversed(self.__steps[pkg]), self.__atomic_end, self.__atomic_start)
+        return self.__find_dest_action(list(reversed(self.__all_steps)), list(reversed(self.__steps[pkg])), self.__atomic_end, self.__atomic_start)
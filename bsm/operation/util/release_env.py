@@ -0,0 +1,45 @@
+from bsm.paradag import Dag
+from bsm.paradag import dag_run
+
+from bsm.operation.util.install.package_manager import PackageManager
+
+
+class _OrderedSelector(object):
+    '''Select by name, so the packages are always loaded in the same order'''
+    def select(self, running, idle):
+        return [min(idle)]
+
+
+def _sorted_packages(pkg_mgr):
+    pkgs = [pkg for pkg, pkg_info in pkg_mgr.package_all().items() if pkg_info['config_category'].get('auto_env')]
+
+    dag = Dag()
+    dag.add_vertex(*pkgs)
+
+    edges = []
+    for pkg in pkgs:
+        for pkg_dep in pkg_mgr.package_deps(pkg):
+            if pkg_dep in pkgs:
+                edges.append((pkg_dep, pkg))
+    dag.add_edges(edges)
+
+    return dag_run(dag, selector=_OrderedSelector())
+
+
+def release_env(config):
+    '''Env config of the release, and of the packages in the order to be loaded'''
+    config_scenario = config['scenario']
+
+    global_env = config['release'].get('setting', {}).get('global_env', {})
+    config_release_env = {'set_env': dict((k, v.format(**config_scenario)) for k, v in global_env.items())}
+
+    pkg_mgr = PackageManager(config)
+    packages_env = [(pkg, pkg_mgr.package_info(pkg)['config'].get('env', {})) for pkg in _sorted_packages(pkg_mgr)]
+
+    return config_release_env, packages_env
+
+
+def load_release_env(env, config_scenario, config_release_env, packages_env):
+    env.load_release(config_scenario['software_root'], config_scenario['version'], config_release_env)
+    for pkg, config_env in packages_env:
+        env.load_package(pkg, config_env)
@@ -26,6 +26,9 @@ class DagData(object):
     def vertice(self):
         return set(self.__graph.keys())
 
+    def has_vertex(self, vertex):
+        return vertex in self.__graph
+
     def add_vertex(self, vertex):
         if vertex not in self.__graph:
             self.__graph[vertex] = set()
@@ -52,17 +55,41 @@ class Dag(object):
 
     def __validate_vertex(self, *vertice):
         for vertex in vertice:
-            if vertex not in self.__data.vertice():
+            if not self.__data.has_vertex(vertex):
                 raise DagVertexNotFoundError('Vertex "{0}" does not belong to DAG'.format(vertex))
 
     def __has_path_to(self, v_from, v_to):
+        # Iterative search, each vertex is visited only once
         if v_from == v_to:
             return True
-        for v in self.__data.successors(v_from):
-            if self.__has_path_to(v, v_to):
-                return True
+        visited = set([v_from])
+        stack = [v_from]
+        while stack:
+            for v in self.__data.successors(stack.pop()):
+                if v == v_to:
+                    return True
+                if v not in visited:
+                    visited.add(v)
+                    stack.append(v)
         return False
 
+    def __vertice_in_cycle(self):
+        '''Return the vertice which could not be topologically sorted'''
+        indegree = {}
+        for vertex in self.__data.vertice():
+            indegree[vertex] = len(self.__data.predecessors(vertex))
+
+        zero_indegree = [vertex for vertex, degree in indegree.items() if degree == 0]
+        while zero_indegree:
+            vertex = zero_indegree.pop()
+            del indegree[vertex]
+            for v_to in self.__data.successors(vertex):
+                indegree[v_to] -= 1
+                if indegree[v_to] == 0:
+                    zero_indegree.append(v_to)
+
+        return set(indegree)
+
 
     def vertice(self):
         return self.__data.vertice()
@@ -79,6 +106,28 @@ class Dag(object):
                 raise DagCycleError('Cycle if add edge from "{0}" to "{1}"'.format(v_from, v_to))
             self.__data.add_edge(v_from, v_to)
 
+    def add_edges(self, edges):
+        '''Add many edges (v_from, v_to) and check for cycle only once at the end
+
+        If any cycle is found, none of the edges is added.
+        '''
+        edges = list(edges)
+        for v_from, v_to in edges:
+            self.__validate_vertex(v_from, v_to)
+
+        edges_added = []
+        for v_from, v_to in edges:
+            if v_to not in self.__data.successors(v_from):
+                self.__data.add_edge(v_from, v_to)
+                edges_added.append((v_from, v_to))
+
+        vertice_in_cycle = self.__vertice_in_cycle()
+        if vertice_in_cycle:
+            for v_from, v_to in edges_added:
+                self.__data.remove_edge(v_from, v_to)
+            raise DagCycleError('Cycle if add edges, {0} vertice in or after the cycle, e.g. "{1}"'.format(
+                len(vertice_in_cycle), next(iter(vertice_in_cycle))))
+
     def remove_edge(self, v_from, v_to):
         self.__validate_vertex(v_from, v_to)
         if v_to not in self.__data.successors(v_from):
@@ -146,6 +195,82 @@ class ShuffleSelector(object):
         return idle_list
 
 
+def critical_path_priority(dag, cost=None):
+    '''Cost of the longest path from each vertex to a terminal, including itself
+
+    cost(vertex) gives the weight of a vertex, 1 for all vertice if not specified
+    '''
+    if cost is None:
+        cost = lambda vertex: 1
+
+    priority = {}
+    outdegree = {}
+    vertice_ready = list(dag.all_terminals())
+    while vertice_ready:
+        vertex = vertice_ready.pop()
+        priority[vertex] = cost(vertex) + max([priority[v] for v in dag.successors(vertex)] or [0])
+        for v_from in dag.predecessors(vertex):
+            if v_from not in outdegree:
+                outdegree[v_from] = dag.outdegree(v_from)
+            outdegree[v_from] -= 1
+            if outdegree[v_from] == 0:
+                vertice_ready.append(v_from)
+    return priority
+
+class CriticalPathSelector(object):
+    '''Select the idle vertice with the longest remaining path first
+
+    With limit, no more than limit vertice are running at the same time,
+    so the vertice becoming idle later could still go before the others.
+    '''
+    def __init__(self, dag, cost=None, limit=None):
+        self.__priority = critical_path_priority(dag, cost)
+        self.__limit = limit
+
+    def priority(self, vertex):
+        return self.__priority[vertex]
+
+    def select(self, running, idle):
+        vertice_sorted = sorted(idle, key=self.__priority.get, reverse=True)
+        if self.__limit is None:
+            return vertice_sorted
+        return vertice_sorted[:max(self.__limit-len(running), 0)]
+
+class ResourceSelector(object):
+    '''Only select vertice while the running ones fit in the capacity
+
+    The vertice are taken in the order from the inner selector.
+    resource(vertex) returns the reservation like {'cpu': 2, 'mem': 1024},
+    which is compared with capacity of the same keys. A vertex is always
+    selected when nothing is running, even if it does not fit.
+    '''
+    def __init__(self, selector, resource, capacity):
+        self.__selector = selector
+        self.__resource = resource
+        self.__capacity = capacity
+
+    def __fit(self, allocated, required):
+        for k, v in required.items():
+            if k in self.__capacity and allocated.get(k, 0) + v > self.__capacity[k]:
+                return False
+        return True
+
+    def select(self, running, idle):
+        allocated = {}
+        for vertex in running:
+            for k, v in self.__resource(vertex).items():
+                allocated[k] = allocated.get(k, 0) + v
+
+        selected = []
+        for vertex in self.__selector.select(running, idle):
+            required = self.__resource(vertex)
+            if (not running and not selected) or self.__fit(allocated, required):
+                selected.append(vertex)
+                for k, v in required.items():
+                    allocated[k] = allocated.get(k, 0) + v
+        return selected
+
+
 class NullProcessor(object):
     def process(self, vertice, executor):
         return [(vertex, None) for vertex in vertice]
@@ -188,31 +313,38 @@ def dag_run(dag, selector=None, processor=None, executor=None):
     for vertex in dag.vertice():
         indegree_dict[vertex] = dag.indegree(vertex)
 
+    # These sets are only updated with the vertice changed,
+    # so the cost of each iteration does not grow with the DAG size
     vertice_final = []
-    vertice_processing = set()
-    vertice_zero_indegree = dag.all_starts()
+    vertice_running = set()
+    vertice_idle = dag.all_starts()
 
-    while vertice_zero_indegree:
-        vertice_to_run = selector.select(vertice_processing, vertice_zero_indegree-vertice_processing)
-        executor.report_start(vertice_to_run)
-        executor.report_running(set(vertice_to_run) | vertice_processing)
+    while vertice_idle or vertice_running:
+        vertice_to_run = []
+        if vertice_idle:
+            vertice_to_run = selector.select(vertice_running, vertice_idle)
+            vertice_idle.difference_update(vertice_to_run)
+            vertice_running.update(vertice_to_run)
 
-        vertice_processed_results = processor.process(vertice_to_run, executor)
-        executor.report_finish(vertice_processed_results)
-        vertice_processed = [result[0] for result in vertice_processed_results]
+            executor.report_start(vertice_to_run)
+            executor.report_running(vertice_running)
 
-        vertice_processing |= set(vertice_to_run)
-        vertice_processing -= set(vertice_processed)
+        # Processor returns all the vertice finished since last time
+        vertice_processed_results = processor.process(vertice_to_run, executor)
+        if not vertice_processed_results:
+            continue
 
-        vertice_final += vertice_processed
-        vertice_zero_indegree -= set(vertice_processed)
+        executor.report_finish(vertice_processed_results)
 
         for vertex, result in vertice_processed_results:
+            vertice_running.discard(vertex)
+            vertice_final.append(vertex)
+
             for v_to in dag.successors(vertex):
                 executor.deliver(v_to, result)
 
                 indegree_dict[v_to] -= 1
                 if indegree_dict[v_to] == 0:
-                    vertice_zero_indegree.add(v_to)
+                    vertice_idle.add(v_to)
 
     return vertice_final
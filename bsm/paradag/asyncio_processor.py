@@ -0,0 +1,90 @@
+''' Processor driven by asyncio, python 3.5+ only
+'''
+
+import asyncio
+import functools
+
+from bsm.paradag import VertexExecutionError
+
+
+async def _run_with_slot(slot_broker, start):
+    # Poll in the loop, waiting in threads could use up the default thread pool
+    while True:
+        slot = slot_broker.try_acquire()
+        if slot is not None:
+            break
+        await asyncio.sleep(slot_broker.poll_interval)
+    try:
+        return await start()
+    finally:
+        slot_broker.release(slot)
+
+
+class AsyncioProcessor(object):
+    '''Execute vertice as asyncio tasks in one thread
+
+    If the executor has a coroutine function "execute_async", it is used
+    to execute the vertex param. Otherwise executor.execute is run in the
+    default thread pool of the loop.
+
+    With slot_broker, a slot is acquired before executing each vertex
+    and released after.
+    '''
+    def __init__(self, loop=None, timeout=None, slot_broker=None):
+        if loop is None:
+            loop = asyncio.new_event_loop()
+        self.__loop = loop
+        self.__timeout = timeout
+        self.__slot_broker = slot_broker
+
+        self.__tasks = {}
+
+    def __start_vertice(self, vertice, executor):
+        execute_async = getattr(executor, 'execute_async', None)
+
+        for vertex in vertice:
+            if vertex in self.__tasks:
+                continue
+            param_vertex = executor.param(vertex)
+            if execute_async is not None:
+                start = functools.partial(execute_async, param_vertex)
+            else:
+                start = functools.partial(self.__loop.run_in_executor, None, executor.execute, param_vertex)
+            if self.__slot_broker is None:
+                task = asyncio.ensure_future(start(), loop=self.__loop)
+            else:
+                task = asyncio.ensure_future(_run_with_slot(self.__slot_broker, start), loop=self.__loop)
+            self.__tasks[vertex] = task
+
+    def __wait_vertice(self, executor):
+        if self.__tasks and not any(task.done() for task in self.__tasks.values()):
+            self.__loop.run_until_complete(asyncio.wait(list(self.__tasks.values()),
+                timeout=self.__timeout, return_when=asyncio.FIRST_COMPLETED))
+
+        # All the finished vertice are returned together
+        results = []
+        finished = [vertex for vertex, task in self.__tasks.items() if task.done()]
+        for vertex in finished:
+            task = self.__tasks.pop(vertex)
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                self.__clear_vertice(executor)
+                raise VertexExecutionError('Vertex "{0}" execution error: {1}'.format(vertex, task.exception()))
+            results.append((vertex, task.result()))
+        return results
+
+    def __clear_vertice(self, executor):
+        executor.abort(set(self.__tasks.keys()))
+        for task in self.__tasks.values():
+            task.cancel()
+        if self.__tasks:
+            self.__loop.run_until_complete(asyncio.wait(list(self.__tasks.values())))
+        self.__tasks = {}
+
+    def process(self, vertice, executor):
+        self.__start_vertice(vertice, executor)
+        return self.__wait_vertice(executor)
+
+    def close(self):
+        self.__loop.close()
@@ -0,0 +1,187 @@
+from array import array
+
+from bsm.paradag import DagVertexNotFoundError
+from bsm.paradag import DagCycleError
+
+
+class DagFrozenError(Exception):
+    pass
+
+
+class CompactDag(object):
+    '''DAG with vertice interned to integer ids, for very large graphs
+
+    Vertice and edges are added first. The graph is frozen on the first
+    query (or by calling freeze), after which the adjacency is kept in
+    arrays of ids (CSR form) and no more vertice or edges could be added.
+
+    It has the same query interface as Dag, so it could be used with
+    dag_run. The *_ids methods work on ids directly for analyses which
+    do not need the vertex objects.
+    '''
+    def __init__(self):
+        self.__vertice = []
+        self.__vertex_id = {}
+
+        self.__edge_from = array('i')
+        self.__edge_to = array('i')
+
+        self.__frozen = False
+        self.__out_offset = None
+        self.__out_target = None
+        self.__in_offset = None
+        self.__in_source = None
+
+    def __id(self, vertex):
+        try:
+            return self.__vertex_id[vertex]
+        except KeyError:
+            raise DagVertexNotFoundError('Vertex "{0}" does not belong to DAG'.format(vertex))
+
+    def __check_not_frozen(self):
+        if self.__frozen:
+            raise DagFrozenError('Could not modify DAG after frozen')
+
+    @staticmethod
+    def __csr(size, keys, values):
+        '''Group values by keys, with duplicated pairs removed'''
+        count = array('l', [0]) * (size + 1)
+        for k in keys:
+            count[k+1] += 1
+        for i in range(size):
+            count[i+1] += count[i]
+
+        fill = array('l', count)
+        grouped = array('i', [0]) * len(keys)
+        for k, v in zip(keys, values):
+            grouped[fill[k]] = v
+            fill[k] += 1
+
+        offset = array('l', [0]) * (size + 1)
+        target = array('i')
+        for k in range(size):
+            target.extend(sorted(set(grouped[count[k]:count[k+1]])))
+            offset[k+1] = len(target)
+        return offset, target
+
+    def __vertice_in_cycle(self):
+        size = len(self.__vertice)
+        indegree = array('l', [self.__in_offset[i+1] - self.__in_offset[i] for i in range(size)])
+
+        zero_indegree = [i for i in range(size) if indegree[i] == 0]
+        sorted_number = 0
+        while zero_indegree:
+            i = zero_indegree.pop()
+            sorted_number += 1
+            for j in self.__out_target[self.__out_offset[i]:self.__out_offset[i+1]]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    zero_indegree.append(j)
+
+        if sorted_number == size:
+            return []
+        return [self.__vertice[i] for i in range(size) if indegree[i] > 0]
+
+
+    def add_vertex(self, *vertice):
+        self.__check_not_frozen()
+        for vertex in vertice:
+            if vertex not in self.__vertex_id:
+                self.__vertex_id[vertex] = len(self.__vertice)
+                self.__vertice.append(vertex)
+
+    def add_edge(self, v_from, *v_tos):
+        self.add_edges((v_from, v_to) for v_to in v_tos)
+
+    def add_edges(self, edges):
+        '''Add edges (v_from, v_to), cycles are checked when frozen
+
+        Nothing is added if any vertex is not found.
+        '''
+        self.__check_not_frozen()
+        edge_from = array('i')
+        edge_to = array('i')
+        for v_from, v_to in edges:
+            i_from = self.__id(v_from)
+            i_to = self.__id(v_to)
+            edge_from.append(i_from)
+            edge_to.append(i_to)
+        self.__edge_from.extend(edge_from)
+        self.__edge_to.extend(edge_to)
+
+    def freeze(self):
+        if self.__frozen:
+            return
+
+        size = len(self.__vertice)
+        out_offset, out_target = self.__csr(size, self.__edge_from, self.__edge_to)
+        in_offset, in_source = self.__csr(size, self.__edge_to, self.__edge_from)
+        self.__out_offset, self.__out_target = out_offset, out_target
+        self.__in_offset, self.__in_source = in_offset, in_source
+
+        vertice_in_cycle = self.__vertice_in_cycle()
+        if vertice_in_cycle:
+            self.__out_offset = self.__out_target = self.__in_offset = self.__in_source = None
+            raise DagCycleError('Cycle found in DAG, {0} vertice in or after the cycle, e.g. "{1}"'.format(
+                len(vertice_in_cycle), vertice_in_cycle[0]))
+
+        self.__edge_from = None
+        self.__edge_to = None
+        self.__frozen = True
+
+    @property
+    def frozen(self):
+        return self.__frozen
+
+
+    def vertex_id(self, vertex):
+        return self.__id(vertex)
+
+    def vertex(self, vertex_id):
+        return self.__vertice[vertex_id]
+
+    def successor_ids(self, vertex_id):
+        self.freeze()
+        return self.__out_target[self.__out_offset[vertex_id]:self.__out_offset[vertex_id+1]]
+
+    def predecessor_ids(self, vertex_id):
+        self.freeze()
+        return self.__in_source[self.__in_offset[vertex_id]:self.__in_offset[vertex_id+1]]
+
+
+    def vertice(self):
+        '''All the vertice in the order of their ids'''
+        return list(self.__vertice)
+
+    def vertex_size(self):
+        return len(self.__vertice)
+
+    def edge_size(self):
+        self.freeze()
+        return len(self.__out_target)
+
+    def successors(self, vertex):
+        return [self.__vertice[i] for i in self.successor_ids(self.__id(vertex))]
+
+    def predecessors(self, vertex):
+        return [self.__vertice[i] for i in self.predecessor_ids(self.__id(vertex))]
+
+    def indegree(self, vertex):
+        self.freeze()
+        i = self.__id(vertex)
+        return self.__in_offset[i+1] - self.__in_offset[i]
+
+    def outdegree(self, vertex):
+        self.freeze()
+        i = self.__id(vertex)
+        return self.__out_offset[i+1] - self.__out_offset[i]
+
+    def all_starts(self):
+        self.freeze()
+        offset = self.__in_offset
+        return set(self.__vertice[i] for i in range(len(self.__vertice)) if offset[i+1] == offset[i])
+
+    def all_terminals(self):
+        self.freeze()
+        offset = self.__out_offset
+        return set(self.__vertice[i] for i in range(len(self.__vertice)) if offset[i+1] == offset[i])
@@ -0,0 +1,122 @@
+try:
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+except ImportError:
+    # Python 2 without the "futures" backport
+    ProcessPoolExecutor = None
+
+from bsm.paradag import VertexExecutionError
+
+
+class ProcessPoolNotAvailableError(Exception):
+    pass
+
+
+# Whether the initializer has been run in this worker process
+_worker_initialized = False
+
+def _run_with_slot(slot_broker, execute_func, param):
+    if slot_broker is None:
+        return execute_func(param)
+    slot = slot_broker.acquire()
+    try:
+        return execute_func(param)
+    finally:
+        slot_broker.release(slot)
+
+def _run_in_worker(initializer, initargs, execute_func, param, slot_broker=None):
+    global _worker_initialized
+    if not _worker_initialized:
+        if initializer is not None:
+            initializer(*initargs)
+        _worker_initialized = True
+    return _run_with_slot(slot_broker, execute_func, param)
+
+
+class MultiProcessProcessor(object):
+    '''Execute vertice in a bounded pool of worker processes
+
+    execute_func is called with the param of the vertex in the worker
+    process. Both must be picklable. If execute_func is None,
+    executor.execute is used, so the executor must be picklable.
+
+    initializer(*initargs) is run once in each worker process before the
+    first vertex, e.g. to set up the handler path.
+
+    Vertice for which in_thread(vertex, param) returns True are executed
+    with executor.execute in a thread of the current process instead,
+    which is better for steps waiting on external commands.
+
+    With slot_broker, which must be picklable, a slot is acquired before
+    executing each vertex and released after.
+    '''
+    def __init__(self, max_workers=None, execute_func=None, initializer=None, initargs=(), in_thread=None, timeout=None, slot_broker=None):
+        if ProcessPoolExecutor is None:
+            raise ProcessPoolNotAvailableError('concurrent.futures is not available, install "futures" for python 2')
+
+        self.__max_workers = max_workers
+        self.__execute_func = execute_func
+        self.__initializer = initializer
+        self.__initargs = initargs
+        self.__in_thread = in_thread
+        self.__timeout = timeout
+        self.__slot_broker = slot_broker
+
+        self.__process_pool = None
+        self.__thread_pool = None
+        self.__futures = {}
+
+    def __submit_process(self, executor, param):
+        if self.__process_pool is None:
+            self.__process_pool = ProcessPoolExecutor(self.__max_workers)
+        execute_func = self.__execute_func
+        if execute_func is None:
+            execute_func = executor.execute
+        return self.__process_pool.submit(_run_in_worker, self.__initializer, self.__initargs, execute_func, param, self.__slot_broker)
+
+    def __submit_thread(self, executor, param):
+        if self.__thread_pool is None:
+            self.__thread_pool = ThreadPoolExecutor(self.__max_workers or 4)
+        return self.__thread_pool.submit(_run_with_slot, self.__slot_broker, executor.execute, param)
+
+    def __start_vertice(self, vertice, executor):
+        running = set(self.__futures.values())
+        for vertex in vertice:
+            if vertex in running:
+                continue
+            param_vertex = executor.param(vertex)
+            if self.__in_thread is not None and self.__in_thread(vertex, param_vertex):
+                future = self.__submit_thread(executor, param_vertex)
+            else:
+                future = self.__submit_process(executor, param_vertex)
+            self.__futures[future] = vertex
+
+    def __wait_vertice(self, executor):
+        done, _ = wait(list(self.__futures), timeout=self.__timeout, return_when=FIRST_COMPLETED)
+
+        results = []
+        for future in done:
+            vertex = self.__futures.pop(future)
+            try:
+                results.append((vertex, future.result()))
+            except Exception as e:
+                self.__clear_vertice(executor)
+                raise VertexExecutionError('Vertex "{0}" execution error: {1}'.format(vertex, e))
+        return results
+
+    def __clear_vertice(self, executor):
+        executor.abort(set(self.__futures.values()))
+        wait(list(self.__futures))
+        self.__futures = {}
+        self.shutdown()
+
+    def process(self, vertice, executor):
+        self.__start_vertice(vertice, executor)
+        return self.__wait_vertice(executor)
+
+    def shutdown(self):
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown()
+            self.__process_pool = None
+        if self.__thread_pool is not None:
+            self.__thread_pool.shutdown()
+            self.__thread_pool = None
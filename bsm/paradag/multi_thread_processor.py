@@ -1,3 +1,4 @@
+import time
 import threading
 
 try:
@@ -7,51 +8,175 @@ except ImportError:
 
 from bsm.paradag import VertexExecutionError
 
+from bsm.util.host import cpu_count
 
-def dag_thread(dag_queue, vertex, executor, param):
+
+def dag_thread(dag_queue, vertex, executor, param, slot_broker=None):
     try:
-        dag_queue.put((vertex, executor.execute(param)))
+        slot = None
+        if slot_broker is not None:
+            slot = slot_broker.acquire()
+        try:
+            dag_queue.put((vertex, executor.execute(param)))
+        finally:
+            if slot_broker is not None:
+                slot_broker.release(slot)
     except Exception as e:
         dag_queue.put((vertex, e))
 
 
+class _WorkerPool(object):
+    '''Fixed number of threads executing the queued vertice'''
+    def __init__(self, max_workers, dag_queue, slot_broker=None):
+        self.__max_workers = max_workers
+        self.__dag_queue = dag_queue
+        self.__slot_broker = slot_broker
+        self.__task_queue = Queue()
+        self.__workers = []
+
+        self.__lock = threading.Lock()
+        self.__busy = 0
+        self.__busy_time = 0.0
+        self.__start_time = time.time()
+
+    def __work(self):
+        while True:
+            task = self.__task_queue.get()
+            if task is None:
+                break
+            vertex, executor, param = task
+
+            with self.__lock:
+                self.__busy += 1
+            start = time.time()
+            try:
+                dag_thread(self.__dag_queue, vertex, executor, param, self.__slot_broker)
+            finally:
+                with self.__lock:
+                    self.__busy -= 1
+                    self.__busy_time += time.time() - start
+
+    def submit(self, vertex, executor, param):
+        self.__task_queue.put((vertex, executor, param))
+        # Threads are created until max_workers, and reused afterwards
+        if len(self.__workers) < self.__max_workers:
+            worker = threading.Thread(target=self.__work)
+            worker.daemon = True
+            worker.start()
+            self.__workers.append(worker)
+
+    def cancel_queued(self):
+        '''Remove the vertice not started yet'''
+        cancelled = []
+        while True:
+            try:
+                task = self.__task_queue.get_nowait()
+            except Empty:
+                break
+            if task is not None:
+                cancelled.append(task[0])
+        return cancelled
+
+    def stats(self):
+        with self.__lock:
+            busy = self.__busy
+            busy_time = self.__busy_time
+        elapsed = time.time() - self.__start_time
+        return {
+            'max_workers': self.__max_workers,
+            'workers': len(self.__workers),
+            'busy': busy,
+            'queue_depth': self.__task_queue.qsize(),
+            'utilization': busy_time / (self.__max_workers * elapsed) if elapsed > 0 else 0.0,
+        }
+
+    def shutdown(self):
+        for _ in self.__workers:
+            self.__task_queue.put(None)
+        for worker in self.__workers:
+            worker.join()
+        self.__workers = []
+
+
 class MultiThreadProcessor(object):
-    def __init__(self, timeout=None):
+    '''Execute vertice in threads
+
+    At most max_workers threads are running, one for each processor by
+    default. The threads are reused, and the other selected vertice wait
+    in the queue. The pool status is passed to executor.report_pool(stats)
+    if it exists.
+
+    With slot_broker, a slot is acquired before executing each vertex
+    and released after, so the vertice wait for the slots shared with
+    other processes.
+    '''
+    def __init__(self, timeout=None, max_workers=None, slot_broker=None):
         self.__timeout = timeout
+        self.__slot_broker = slot_broker
 
         self.__dag_threads = {}
         self.__dag_queue = Queue()
 
+        if max_workers is None:
+            max_workers = cpu_count()
+        self.__pool = _WorkerPool(max(1, max_workers), self.__dag_queue, slot_broker)
+
     def __start_threads(self, vertice, executor):
         for vertex in vertice:
             if vertex not in self.__dag_threads:
-                param_vertex = executor.param(vertex)
-                args = [self.__dag_queue, vertex, executor, param_vertex]
-                self.__dag_threads[vertex] = threading.Thread(target=dag_thread, args=args)
-                self.__dag_threads[vertex].start()
+                self.__pool.submit(vertex, executor, executor.param(vertex))
+                self.__dag_threads[vertex] = None
+
+    def __finish_thread(self, vertex):
+        del self.__dag_threads[vertex]
 
     def __wait_threads(self, executor):
         try:
-            item = self.__dag_queue.get(timeout=self.__timeout)
-            self.__dag_threads[item[0]].join()
-            del self.__dag_threads[item[0]]
+            items = [self.__dag_queue.get(timeout=self.__timeout)]
+        except Empty:
+            return []
 
+        # Take all the other finished vertice as well
+        while True:
+            try:
+                items.append(self.__dag_queue.get_nowait())
+            except Empty:
+                break
+
+        for item in items:
+            self.__finish_thread(item[0])
+
+        for item in items:
             if isinstance(item[1], Exception):
                 self.__clear_threads(executor)
                 raise VertexExecutionError('Vertex "{0}" execution error: {1}'.format(item[0], item[1]))
 
-            return [item]
-        except Empty:
-            return []
+        return items
 
     def __clear_threads(self, executor):
+        for vertex in self.__pool.cancel_queued():
+            del self.__dag_threads[vertex]
+
         executor.abort(set(self.__dag_threads.keys()))
 
         while self.__dag_threads:
             item = self.__dag_queue.get()
-            self.__dag_threads[item[0]].join()
-            del self.__dag_threads[item[0]]
+            self.__finish_thread(item[0])
+
+        self.shutdown()
+
+    def __report_pool(self, executor):
+        report_pool = getattr(executor, 'report_pool', None)
+        if report_pool is not None:
+            report_pool(self.__pool.stats())
 
     def process(self, vertice, executor):
         self.__start_threads(vertice, executor)
+        self.__report_pool(executor)
         return self.__wait_threads(executor)
+
+    def stats(self):
+        return self.__pool.stats()
+
+    def shutdown(self):
+        self.__pool.shutdown()
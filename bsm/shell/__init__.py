@@ -4,6 +4,11 @@ import json
 from bsm.loader import load_common
 
 
+# The first line of output which tells the shell function to eval the output
+# It is a no-op for both sh and csh, so the output could also be evaluated directly
+SCRIPT_HEADER = ': BSM:OUTPUT_IS_SCRIPT;'
+
+
 class Shell(object):
     def __init__(self, shell_name, cmd_name, app_root):
         self.__shell = load_common(shell_name, 'bsm.shell')(cmd_name, app_root)
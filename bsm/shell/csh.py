@@ -1,11 +1,17 @@
 import sys
 import os
 
+from bsm.shell import SCRIPT_HEADER
 from bsm.shell.base import Base
 
+from bsm.daemon import DAEMON_CLIENT
+from bsm.daemon import daemon_socket
+
 CUR_DIR = os.path.dirname(os.path.realpath(__file__))
 CSH_INIT = os.path.join(CUR_DIR, 'bsm.csh')
-CSH_SCRIPT_INIT = os.path.join(CUR_DIR, 'bsm_script.csh')
+
+def _quote(value):
+    return "'" + value.replace("'", "'\\''") + "'"
 
 class Csh(Base):
     def echo(self, content):
@@ -18,36 +24,68 @@ class Csh(Base):
         return ';\n'.join(newlines) + ';\n'
 
     def set_env(self, env_name, env_value):
-        return 'setenv {0} "{1}";\n'.format(env_name, env_value)
+        return 'setenv {0} {1};\n'.format(env_name, _quote(env_value))
+
+    def merge_path(self, env_name, prepend_list, append_list):
+        '''Add the paths before and after the current value
+
+        There is no "else" on one line, so the empty value is checked
+        after the other case, which never leaves the value empty.
+        '''
+        prepend = os.pathsep.join(prepend_list)
+        append = os.pathsep.join(append_list)
+        value_empty = os.pathsep.join(prepend_list + append_list)
+        value = ''
+        if prepend_list:
+            value += _quote(prepend + os.pathsep)
+        value += '"${{{0}}}"'.format(env_name)
+        if append_list:
+            value += _quote(os.pathsep + append)
+
+        script = 'if ( ! $?{0} ) setenv {0} "";\n'.format(env_name)
+        script += 'if ( "${{{0}}}" != "" ) setenv {0} {1};\n'.format(env_name, value)
+        script += 'if ( "${{{0}}}" == "" ) setenv {0} {1};\n'.format(env_name, _quote(value_empty))
+        return script
 
     def unset_env(self, env_name):
         return 'unsetenv {0};\n'.format(env_name)
 
+    def alias(self, alias_name, alias_value):
+        return 'alias {0} {1};\n'.format(alias_name, _quote(alias_value))
+
+    def unalias(self, alias_name):
+        return 'unalias {0};\n'.format(alias_name)
+
     def source(self, script_path):
-        return 'source {0};\n'.format(script_path)
+        return 'source {0};\n'.format(_quote(script_path))
 
-    def define_command(self):
+    # Comments are omitted, since the csh script will be evaluated as one line
+    def comment(self, content):
+        return ''
+
+    def script_init(self):
         python_exe = sys.executable or 'python'
 
-        common_alias = '''\
-alias {0} '\
-set _bsm_python_exe="{1}"; \
-set _bsm_argv="\!*"; \
-source "{2}"; \
-unset _bsm_argv; \
-unset _bsm_python_exe; \
-eval "exit $_bsm_exit"\
+        bsm_alias = '''\
+alias {cmd_name} '\
+set _bsm_var_python_exe="{python_exe}"; \
+set _bsm_var_daemon_client="{daemon_client}"; \
+set _bsm_var_daemon_socket="{daemon_socket}"; \
+set _bsm_var_cmd_name="{cmd_name}"; \
+set _bsm_var_app_root="{app_root}"; \
+set _bsm_var_script_header="{script_header}"; \
+set _bsm_var_argv="\\!*"; \
+source "{csh_init}"; \
+unset _bsm_var_argv _bsm_var_script_header _bsm_var_app_root _bsm_var_cmd_name; \
+unset _bsm_var_daemon_socket _bsm_var_daemon_client _bsm_var_python_exe\
 ';
-'''
-
-        bsm_alias = common_alias.format('bsm', python_exe, CSH_INIT)
-        bsm_script_alias = common_alias.format('bsm_script', python_exe, CSH_SCRIPT_INIT)
+'''.format(cmd_name=self._cmd_name, python_exe=python_exe, app_root=self._app_root,
+        daemon_client=DAEMON_CLIENT, daemon_socket=daemon_socket(), script_header=SCRIPT_HEADER, csh_init=CSH_INIT)
 
-        return bsm_alias + bsm_script_alias
+        return bsm_alias
 
-    def undefine_command(self):
+    def script_exit(self):
         bsm_exit = '''\
-unalias bsm_script;
-unalias bsm;
-'''
+unalias {cmd_name};
+'''.format(cmd_name=self._cmd_name)
         return bsm_exit
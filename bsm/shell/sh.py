@@ -1,7 +1,17 @@
+import os
 import sys
 
+from bsm.shell import SCRIPT_HEADER
 from bsm.shell.base import Base
 
+from bsm.daemon import DAEMON_CLIENT
+from bsm.daemon import daemon_socket
+
+
+def _quote(value):
+    return "'" + value.replace("'", "'\\''") + "'"
+
+
 class Sh(Base):
     def echo(self, content):
         lines = content.rstrip().split('\n')
@@ -13,48 +23,71 @@ class Sh(Base):
         return '\n'.join(newlines) + '\n'
 
     def set_env(self, env_name, env_value):
-        return 'export {0}="{1}"\n'.format(env_name, env_value)
+        return 'export {0}={1}\n'.format(env_name, _quote(env_value))
+
+    def merge_path(self, env_name, prepend_list, append_list):
+        '''Add the paths before and after the current value'''
+        value = ''
+        if prepend_list:
+            value += _quote(os.pathsep.join(prepend_list)) + '"${{{0}:+:${{{0}}}}}"'.format(env_name)
+        else:
+            value += '"${{{0}:+${{{0}}}:}}"'.format(env_name)
+        if append_list:
+            value += _quote((os.pathsep if prepend_list else '') + os.pathsep.join(append_list))
+        return 'export {0}={1}\n'.format(env_name, value)
 
     def unset_env(self, env_name):
         return 'unset {0}\n'.format(env_name)
 
     def alias(self, alias_name, alias_value):
-        return 'alias {0}="{1}"\n'.format(alias_name, alias_value)
+        return 'alias {0}={1}\n'.format(alias_name, _quote(alias_value))
 
     def unalias(self, alias_name):
         return 'unalias {0}\n'.format(alias_name)
 
     def source(self, script_path):
-        return '. {0}\n'.format(script_path)
+        return '. {0}\n'.format(_quote(script_path))
 
     def script_init(self):
         python_exe = sys.executable or 'python'
 
+        # Requests go to the daemon through the tiny client when the daemon socket exists
+        # The output is evaluated only when it starts with the script header
         bsm_func = '''\
-{cmd_name}() {{
-  _bsm_var_check_cli="$('{python_exe}' -c "from bsm.cli import main;main(cmd_name='{cmd_name}',app_root='{app_root}',output_shell='sh',check_cli=True)" $* 2>/dev/null)"
-  if [ "$_bsm_var_check_cli" != 'BSM:COMMAND_LINE_INTERFACE_OK' ]; then
-    unset _bsm_var_check_cli
-    '{python_exe}' -c "from bsm.cli import main;main(cmd_name='{cmd_name}',app_root='{app_root}',output_shell='sh')" $*
-    return
+_{cmd_name}_main() {{
+  if [ -S '{daemon_socket}' ]; then
+    set -- -S '{daemon_client}' '{daemon_socket}' '{cmd_name}' '{app_root}' sh False "$@"
+  else
+    set -- -c "from bsm.cli import main;main(cmd_name='{cmd_name}',app_root='{app_root}',output_shell='sh')" "$@"
   fi
-  unset _bsm_var_check_cli
+  '{python_exe}' "$@"
+}}
 
-  _cmd_result=$('{python_exe}' -c "from bsm.cli import main;main(cmd_name='{cmd_name}',app_root='{app_root}',output_shell='sh')" $*)
+{cmd_name}() {{
+  _bsm_var_cmd_result="$(_{cmd_name}_main $*)"
   _bsm_var_command_exit_code=$?
-  if [ "$_bsm_var_command_exit_code" -eq 0 ]; then
-    eval "$_cmd_result"
-    _bsm_var_command_exit_code=$?
-  fi
-  unset _cmd_result
+  case "$_bsm_var_cmd_result" in
+    '{script_header}'*)
+      if [ "$_bsm_var_command_exit_code" -eq 0 ]; then
+        eval "$_bsm_var_cmd_result"
+        _bsm_var_command_exit_code=$?
+      fi
+      ;;
+    ?*)
+      printf '%s\\n' "$_bsm_var_cmd_result"
+      ;;
+  esac
+  unset _bsm_var_cmd_result
   return $_bsm_var_command_exit_code
 }}
-'''.format(cmd_name=self._cmd_name, python_exe=python_exe, app_root=self._app_root)
+'''.format(cmd_name=self._cmd_name, python_exe=python_exe, app_root=self._app_root,
+        daemon_client=DAEMON_CLIENT, daemon_socket=daemon_socket(), script_header=SCRIPT_HEADER)
 
         return bsm_func
 
     def script_exit(self):
         bsm_exit = '''\
 unset -f {cmd_name}
+unset -f _{cmd_name}_main
 '''.format(cmd_name=self._cmd_name)
         return bsm_exit
@@ -2,9 +2,6 @@ import os
 import sys
 import re
 import shutil
-import subprocess
-import datetime
-import pprint
 
 
 def camel_to_snake(name, delim='_'):
@@ -65,19 +62,43 @@ def expand_path(path):
     return os.path.normpath(temp_path)
 
 
+# subprocess, datetime and pprint are imported in functions to keep importing bsm.util cheap
+# These stand for subprocess.PIPE and subprocess.STDOUT in arguments
+_PIPE = object()
+_STDOUT = object()
+
 def check_output(args):
+    import subprocess
+
     p = subprocess.Popen(args, stdout=subprocess.PIPE)
     return p.communicate()[0].decode()
 
-def call(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=None, env=None, input=None):
+def call(args, stdout=_PIPE, stderr=_STDOUT, cwd=None, env=None, input=None):
+    import subprocess
+    from bsm.util.jobserver import jobserver_fds
+
+    if stdout is _PIPE:
+        stdout = subprocess.PIPE
+    if stderr is _STDOUT:
+        stderr = subprocess.STDOUT
+
+    # Keep the jobserver pipe open for the command. Python 2 does not close fds by default
+    kwargs = {}
+    fds = jobserver_fds(env)
+    if fds and sys.version_info >= (3, 2):
+        kwargs['pass_fds'] = fds
+
     p = subprocess.Popen(args,
             stdout=stdout, stderr=stderr, stdin=subprocess.PIPE,
-            cwd=cwd, env=env)
+            cwd=cwd, env=env, **kwargs)
     out, err = p.communicate(input=input)
     ret = p.returncode
     return (ret, out, err)
 
-def call_and_log(cmd, log, cwd=None, env=None, input=None):
+def log_command_start(cmd, log, cwd=None, env=None):
+    import datetime
+    import pprint
+
     log.write('='*80 + '\n')
     log.write(' - Start time: {0}\n'.format(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
     log.write(' - Command: {0}\n'.format(cmd))
@@ -86,6 +107,9 @@ def call_and_log(cmd, log, cwd=None, env=None, input=None):
     log.write('-'*80 + '\n')
     log.flush()
 
+def call_and_log(cmd, log, cwd=None, env=None, input=None):
+    log_command_start(cmd, log, cwd, env)
+
     try:
         ret, out, err = call(cmd, stdout=log, cwd=cwd, env=env, input=input)
     except OSError as e:
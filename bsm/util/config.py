@@ -1,37 +1,70 @@
-import yaml
-
-
 class ConfigError(Exception):
     pass
 
 
-class ExplicitDumper(yaml.SafeDumper):
-    def ignore_aliases(self, data):
-        return True
+# yaml is imported only when a config is really loaded or dumped.
+# The libyaml based loader and dumper are used when available,
+# which are much faster than the pure python ones.
+_yaml_loader = None
+_yaml_dumper = None
+
+def _make_loader(libyaml=True):
+    import yaml
+    if libyaml:
+        return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.SafeLoader
+
+def _make_dumper(libyaml=True):
+    import yaml
+    base = getattr(yaml, 'CSafeDumper', yaml.SafeDumper) if libyaml else yaml.SafeDumper
+
+    # ignore_aliases is called from the representer, which is the
+    # same python code for both CSafeDumper and SafeDumper
+    class ExplicitDumper(base):
+        def ignore_aliases(self, data):
+            return True
+
+    return ExplicitDumper
+
+def _loader():
+    global _yaml_loader
+    if _yaml_loader is None:
+        _yaml_loader = _make_loader()
+    return _yaml_loader
+
+def _dumper():
+    global _yaml_dumper
+    if _yaml_dumper is None:
+        _yaml_dumper = _make_dumper()
+    return _yaml_dumper
 
 
 def load_config(fn):
     try:
         with open(fn, 'r') as f:
-            return yaml.safe_load(f)
+            import yaml
+            return yaml.load(f, Loader=_loader())
     except Exception as e:
         raise ConfigError('Load config error: {0}'.format(e))
 
 def dump_config(data, fn):
     try:
         with open(fn, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False, Dumper=ExplicitDumper)
+            import yaml
+            yaml.dump(data, f, default_flow_style=False, Dumper=_dumper())
     except Exception as e:
         raise ConfigError('Dump config error: {0}'.format(e))
 
 def load_config_str(config_str):
     try:
-        return yaml.safe_load(config_str)
+        import yaml
+        return yaml.load(config_str, Loader=_loader())
     except Exception as e:
         raise ConfigError('Load config from string error: {0}'.format(e))
 
 def dump_config_str(data):
     try:
-        return yaml.dump(data, default_flow_style=False, Dumper=ExplicitDumper)
+        import yaml
+        return yaml.dump(data, default_flow_style=False, Dumper=_dumper())
     except Exception as e:
         raise ConfigError('Dump config error: {0}'.format(e))
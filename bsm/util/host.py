@@ -0,0 +1,82 @@
+''' Resources of this host, read from /proc on linux
+'''
+
+import os
+import multiprocessing
+
+
+def cpu_count():
+    '''Number of processors in /proc/cpuinfo'''
+    try:
+        with open('/proc/cpuinfo') as f:
+            count = sum(1 for line in f if line.startswith('processor'))
+        if count > 0:
+            return count
+    except (IOError, OSError):
+        pass
+
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def meminfo():
+    '''Values in /proc/meminfo in MiB, empty if not available'''
+    info = {}
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                fields = value.split()
+                if not fields:
+                    continue
+                try:
+                    info[name] = int(fields[0]) / 1024.0 if fields[1:] == ['kB'] else int(fields[0])
+                except ValueError:
+                    continue
+    except (IOError, OSError):
+        pass
+    return info
+
+
+def memory_total():
+    '''Total memory in MiB, None if unknown'''
+    return meminfo().get('MemTotal')
+
+
+def loadavg():
+    '''Load averages of 1, 5 and 15 minutes, None if not available'''
+    try:
+        with open('/proc/loadavg') as f:
+            return tuple(float(v) for v in f.read().split()[:3])
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def pressure(resource):
+    '''Pressure stall information of cpu, memory or io
+
+    Return like {'some': {'avg10': 1.5, ...}, 'full': {...}},
+    None if PSI is not supported by the kernel.
+    '''
+    try:
+        with open(os.path.join('/proc/pressure', resource)) as f:
+            lines = f.read().splitlines()
+    except (IOError, OSError):
+        return None
+
+    psi = {}
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        values = {}
+        for field in fields[1:]:
+            name, _, value = field.partition('=')
+            try:
+                values[name] = float(value)
+            except ValueError:
+                continue
+        psi[fields[0]] = values
+    return psi
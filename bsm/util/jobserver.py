@@ -0,0 +1,64 @@
+''' GNU make jobserver shared by the commands started from bsm
+'''
+
+import os
+import re
+
+
+_MAKEFLAGS_JOBSERVER = re.compile(r'--jobserver-(?:auth|fds)=(\d+),(\d+)')
+
+
+class Jobserver(object):
+    '''Pipe with job tokens, passed to the commands with MAKEFLAGS
+
+    Make, and other tools supporting the jobserver like cargo and ninja,
+    take a token from the pipe before starting another job, so all the
+    commands running at the same time share the same number of job
+    slots. Each top level make also runs one job without a token, as
+    what make does for its own sub makes.
+
+    Commands with an explicit "-j N" in the command line will not use
+    the jobserver.
+    '''
+    def __init__(self, jobs):
+        self.__jobs = max(int(jobs), 1)
+
+        self.__read_fd, self.__write_fd = os.pipe()
+        # Pipes are not inherited by child processes by default since python 3.4
+        if hasattr(os, 'set_inheritable'):
+            os.set_inheritable(self.__read_fd, True)
+            os.set_inheritable(self.__write_fd, True)
+
+        os.write(self.__write_fd, b'+' * (self.__jobs-1))
+
+    @property
+    def jobs(self):
+        return self.__jobs
+
+    def makeflags(self):
+        # --jobserver-fds for make before 4.2
+        return '-j{0} --jobserver-fds={1},{2} --jobserver-auth={1},{2}'.format(self.__jobs, self.__read_fd, self.__write_fd)
+
+    def env(self, env):
+        '''Environment with MAKEFLAGS pointing to this jobserver'''
+        env = env.copy()
+        flags = [f for f in env.get('MAKEFLAGS', '').split() if not (f.startswith('-j') or f.startswith('--jobserver-'))]
+        flags.append(self.makeflags())
+        env['MAKEFLAGS'] = ' '.join(flags)
+        return env
+
+    def close(self):
+        if self.__read_fd is not None:
+            os.close(self.__read_fd)
+            os.close(self.__write_fd)
+            self.__read_fd = self.__write_fd = None
+
+
+def jobserver_fds(env):
+    '''File descriptors of the jobserver in the MAKEFLAGS of env, which should be kept open for the command'''
+    if not env:
+        return ()
+    m = _MAKEFLAGS_JOBSERVER.search(env.get('MAKEFLAGS', ''))
+    if not m:
+        return ()
+    return (int(m.group(1)), int(m.group(2)))
@@ -0,0 +1,192 @@
+''' Job slots shared by all the bsm processes on this host
+
+Each slot is a file locked with flock in a common directory. No daemon
+is needed, and the lock is released by the system when the process
+holding it exits, even if it is killed.
+'''
+
+import os
+import stat
+import time
+import errno
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on windows
+    fcntl = None
+
+from bsm.logger import get_logger
+_logger = get_logger()
+
+
+class SlotNotAvailableError(Exception):
+    pass
+
+
+def slot_dir(group=None):
+    '''Slots are shared by the same user, or by all users in the group'''
+    if group is None:
+        name = str(os.getuid())
+    else:
+        name = 'group-{0}'.format(group)
+    return os.path.join(tempfile.gettempdir(), 'bsm-slots-{0}'.format(name))
+
+
+def _check_dir(directory, group_id):
+    '''The slot directory must be a real directory owned by us, or by the group'''
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise SlotNotAvailableError('Slot directory is not a directory: {0}'.format(directory))
+    if st.st_mode & stat.S_IWOTH:
+        raise SlotNotAvailableError('Slot directory is writable by others: {0}'.format(directory))
+    if group_id is None:
+        if st.st_uid != os.getuid():
+            raise SlotNotAvailableError('Slot directory is not owned by the current user: {0}'.format(directory))
+    elif st.st_gid != group_id:
+        raise SlotNotAvailableError('Slot directory does not belong to the group: {0}'.format(directory))
+
+
+class Slot(object):
+    def __init__(self, index, fd):
+        self.index = index
+        self.fd = fd
+
+
+class SlotBroker(object):
+    '''Hand out at most "slots" slots among all processes using the same directory
+
+    The broker could be pickled to worker processes, acquired slots could not.
+    '''
+    def __init__(self, slots, group=None, poll_interval=0.2):
+        if fcntl is None:
+            raise SlotNotAvailableError('flock is not supported on this platform')
+
+        self.__slots = max(int(slots), 1)
+        self.__group = group
+        self.__directory = slot_dir(group)
+        self.__poll_interval = poll_interval
+
+        self.__group_id = None
+        if group is not None:
+            import grp
+            try:
+                self.__group_id = grp.getgrnam(group).gr_gid
+            except KeyError:
+                raise SlotNotAvailableError('Group not found: {0}'.format(group))
+        # Slot files are shared by the group members, or private to the user
+        self.__file_mode = 0o600 if group is None else 0o660
+        self.__checked = False
+
+    @property
+    def slots(self):
+        return self.__slots
+
+    @property
+    def poll_interval(self):
+        return self.__poll_interval
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    def __ensure_dir(self):
+        if self.__checked:
+            return
+        try:
+            if self.__group is None:
+                os.mkdir(self.__directory, 0o700)
+            else:
+                os.mkdir(self.__directory)
+                os.chown(self.__directory, -1, self.__group_id)
+                os.chmod(self.__directory, 0o2770)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise SlotNotAvailableError('Can not create slot directory "{0}": {1}'.format(self.__directory, e))
+        # The directory could be created by anyone before
+        _check_dir(self.__directory, self.__group_id)
+        self.__checked = True
+
+    def __open_slot(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_CREAT | os.O_EXCL, self.__file_mode)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            # flock works on read only files
+            return os.open(path, os.O_RDONLY)
+        # The mode is limited by umask
+        os.fchmod(fd, self.__file_mode)
+        return fd
+
+    def __try_slot(self, index):
+        '''Return the slot, None if taken, False if the slot file is not accessible'''
+        path = os.path.join(self.__directory, 'slot.{0}'.format(index))
+        try:
+            fd = self.__open_slot(path)
+        except OSError as e:
+            _logger.debug('Slot file "{0}" not accessible: {1}'.format(path, e))
+            return False
+
+        # Not kept by the child processes
+        fcntl.fcntl(fd, fcntl.F_SETFD, fcntl.fcntl(fd, fcntl.F_GETFD) | fcntl.FD_CLOEXEC)
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as e:
+            os.close(fd)
+            if e.errno in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK):
+                return None
+            raise
+        return Slot(index, fd)
+
+    def try_acquire(self):
+        '''Return a free slot, or None if all slots are taken
+
+        Slots which could not be opened are skipped. If none of them
+        could be opened, SlotNotAvailableError is raised.
+        '''
+        self.__ensure_dir()
+        accessible = False
+        for index in range(self.__slots):
+            slot = self.__try_slot(index)
+            if slot:
+                return slot
+            if slot is None:
+                accessible = True
+        if not accessible:
+            raise SlotNotAvailableError('No slot file is accessible in "{0}"'.format(self.__directory))
+        return None
+
+    def acquire(self, timeout=None):
+        '''Wait until a slot is free, None if timeout'''
+        start = time.time()
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            if timeout is not None and time.time() - start >= timeout:
+                return None
+            time.sleep(self.__poll_interval)
+
+    def release(self, slot):
+        if slot is None or slot.fd is None:
+            return
+        try:
+            fcntl.flock(slot.fd, fcntl.LOCK_UN)
+        finally:
+            os.close(slot.fd)
+            slot.fd = None
+
+    def used(self):
+        '''Number of slots currently taken by all processes'''
+        self.__ensure_dir()
+        used = 0
+        for index in range(self.__slots):
+            slot = self.__try_slot(index)
+            if slot is None:
+                used += 1
+            elif slot:
+                self.release(slot)
+        return used
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+'''Measure the scheduling overhead of bsm.paradag.dag_run
+
+Usage: bench_dag_run.py [VERTICE] [WIDTH]
+
+A synthetic DAG is built with WIDTH parallel chains and random edges
+between neighbouring layers, 50000 vertice by default. The vertice do
+nothing, so only the bookkeeping of dag_run is timed. The previous
+implementation, which rebuilt the ready set on every wakeup, is kept
+here for comparison.
+
+The "pool" processor simulates a pool of 8 workers. It either returns
+one finished vertex per call (like the previous MultiThreadProcessor)
+or all of the finished ones.
+
+The same graph is also run as a CompactDag, and the memory used by
+both representations is shown on python 3.
+'''
+
+import os
+import sys
+import time
+import random
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir))
+
+from bsm.paradag import Dag, dag_run, FullSelector, NullProcessor, NullExecutor
+from bsm.paradag.compact_dag import CompactDag
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def dag_run_previous(dag, selector, processor, executor):
+    indegree_dict = {}
+    for vertex in dag.vertice():
+        indegree_dict[vertex] = dag.indegree(vertex)
+
+    vertice_final = []
+    vertice_processing = set()
+    vertice_zero_indegree = dag.all_starts()
+    while vertice_zero_indegree:
+        vertice_to_run = selector.select(vertice_processing, vertice_zero_indegree-vertice_processing)
+        executor.report_start(vertice_to_run)
+        executor.report_running(set(vertice_to_run) | vertice_processing)
+        vertice_processed_results = processor.process(vertice_to_run, executor)
+        executor.report_finish(vertice_processed_results)
+        vertice_processed = [result[0] for result in vertice_processed_results]
+        vertice_processing |= set(vertice_to_run)
+        vertice_processing -= set(vertice_processed)
+        vertice_final += vertice_processed
+        vertice_zero_indegree -= set(vertice_processed)
+
+        for vertex, result in vertice_processed_results:
+            for v_to in dag.successors(vertex):
+                executor.deliver(v_to, result)
+                indegree_dict[v_to] -= 1
+                if indegree_dict[v_to] == 0:
+                    vertice_zero_indegree.add(v_to)
+
+    return vertice_final
+
+
+class PoolProcessor(object):
+    def __init__(self, workers, drain):
+        self.__workers = workers
+        self.__drain = drain
+        self.__queue = deque()
+
+    def process(self, vertice, executor):
+        self.__queue.extend(vertice)
+        count = min(self.__workers, len(self.__queue)) if self.__drain else 1
+        return [(self.__queue.popleft(), None) for _ in range(count)]
+
+
+def build_dag(dag_class, vertice_number, width):
+    rnd = random.Random(0)
+    dag = dag_class()
+    dag.add_vertex(*range(vertice_number))
+    edges = []
+    for v in range(width, vertice_number):
+        edges.append((v - width, v))
+        edges.append((v - width - rnd.randrange(width) if v >= 2*width else v - width, v))
+    dag.add_edges(set(edges))
+    if dag_class is CompactDag:
+        dag.freeze()
+    return dag
+
+
+def build_measured(dag_class, vertice_number, width):
+    start = time.time()
+    dag = build_dag(dag_class, vertice_number, width)
+    elapsed = time.time() - start
+
+    # Build again for the memory, tracemalloc slows down the build a lot
+    memory = ''
+    if tracemalloc is not None:
+        tracemalloc.start()
+        dag_traced = build_dag(dag_class, vertice_number, width)
+        memory = ', {0:.1f} MiB'.format(tracemalloc.get_traced_memory()[0] / 1024.0 / 1024)
+        del dag_traced
+        tracemalloc.stop()
+
+    print('Build {0} with {1} vertice: {2:.3f}s{3}'.format(dag_class.__name__, vertice_number, elapsed, memory))
+    return dag
+
+
+def timed(func, dag, processor):
+    start = time.time()
+    result = func(dag, FullSelector(), processor, NullExecutor())
+    return time.time() - start, len(result)
+
+
+def main():
+    vertice_number = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    dag = build_measured(Dag, vertice_number, width)
+    compact_dag = build_measured(CompactDag, vertice_number, width)
+
+    cases = (
+        ('null processor', lambda: NullProcessor()),
+        ('pool processor, one per call', lambda: PoolProcessor(8, False)),
+        ('pool processor, drain all', lambda: PoolProcessor(8, True)),
+    )
+    for name, processor in cases:
+        for label, func in (('previous', dag_run_previous), ('current', dag_run)):
+            elapsed, count = timed(func, dag, processor())
+            print('{0:32} {1:8} {2:8.3f}s  ({3} vertice)'.format(name, label, elapsed, count))
+        elapsed, count = timed(dag_run, compact_dag, processor())
+        print('{0:32} {1:8} {2:8.3f}s  ({3} vertice)'.format(name, 'compact', elapsed, count))
+
+
+if __name__ == '__main__':
+    main()
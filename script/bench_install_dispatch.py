@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+'''Measure the cost of dispatching an install sub-handler
+
+Usage: bench_install_dispatch.py [ITERATIONS]
+
+Compares load_relative finding the caller from the stack (the previous
+way used by bsm.handler.install), load_relative with the caller name
+given, and the dispatch table of bsm.handler.install.
+'''
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir))
+
+from bsm.loader import load_relative
+import bsm.handler.install
+
+
+def stack_lookup():
+    # Called from __main__, so the module name is resolved from top level
+    return load_relative('bsm.handler.install.empty', 'run')
+
+def name_lookup():
+    return load_relative('install.empty', 'run', 'bsm.handler.install')
+
+def dispatch():
+    return bsm.handler.install.run('empty', {})
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    for name, func in (('inspect.stack load_relative', stack_lookup),
+                       ('explicit caller load_relative', name_lookup),
+                       ('dispatch table', dispatch)):
+        func()
+        best = min(timeit.repeat(func, number=iterations, repeat=3))
+        print('{0:32} {1:10.2f} us/call'.format(name, best / iterations * 1e6))
+
+
+if __name__ == '__main__':
+    main()
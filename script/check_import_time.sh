@@ -0,0 +1,36 @@
+#!/bin/sh
+
+# Fail if the cold import of bsm.cli takes longer than the budget
+# Usage: check_import_time.sh [BUDGET_MS] [PYTHON]
+
+budget_ms=${1:-120}
+python_exe=${2:-python}
+retry_time=3
+
+cd $(dirname "$0")/..
+
+import_time_us() {
+  "$python_exe" -X importtime -c 'import bsm.cli' 2>&1 >/dev/null | awk -F'|' '$3 == " bsm.cli" { gsub(/ /, "", $2); print $2 }'
+}
+
+best_us=''
+i=0
+while [ $i -lt $retry_time ]; do
+  us=$(import_time_us)
+  if [ -z "$us" ]; then
+    echo >&2 "Can not get import time of bsm.cli"
+    exit 2
+  fi
+  if [ -z "$best_us" ] || [ "$us" -lt "$best_us" ]; then
+    best_us=$us
+  fi
+  i=$((i+1))
+done
+
+best_ms=$((best_us/1000))
+echo "Import time of bsm.cli: ${best_ms}ms (budget: ${budget_ms}ms)"
+
+if [ "$best_ms" -gt "$budget_ms" ]; then
+  echo >&2 "Import time of bsm.cli exceeds the budget"
+  exit 1
+fi
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+'''Check that the libyaml and pure python backends of bsm.util.config give identical results
+
+Usage: check_yaml_parity.py DIR_OR_FILE...
+
+All the *.yml and *.yaml files found (e.g. in a release config directory)
+are loaded and dumped with both implementations, and the results compared.
+'''
+
+import os
+import sys
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir))
+
+import bsm.util.config
+from bsm.util.config import ConfigError
+from bsm.util.config import load_config_str
+from bsm.util.config import dump_config_str
+
+
+_BACKEND = {
+    'libyaml': (bsm.util.config._make_loader(True), bsm.util.config._make_dumper(True)),
+    'python': (bsm.util.config._make_loader(False), bsm.util.config._make_dumper(False)),
+}
+
+
+def with_backend(name, func, *args):
+    '''Run func with the loader and dumper of bsm.util.config switched to the backend'''
+    saved = bsm.util.config._yaml_loader, bsm.util.config._yaml_dumper
+    bsm.util.config._yaml_loader, bsm.util.config._yaml_dumper = _BACKEND[name]
+    try:
+        return func(*args)
+    finally:
+        bsm.util.config._yaml_loader, bsm.util.config._yaml_dumper = saved
+
+
+def yaml_files(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for f in sorted(files):
+                if os.path.splitext(f)[1] in ('.yml', '.yaml'):
+                    yield os.path.join(root, f)
+
+def check_file(fn):
+    with open(fn) as f:
+        content = f.read()
+
+    try:
+        py_data = with_backend('python', load_config_str, content)
+        c_data = with_backend('libyaml', load_config_str, content)
+    except ConfigError as e:
+        return str(e)
+    if py_data != c_data:
+        return 'load differs'
+
+    # Shared data would be dumped with anchors without ignore_aliases
+    data = [py_data, py_data]
+    py_str = with_backend('python', dump_config_str, data)
+    c_str = with_backend('libyaml', dump_config_str, data)
+    if py_str != c_str:
+        return 'dump differs'
+
+    if with_backend('libyaml', load_config_str, c_str) != data:
+        return 'round trip differs'
+
+    return None
+
+
+def main():
+    if not getattr(yaml, '__with_libyaml__', False):
+        sys.stderr.write('libyaml is not available for this PyYAML\n')
+        sys.exit(2)
+
+    if len(sys.argv) < 2:
+        sys.stderr.write('Usage: {0} DIR_OR_FILE...\n'.format(sys.argv[0]))
+        sys.exit(2)
+    paths = sys.argv[1:]
+
+    failed = 0
+    total = 0
+    for fn in yaml_files(paths):
+        total += 1
+        error = check_file(fn)
+        if error:
+            failed += 1
+            print('FAIL {0}: {1}'.format(fn, error))
+
+    print('{0} files checked, {1} failed'.format(total, failed))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
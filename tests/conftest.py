@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Run the tests against this source tree
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir))
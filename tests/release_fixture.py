@@ -0,0 +1,103 @@
+''' A small release with two packages for the tests
+'''
+
+import os
+import shutil
+import tempfile
+
+from bsm.util.config import dump_config
+
+
+SETTING = {
+    'categories': {
+        'ctg': {
+            'root': '{software_root}/ctg',
+            'install': True,
+            'auto_env': True,
+        },
+    },
+    'install': {
+        'steps': ['download', 'compile', 'env'],
+    },
+}
+
+
+def _command(root, name, script):
+    return {'command': {'cmd': ['sh', '-c', script], 'cwd': os.path.join(root, 'ctg', name)}}
+
+def _packages(root):
+    pkga = {
+        'version': '2.0',
+        'install': {
+            'download': {'command': {'cmd': ['mkdir', '-p', os.path.join(root, 'ctg', 'pkga')], 'cwd': root}},
+            'compile': [
+                _command(root, 'pkga', 'echo "$BSM_STEP_JOBS" > jobs.txt; echo compile >> steps.txt'),
+                _command(root, 'pkga', 'echo compile.1 >> steps.txt'),
+            ],
+            'env': 'env_package',
+        },
+        'path': {'bin': 'bin'},
+        'env': {
+            'set_env': {'PKGA_HOME': 'pkga-{version}'},
+            'prepend_path': {'PATH': '{bin}'},
+        },
+    }
+    pkgb = {
+        'version': '1.1',
+        'dep': 'pkga',
+        'install': {
+            'download': {'command': {'cmd': ['mkdir', '-p', os.path.join(root, 'ctg', 'pkgb')], 'cwd': root}},
+            'compile': _command(root, 'pkgb', 'echo "$PKGA_HOME" > pkga_home.txt; echo compile >> steps.txt'),
+        },
+        'env': {
+            'prepend_path': {'PATH': '/opt/pkgb/bin', 'PKGB_PATH': ['/opt/pkgb/first', '/opt/pkgb/second']},
+            'append_path': {'PATH': "/opt/pkgb's bin", 'MANPATH': '/opt/pkgb/man'},
+            'alias': {'pkgb-run': 'echo "pkgb $PKGA_HOME"'},
+        },
+    }
+    return {'pkga': pkga, 'pkgb': pkgb}
+
+
+class ReleaseFixture(object):
+    '''Release source and software root in a temporary directory'''
+    def __init__(self, version='1.0', user_config=None):
+        self.version = version
+        self.root = tempfile.mkdtemp(prefix='bsm-test-')
+        self.software_root = os.path.join(self.root, 'software')
+        self.release_source = os.path.join(self.root, 'release')
+
+        config_dir = os.path.join(self.release_source, 'config')
+        os.makedirs(os.path.join(config_dir, 'package', 'ctg'))
+        os.makedirs(os.path.join(self.release_source, 'handler'))
+        with open(os.path.join(self.release_source, 'handler', '__init__.py'), 'w'):
+            pass
+
+        dump_config(SETTING, os.path.join(config_dir, 'setting.yml'))
+        dump_config(version, os.path.join(config_dir, 'version.yml'))
+        for name, pkg_config in _packages(self.software_root).items():
+            dump_config(pkg_config, os.path.join(config_dir, 'package', 'ctg', name+'.yml'))
+
+        user = {'software_root': self.software_root}
+        user.update(user_config or {})
+        self.config_user_file = os.path.join(self.root, 'bsm.conf')
+        dump_config(user, self.config_user_file)
+
+    def entry(self, **kwargs):
+        entry = {
+            'config_user_file': self.config_user_file,
+            'scenario': self.version,
+            'software_root': self.software_root,
+            'release_source': self.release_source,
+        }
+        entry.update(kwargs)
+        return entry
+
+    def package_file(self, name, filename):
+        return os.path.join(self.software_root, 'ctg', name, filename)
+
+    def read(self, name, filename):
+        with open(self.package_file(name, filename)) as f:
+            return f.read().splitlines()
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+from bsm import Bsm
+from bsm.shell import Shell
+from bsm.util import which
+
+from release_fixture import ReleaseFixture
+
+
+_DUMP_ENV = '{0} -c "import os, json; print(json.dumps(dict(os.environ)))"'.format(sys.executable)
+
+# Set by the shell itself
+_SHELL_VARIABLES = ('PWD', 'OLDPWD', 'SHLVL', '_')
+
+
+class TestActivationScript(unittest.TestCase):
+    def setUp(self):
+        self.fixture = ReleaseFixture()
+        Bsm(self.fixture.entry()).install_release()
+
+    def tearDown(self):
+        self.fixture.cleanup()
+
+    def script(self, initial_env, shell_name, activation):
+        '''Script from "bsm use", with or without the activation script'''
+        bsm = Bsm(self.fixture.entry(), initial_env=initial_env)
+        script_file = bsm.use(shell_name if activation else None)
+        self.assertEqual(bool(script_file), activation)
+
+        shell = Shell(shell_name, 'bsm', '')
+        shell.add_env(bsm.apply_env_changes())
+        if script_file:
+            shell.source(script_file)
+        return shell.script
+
+    def run_shell(self, shell_exe, initial_env, script, command):
+        script_file = os.path.join(self.fixture.root, 'use.script')
+        with open(script_file, 'w') as f:
+            f.write(script)
+        source = 'source' if 'csh' in shell_exe else '.'
+        output = subprocess.check_output([shell_exe, '-c', '{0} {1}; {2}'.format(source, script_file, command)],
+                env=initial_env, universal_newlines=True)
+        return output
+
+    def final_env(self, shell_exe, initial_env, script):
+        env = json.loads(self.run_shell(shell_exe, initial_env, script, _DUMP_ENV))
+        for k in _SHELL_VARIABLES:
+            env.pop(k, None)
+        return env
+
+    def compare(self, initial_env):
+        script = self.script(initial_env, 'sh', False)
+        activation_script = self.script(initial_env, 'sh', True)
+
+        env = self.final_env('sh', initial_env, script)
+        self.assertEqual(self.final_env('sh', initial_env, activation_script), env)
+        self.assertEqual(self.run_shell('sh', initial_env, activation_script, 'alias pkgb-run'),
+                self.run_shell('sh', initial_env, script, 'alias pkgb-run'))
+        return env
+
+    def test_same_as_add_env(self):
+        initial_env = {'PATH': '/usr/bin:/bin', 'PKGB_PATH': ''}
+        env = self.compare(initial_env)
+
+        self.assertEqual(env['PATH'], os.pathsep.join(['/opt/pkgb/bin', self.fixture.package_file('pkga', 'bin'),
+            '/usr/bin', '/bin', "/opt/pkgb's bin"]))
+        self.assertEqual(env['PKGB_PATH'], '/opt/pkgb/first:/opt/pkgb/second')
+        self.assertEqual(env['MANPATH'], '/opt/pkgb/man')
+        self.assertEqual(env['PKGA_HOME'], 'pkga-2.0')
+
+        # Switch again from the activated release, which is unloaded first
+        self.assertEqual(self.compare(env), env)
+
+    def test_original_path(self):
+        self.compare({'PATH': '/usr/bin', 'MANPATH': '/usr/share/man', 'PKGB_PATH': '/pkgb'})
+
+    @unittest.skipIf(not (which('tcsh') or which('csh')), 'csh is not available')
+    def test_csh(self):
+        csh_exe = which('tcsh') or which('csh')
+        initial_env = {'PATH': '/usr/bin:/bin', 'PKGB_PATH': ''}
+
+        script = self.script(initial_env, 'csh', False)
+        activation_script = self.script(initial_env, 'csh', True)
+        self.assertEqual(self.final_env(csh_exe, initial_env, activation_script), self.final_env(csh_exe, initial_env, script))
+
+    def test_not_fresh(self):
+        config_dir = Bsm(self.fixture.entry()).config('release_path')['config_dir']
+        os.utime(os.path.join(config_dir, 'version.yml'), None)
+
+        bsm = Bsm(self.fixture.entry(), initial_env={'PATH': '/usr/bin'})
+        self.assertEqual(bsm.use('sh'), '')
+        self.assertEqual(bsm.env_final()['PKGA_HOME'], 'pkga-2.0')
@@ -0,0 +1,56 @@
+import random
+import unittest
+
+from bsm.paradag import Dag
+from bsm.paradag import DagVertexNotFoundError
+from bsm.paradag import DagCycleError
+from bsm.paradag.compact_dag import CompactDag
+from bsm.paradag.compact_dag import DagFrozenError
+
+
+class TestCompactDag(unittest.TestCase):
+    def test_same_graph_as_dag(self):
+        rnd = random.Random(0)
+        dag = Dag()
+        compact_dag = CompactDag()
+        dag.add_vertex(*range(200))
+        compact_dag.add_vertex(*range(200))
+        edges = set()
+        for _ in range(600):
+            a, b = sorted(rnd.sample(range(200), 2))
+            edges.add((a, b))
+        dag.add_edges(edges)
+        compact_dag.add_edges(edges)
+
+        for v in dag.vertice():
+            self.assertEqual(sorted(dag.successors(v)), sorted(compact_dag.successors(v)))
+            self.assertEqual(sorted(dag.predecessors(v)), sorted(compact_dag.predecessors(v)))
+            self.assertEqual(dag.indegree(v), compact_dag.indegree(v))
+            self.assertEqual(dag.outdegree(v), compact_dag.outdegree(v))
+        self.assertEqual(dag.all_starts(), compact_dag.all_starts())
+        self.assertEqual(dag.all_terminals(), compact_dag.all_terminals())
+
+    def test_unknown_vertex(self):
+        # A bad edge must not leave a half added edge behind
+        compact_dag = CompactDag()
+        compact_dag.add_vertex('a', 'b')
+        self.assertRaises(DagVertexNotFoundError, compact_dag.add_edges, [('a', 'missing')])
+        self.assertRaises(DagVertexNotFoundError, compact_dag.add_edges, [('missing', 'a')])
+        self.assertRaises(DagVertexNotFoundError, compact_dag.add_edges, [('a', 'b'), ('b', 'missing')])
+
+        self.assertEqual(compact_dag.edge_size(), 0)
+        self.assertEqual(compact_dag.successors('a'), [])
+        self.assertEqual(compact_dag.indegree('b'), 0)
+
+    def test_cycle(self):
+        compact_dag = CompactDag()
+        compact_dag.add_vertex('a', 'b', 'c')
+        compact_dag.add_edges([('a', 'b'), ('b', 'c'), ('c', 'a')])
+        self.assertRaises(DagCycleError, compact_dag.freeze)
+
+    def test_frozen(self):
+        compact_dag = CompactDag()
+        compact_dag.add_vertex('a', 'b')
+        compact_dag.freeze()
+        self.assertRaises(DagFrozenError, compact_dag.add_vertex, 'c')
+        self.assertRaises(DagFrozenError, compact_dag.add_edge, 'a', 'b')
@@ -0,0 +1,67 @@
+import os
+import unittest
+
+from bsm import Bsm
+from bsm.config import Config
+from bsm.config.release import _load_release_manifest
+
+from release_fixture import ReleaseFixture
+
+
+class TestConfigResetEnv(unittest.TestCase):
+    def setUp(self):
+        self.fixture = ReleaseFixture()
+        Bsm(self.fixture.entry()).install_release()
+
+        self.env = dict(os.environ)
+        self.env.pop('BSM_RELEASE_VERSION', None)
+        self.config = Config(self.fixture.entry(), initial_env=self.env)
+
+    def tearDown(self):
+        self.fixture.cleanup()
+
+    def test_unchanged_env(self):
+        package_install = self.config['package_install']
+
+        env = dict(self.env)
+        env['UNRELATED_VARIABLE'] = 'changed'
+        self.config.reset_env(env)
+
+        self.assertIs(self.config['package_install'], package_install)
+
+    def test_changed_env(self):
+        package_install = self.config['package_install']
+
+        env = dict(self.env)
+        env['BSM_RELEASE_VERSION'] = 'changed'
+        self.config.reset_env(env)
+
+        self.assertIsNot(self.config['package_install'], package_install)
+
+
+class TestReleaseManifest(unittest.TestCase):
+    def setUp(self):
+        self.fixture = ReleaseFixture()
+        Bsm(self.fixture.entry()).install_release()
+
+        release_path = Config(self.fixture.entry())['release_path']
+        self.manifest_file = release_path['manifest_file']
+        self.config_dir = release_path['config_dir']
+
+    def tearDown(self):
+        self.fixture.cleanup()
+
+    def test_manifest_written(self):
+        manifest_dir, manifest_name = os.path.split(self.manifest_file)
+        self.assertEqual([f for f in os.listdir(manifest_dir) if f.startswith(manifest_name)], [manifest_name])
+
+        data = _load_release_manifest(self.manifest_file, self.config_dir)
+        self.assertEqual(data['version'], '1.0')
+        self.assertEqual(sorted(data['package']), ['ctg/pkga', 'ctg/pkgb'])
+
+    def test_release_reinstalled(self):
+        version_file = os.path.join(self.config_dir, 'version.yml')
+        st = os.stat(version_file)
+        os.utime(version_file, (st.st_atime, st.st_mtime + 10))
+
+        self.assertEqual(_load_release_manifest(self.manifest_file, self.config_dir), None)
@@ -0,0 +1,51 @@
+import sys
+import unittest
+
+from bsm.daemon import client
+
+
+class _Fallback(Exception):
+    pass
+
+
+class TestDaemonClient(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.saved = client._fallback, client._request, sys.argv
+
+        def fallback(cmd_name, app_root, output_shell, check_cli, args):
+            raise _Fallback(args)
+
+        def request(socket_path, message):
+            self.requests.append(message)
+            return {'exit': 0, 'stdout': '', 'stderr': ''}
+
+        client._fallback = fallback
+        client._request = request
+
+    def tearDown(self):
+        client._fallback, client._request, sys.argv = self.saved
+
+    def run_client(self, *args):
+        sys.argv = ['client.py', '/tmp/bsm-test.sock', 'bsm', '', 'sh', 'False'] + list(args)
+        try:
+            client.main()
+        except SystemExit as e:
+            return e.code
+        except _Fallback:
+            return 'fallback'
+
+    def test_subcommand(self):
+        self.assertEqual(client._subcommand(['--shell', 'sh', '--config-user', 'install', 'use', '1.0']), 'use')
+        self.assertEqual(client._subcommand(['-v', '--output-format=json', 'install', '-y']), 'install')
+        self.assertEqual(client._subcommand(['--app-root', 'ls']), None)
+
+    def test_interactive_in_process(self):
+        self.assertEqual(self.run_client('--shell', 'sh', 'install', '1.0'), 'fallback')
+        self.assertEqual(self.run_client('-v', 'pkg-install', 'pkga'), 'fallback')
+        self.assertEqual(self.requests, [])
+
+    def test_daemon(self):
+        self.assertEqual(self.run_client('--shell', 'sh', 'use', '1.0'), 0)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0]['args'], ['--shell', 'sh', 'use', '1.0'])
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from bsm.const import HANDLER_MODULE_NAME
+from bsm.handler import register_handler_dir
+from bsm.handler import registered_handler_dir
+from bsm.handler import resolve_handler
+
+
+class TestResolveHandler(unittest.TestCase):
+    def setUp(self):
+        self.old_handler_dir = registered_handler_dir()
+        self.handler_dir = tempfile.mkdtemp(prefix='bsm-test-')
+        self.module_dir = os.path.join(self.handler_dir, HANDLER_MODULE_NAME)
+        register_handler_dir(self.handler_dir)
+
+    def tearDown(self):
+        register_handler_dir(self.old_handler_dir)
+        shutil.rmtree(self.handler_dir)
+
+    def write_handler(self, name):
+        if not os.path.isdir(self.module_dir):
+            os.mkdir(self.module_dir)
+            open(os.path.join(self.module_dir, '__init__.py'), 'w').close()
+        with open(os.path.join(self.module_dir, name+'.py'), 'w') as f:
+            f.write('def run(param):\n    return {0!r}\n'.format(name))
+        # Make sure the change is seen with a coarse mtime
+        st = os.stat(self.module_dir)
+        os.utime(self.module_dir, (st.st_atime, st.st_mtime + 10))
+
+    def test_module_dir_created(self):
+        self.assertEqual(resolve_handler('test_handler_a'), [])
+
+        self.write_handler('test_handler_a')
+        funcs = resolve_handler('test_handler_a')
+        self.assertEqual(funcs[0][0], HANDLER_MODULE_NAME)
+        self.assertEqual(funcs[0][1]({}), 'test_handler_a')
+
+    def test_handler_added(self):
+        self.write_handler('test_handler_a')
+        self.assertEqual(resolve_handler('test_handler_b'), [])
+
+        self.write_handler('test_handler_b')
+        self.assertEqual(len(resolve_handler('test_handler_b')), 1)
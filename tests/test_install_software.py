@@ -0,0 +1,60 @@
+import os
+import unittest
+
+from bsm import Bsm
+
+from release_fixture import ReleaseFixture
+
+
+class TestInstallSoftware(unittest.TestCase):
+    def setUp(self):
+        self.fixture = ReleaseFixture()
+
+    def tearDown(self):
+        self.fixture.cleanup()
+
+    def install(self, **entry):
+        bsm = Bsm(self.fixture.entry(**entry))
+        bsm.install_release()
+        bsm.install_software()
+        return bsm
+
+    def test_steps_and_dependencies(self):
+        self.install()
+
+        self.assertEqual(self.fixture.read('pkga', 'steps.txt'), ['compile', 'compile.1'])
+        self.assertEqual(self.fixture.read('pkgb', 'steps.txt'), ['compile'])
+        # env_package of pkga is done before pkgb starts
+        self.assertEqual(self.fixture.read('pkgb', 'pkga_home.txt'), ['pkga-2.0'])
+
+    def test_finished_steps_skipped(self):
+        self.install()
+        self.install()
+
+        self.assertEqual(self.fixture.read('pkga', 'steps.txt'), ['compile', 'compile.1'])
+        self.assertEqual(self.fixture.read('pkgb', 'steps.txt'), ['compile'])
+
+    def test_jobs_from_entry(self):
+        self.install(jobs=3)
+
+        jobs = int(self.fixture.read('pkga', 'jobs.txt')[0])
+        self.assertTrue(1 <= jobs <= 3)
+
+    def test_no_software_in_cmd(self):
+        from bsm.cmd.install import Install
+
+        bsm = Bsm(self.fixture.entry())
+        Install(bsm, 'plain').execute(reinstall=False, update=True, no_software=True, force=False, yes=True)
+        self.assertFalse(os.path.exists(self.fixture.package_file('pkga', 'steps.txt')))
+
+        Install(bsm, 'plain').execute(reinstall=False, update=False, no_software=False, force=False, yes=True)
+        self.assertEqual(self.fixture.read('pkga', 'steps.txt'), ['compile', 'compile.1'])
+
+
+class TestInstallSoftwareCompactDag(TestInstallSoftware):
+    def setUp(self):
+        self.fixture = ReleaseFixture(user_config={'compact_dag': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+
+from bsm.util.slot import SlotBroker
+from bsm.util.slot import SlotNotAvailableError
+
+
+class TestSlotBroker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='bsm-test-')
+        self.old_temp_dir = tempfile.tempdir
+        tempfile.tempdir = self.temp_dir
+        self.old_umask = os.umask(0o077)
+
+    def tearDown(self):
+        os.umask(self.old_umask)
+        tempfile.tempdir = self.old_temp_dir
+        shutil.rmtree(self.temp_dir)
+
+    def test_acquire_and_release(self):
+        broker = SlotBroker(2)
+        slot0 = broker.try_acquire()
+        slot1 = broker.try_acquire()
+        self.assertEqual(broker.try_acquire(), None)
+        self.assertEqual(broker.used(), 2)
+
+        broker.release(slot0)
+        self.assertEqual(broker.used(), 1)
+        broker.release(slot1)
+
+    def test_slot_file(self):
+        broker = SlotBroker(1)
+        slot = broker.try_acquire()
+
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.join(broker.directory, 'slot.0')).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(broker.directory).st_mode), 0o700)
+
+        import fcntl
+        self.assertTrue(fcntl.fcntl(slot.fd, fcntl.F_GETFD) & fcntl.FD_CLOEXEC)
+        broker.release(slot)
+
+    def test_world_writable_dir(self):
+        broker = SlotBroker(1)
+        os.mkdir(broker.directory)
+        os.chmod(broker.directory, 0o777)
+
+        self.assertRaises(SlotNotAvailableError, broker.try_acquire)
+
+    def test_symlink_dir(self):
+        broker = SlotBroker(1)
+        target = os.path.join(self.temp_dir, 'target')
+        os.mkdir(target, 0o700)
+        os.symlink(target, broker.directory)
+
+        self.assertRaises(SlotNotAvailableError, broker.try_acquire)
+
+    @unittest.skipIf(os.getuid() == 0, 'root could open any file')
+    def test_inaccessible_slot_skipped(self):
+        broker = SlotBroker(2)
+        os.mkdir(broker.directory, 0o700)
+        slot_file = os.path.join(broker.directory, 'slot.0')
+        open(slot_file, 'w').close()
+        os.chmod(slot_file, 0)
+
+        slot = broker.try_acquire()
+        self.assertEqual(slot.index, 1)
+        broker.release(slot)
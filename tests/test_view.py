@@ -0,0 +1,67 @@
+import copy
+import json
+import pickle
+import unittest
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from bsm.config.view import MappingView
+from bsm.config.view import materialize
+
+
+class LazyMapping(Mapping):
+    '''Mapping which records the keys read'''
+    def __init__(self, data):
+        self.data = data
+        self.read = []
+
+    def __getitem__(self, key):
+        self.read.append(key)
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class TestMappingView(unittest.TestCase):
+    def setUp(self):
+        self.lazy = LazyMapping({'pkga': {'version': '1.0'}, 'pkgb': {'version': '2.0'}})
+        self.data = {'setting': {'steps': ['download', 'compile']}, 'package': self.lazy}
+
+    def test_copy_on_write(self):
+        view = MappingView(self.data)
+        view['setting']['steps'].append('env')
+        view['setting']['new'] = True
+
+        self.assertEqual(self.data['setting'], {'steps': ['download', 'compile']})
+        self.assertTrue(view.mutated)
+
+    def test_lazy_mapping(self):
+        view = MappingView(self.data)
+        self.assertEqual(self.lazy.read, [])
+
+        self.assertEqual(view['package']['pkga']['version'], '1.0')
+        self.assertEqual(self.lazy.read, ['pkga'])
+        self.assertFalse(view.mutated)
+
+        view['package']['pkga']['version'] = '1.1'
+        self.assertEqual(self.lazy.data['pkga']['version'], '1.0')
+        self.assertTrue(view.mutated)
+
+    def test_plain_data(self):
+        view = MappingView(self.data)
+        plain = {'setting': {'steps': ['download', 'compile']},
+                 'package': {'pkga': {'version': '1.0'}, 'pkgb': {'version': '2.0'}}}
+
+        self.assertEqual(materialize(view), plain)
+        self.assertEqual(type(materialize(view)['package']), dict)
+        self.assertEqual(view, plain)
+        self.assertEqual(json.loads(json.dumps(view)), plain)
+        self.assertEqual(pickle.loads(pickle.dumps(view)), plain)
+        self.assertEqual(copy.deepcopy(MappingView(self.lazy)), plain['package'])
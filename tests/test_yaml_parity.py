@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import yaml
+
+from bsm.util.config import _make_loader
+from bsm.util.config import _make_dumper
+
+
+# Covers the parts of yaml where the libyaml and python implementations could differ
+REPRESENTATIVE_YAML = u'''
+default: &default
+  root: '{software_root}/external'
+  install: true
+  auto_env: yes
+  version_dir: off
+  jobs: 4
+categories:
+  external:
+    <<: *default
+  data:
+    <<: *default
+    install: no
+    root: /data/{name}
+steps: &steps [download, extract, compile, install]
+other_steps: *steps
+integer:
+  decimal: 12345
+  negative: -42
+  hex: 0x1f
+  octal: 017
+  underscore: 1_000_000
+  big: 123456789012345678901234567890
+float:
+  simple: 3.14
+  exponent: 6.02e+23
+  negative: -0.5
+  infinite: .inf
+bool: [true, false, True, FALSE, yes, No, on, OFF]
+null_value: [~, null, '']
+tagged:
+  string: !!str 123
+  integer: !!int '42'
+  float: !!float '1'
+  binary: !!binary aGVsbG8=
+  set: !!set {a, b}
+date: 2019-01-02
+timestamp: 2019-01-02 03:04:05
+version: 1.10
+unicode:
+  chinese: 北京谱仪
+  greek: αβγ
+  escaped: "caf\\u00e9 \\U0001F600"
+  key_é: value
+multiline:
+  literal: |
+    line 1
+      line 2
+  folded: >
+    folded
+    text
+  quoted: 'it''s "quoted"'
+'''
+
+
+@unittest.skipIf(not getattr(yaml, '__with_libyaml__', False), 'libyaml is not available')
+class TestYamlParity(unittest.TestCase):
+    def load(self, libyaml, content):
+        return yaml.load(content, Loader=_make_loader(libyaml))
+
+    def dump(self, libyaml, data):
+        # Same options as dump_config
+        return yaml.dump(data, default_flow_style=False, Dumper=_make_dumper(libyaml))
+
+    def test_loader(self):
+        self.assertIs(_make_loader(True), yaml.CSafeLoader)
+        self.assertIs(_make_loader(False), yaml.SafeLoader)
+
+    def test_load(self):
+        c_data = self.load(True, REPRESENTATIVE_YAML)
+        py_data = self.load(False, REPRESENTATIVE_YAML)
+
+        self.assertEqual(c_data, py_data)
+        self.assertEqual(c_data['categories']['data']['jobs'], 4)
+        self.assertEqual(c_data['integer']['octal'], 15)
+        self.assertEqual(c_data['unicode']['chinese'], u'北京谱仪')
+        self.assertEqual(c_data['version'], 1.1)
+
+    def test_types(self):
+        c_data = self.load(True, REPRESENTATIVE_YAML)
+        py_data = self.load(False, REPRESENTATIVE_YAML)
+
+        def types(value):
+            if isinstance(value, dict):
+                return dict((k, types(v)) for k, v in value.items())
+            if isinstance(value, list):
+                return [types(v) for v in value]
+            return type(value)
+
+        self.assertEqual(types(c_data), types(py_data))
+
+    def test_dump(self):
+        data = self.load(False, REPRESENTATIVE_YAML)
+        # Shared data would be dumped with anchors without ignore_aliases
+        data = [data, data]
+
+        c_str = self.dump(True, data)
+        py_str = self.dump(False, data)
+
+        self.assertEqual(c_str, py_str)
+        self.assertNotIn('&', c_str)
+        self.assertEqual(self.load(True, c_str), data)